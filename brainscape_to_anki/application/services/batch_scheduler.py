@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import AsyncContextManager, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BatchScheduler:
+    """Runs jobs on a single background event loop with bounded concurrency.
+
+    ``submit`` is thread-safe, so GUI callbacks and other front ends can hand
+    over work without owning an event loop. An optional ``lifespan`` async
+    context manager (e.g. a ``ScraperService``) is entered on the scheduler's
+    loop at start-up and exited on shutdown, so loop-bound resources such as a
+    pooled HTTP client live exactly as long as the scheduler.
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int = 8,
+            lifespan: Optional[AsyncContextManager] = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.logger = logging.getLogger(__name__)
+        self.max_concurrency = max_concurrency
+        self.lifespan = lifespan
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._ready = threading.Event()
+        self._startup_error: Optional[BaseException] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        self._ready.clear()
+        self._startup_error = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="batch-scheduler", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+
+        if self._startup_error is not None:
+            self._thread.join()
+            raise RuntimeError("Batch scheduler failed to start") from self._startup_error
+
+        self.logger.info(f"Batch scheduler started (max concurrency: {self.max_concurrency})")
+
+    def submit(self, job: Callable[[], Awaitable[T]]) -> "Future[T]":
+        """Schedule ``job()`` on the scheduler loop; callable from any thread."""
+        if not self.running or self._loop is None:
+            raise RuntimeError("Batch scheduler is not running")
+
+        return asyncio.run_coroutine_threadsafe(self._run_job(job), self._loop)
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        if not self.running or self._loop is None:
+            return
+
+        self.logger.info("Stopping batch scheduler")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+    async def _run_job(self, job: Callable[[], Awaitable[T]]) -> T:
+        async with self._semaphore:
+            return await job()
+
+    def _run_loop(self) -> None:
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+
+        try:
+            loop.run_until_complete(self._startup())
+        except BaseException as e:
+            self.logger.error(f"Batch scheduler start-up failed: {str(e)}")
+            self._startup_error = e
+            self._ready.set()
+            loop.close()
+            return
+
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(self._teardown())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    async def _startup(self) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self.lifespan is not None:
+            await self.lifespan.__aenter__()
+
+    async def _teardown(self) -> None:
+        pending = [
+            task for task in asyncio.all_tasks()
+            if task is not asyncio.current_task()
+        ]
+        for task in pending:
+            task.cancel()
+        if pending:
+            self.logger.info(f"Cancelling {len(pending)} unfinished jobs")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if self.lifespan is not None:
+            await self.lifespan.__aexit__(None, None, None)
@@ -0,0 +1,233 @@
+import hashlib
+import unicodedata
+import zlib
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field, replace
+from itertools import chain, repeat
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+
+# Stripped from both ends of a side; inside the text punctuation can matter
+EDGE_PUNCTUATION = " .,;:!?\"'()[]"
+SIDE_SEPARATOR = "\x1f"
+# Signature value of a bin no shingle hashed into; real values are offsets within the bin
+EMPTY_BIN = 0xFFFFFFFF
+# How far below the threshold a signature estimate may be before the exact check is skipped
+ESTIMATE_MARGIN = 0.25
+
+
+def normalize_text(text: str) -> str:
+    """Case, Unicode forms, spacing and surrounding punctuation folded away."""
+    text = " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+    return text.strip(EDGE_PUNCTUATION)
+
+
+def shingles(text: bytes, size: int) -> Set[bytes]:
+    """Overlapping ``size``-byte pieces; shorter text is one piece."""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def shingle_hashes(text: bytes, size: int, seed: int) -> Iterable[int]:
+    """crc32 of every shingle, repeats included; ``seed`` gives another hash family."""
+    if len(text) <= size:
+        return [zlib.crc32(text, seed)] if text else []
+    pieces = map(text.__getitem__, map(slice, range(len(text) - size + 1), range(size, len(text) + 1)))
+    return map(zlib.crc32, pieces, repeat(seed))
+
+
+def jaccard(first: Set[bytes], second: Set[bytes]) -> float:
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def estimate(first: Sequence[int], second: Sequence[int]) -> float:
+    """Jaccard similarity estimated from two MinHash signatures."""
+    filled = agreeing = 0
+    for a, b in zip(first, second):
+        if a != EMPTY_BIN or b != EMPTY_BIN:
+            filled += 1
+            agreeing += a == b
+    return agreeing / filled if filled else 1.0
+
+
+@dataclass(frozen=True)
+class DedupConfig:
+    """Which duplicates to merge and how hard to look for near ones.
+
+    Exact duplicates have the same front, back and media once case,
+    spacing and surrounding punctuation are normalized. Near duplicates,
+    only merged when ``near`` is set, have the same media and both sides
+    at least ``threshold`` similar (Jaccard similarity of their
+    ``shingle_size``-byte shingles). Candidates are found with MinHash
+    and LSH: ``bands`` bands of ``rows`` values each, so cards about as
+    similar as the threshold almost always share a band while dissimilar
+    ones rarely do. A card is compared with at most ``max_candidates``
+    earlier cards per band, which bounds the work on templated decks.
+    """
+    exact: bool = True
+    near: bool = False
+    threshold: float = 0.8
+    shingle_size: int = 4
+    bands: int = 8
+    rows: int = 4
+    max_candidates: int = 16
+
+
+@dataclass
+class DedupResult:
+    flashcards: List[Flashcard]
+    # For every input card, the input index of the card it was merged into (itself when kept)
+    merged_into: List[int] = field(default_factory=list)
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+
+
+class CardDeduplicator:
+    """Merges duplicate cards of one card list, keeping the first of each.
+
+    The first card of each group of duplicates stays where it was and
+    collects the tags of the others, so a card found in several decks of
+    a merged pack carries every sub-deck tag. Exact duplicates are found
+    with one hash index; near duplicates with one-permutation MinHash
+    signatures banded for LSH. Bands are grouped by sorting rather than
+    through per-band hash tables, so memory stays a few bytes per card
+    and band, and the work grows with the number of cards, not with the
+    number of pairs of cards.
+    """
+
+    def __init__(self, config: Optional[DedupConfig] = None):
+        self.config = config or DedupConfig()
+        bins = self.config.bands * self.config.rows
+        if bins & (bins - 1):
+            raise ValueError(f"bands * rows must be a power of two, not {bins}")
+        self._bin_width = 1 << 32 >> (bins.bit_length() - 1)
+        self._bin_starts = [n * self._bin_width for n in range(bins)]
+
+    def deduplicate(self, flashcards: List[Flashcard]) -> DedupResult:
+        merged_into = list(range(len(flashcards)))
+        sides = [self._normalized(flashcard) for flashcard in flashcards]
+        exact_duplicates = self._merge_exact(flashcards, sides, merged_into) if self.config.exact else 0
+        near_duplicates = self._merge_near(flashcards, sides, merged_into) if self.config.near else 0
+        # An exact duplicate of a card that was then merged as a near duplicate follows it
+        for i, target in enumerate(merged_into):
+            merged_into[i] = merged_into[target]
+
+        extra_tags: Dict[int, List[str]] = {}
+        for i, target in enumerate(merged_into):
+            if target != i:
+                extra_tags.setdefault(target, []).extend(flashcards[i].tags)
+
+        kept = []
+        for i, flashcard in enumerate(flashcards):
+            if merged_into[i] != i:
+                continue
+            tags = extra_tags.get(i)
+            if tags:
+                # dict.fromkeys keeps the first occurrence of each tag, in order
+                flashcard = replace(flashcard, tags=tuple(dict.fromkeys(flashcard.tags + tuple(tags))))
+            kept.append(flashcard)
+
+        return DedupResult(kept, merged_into, exact_duplicates, near_duplicates)
+
+    @staticmethod
+    def _normalized(flashcard: Flashcard) -> Tuple[str, str, str]:
+        media = SIDE_SEPARATOR.join(sorted(f"{ref.side}:{ref.filename or ref.url}" for ref in flashcard.media))
+        return normalize_text(flashcard.front), normalize_text(flashcard.back), media
+
+    @staticmethod
+    def _merge_exact(flashcards: List[Flashcard], sides: List[Tuple[str, str, str]], merged_into: List[int]) -> int:
+        first_of: Dict[bytes, int] = {}
+        duplicates = 0
+        for i in range(len(flashcards)):
+            # 16 bytes per card instead of the normalized text itself
+            key = hashlib.blake2b(SIDE_SEPARATOR.join(sides[i]).encode("utf-8"), digest_size=16).digest()
+            first = first_of.setdefault(key, i)
+            if first != i:
+                merged_into[i] = first
+                duplicates += 1
+        return duplicates
+
+    def _merge_near(
+            self, flashcards: List[Flashcard], sides: List[Tuple[str, str, str]], merged_into: List[int]
+    ) -> int:
+        config = self.config
+        bins = config.bands * config.rows
+        survivors = [i for i in range(len(flashcards)) if merged_into[i] == i]
+        position_of = {i: position for position, i in enumerate(survivors)}
+        # Signatures back to back and one array of band keys per band, aligned with survivors
+        signatures = array("I")
+        band_keys = [array("q") for _ in range(config.bands)]
+        for i in survivors:
+            front, back, _ = sides[i]
+            signature = self._signature(front.encode("utf-8"), back.encode("utf-8"))
+            signatures.extend(signature)
+            for band, keys in enumerate(band_keys):
+                values = tuple(signature[band * config.rows:(band + 1) * config.rows])
+                # Short cards leave bins empty; a band of only empty bins says nothing
+                keys.append(hash(values) if any(value != EMPTY_BIN for value in values) else 0)
+
+        candidates: Dict[int, Set[int]] = {}
+        for keys in band_keys:
+            order = sorted(range(len(survivors)), key=keys.__getitem__)
+            start = 0
+            for end in range(1, len(order) + 1):
+                if end < len(order) and keys[order[end]] == keys[order[start]]:
+                    continue
+                if keys[order[start]] != 0 and end - start > 1:
+                    # Sorting is stable, so each group lists cards in deck order
+                    group = [survivors[position] for position in order[start:end]]
+                    for k in range(1, len(group)):
+                        candidates.setdefault(group[k], set()).update(group[:min(k, config.max_candidates)])
+                start = end
+
+        duplicates = 0
+        floor = config.threshold - ESTIMATE_MARGIN
+        for i in sorted(candidates):
+            start = position_of[i] * bins
+            signature = signatures[start:start + bins]
+            checked: Set[int] = set()
+            for candidate in sorted(candidates[i]):
+                target = merged_into[candidate]
+                if target in checked:
+                    continue
+                checked.add(target)
+                # Most candidates share one band by chance; their signatures tell them apart cheaply
+                start = position_of[target] * bins
+                if estimate(signature, signatures[start:start + bins]) < floor:
+                    continue
+                if self._similar(sides[i], sides[target]):
+                    merged_into[i] = target
+                    duplicates += 1
+                    break
+        return duplicates
+
+    def _signature(self, front: bytes, back: bytes) -> List[int]:
+        # Hashed and sorted without a Python-level loop per shingle. The top
+        # bits of a hash pick its bin, so sorting groups the hashes by bin
+        # and each bin's minimum is the first hash at or after its start
+        size = self.config.shingle_size
+        hashes = sorted(chain(shingle_hashes(front, size, 0), shingle_hashes(back, size, 1)))
+        signature = []
+        for start in self._bin_starts:
+            position = bisect_left(hashes, start)
+            if position < len(hashes) and hashes[position] < start + self._bin_width:
+                signature.append(hashes[position] - start)
+            else:
+                signature.append(EMPTY_BIN)
+        return signature
+
+    def _similar(self, first: Tuple[str, str, str], second: Tuple[str, str, str]) -> bool:
+        if first[2] != second[2]:
+            return False
+        size = self.config.shingle_size
+        for a, b in zip(first[:2], second[:2]):
+            if a == b:
+                continue
+            if jaccard(shingles(a.encode("utf-8"), size), shingles(b.encode("utf-8"), size)) < self.config.threshold:
+                return False
+        return True
@@ -0,0 +1,49 @@
+import logging
+import re
+from dataclasses import replace
+from typing import List, Optional
+
+from brainscape_to_anki.application.services.card_deduplicator import CardDeduplicator
+from brainscape_to_anki.domain.models.deck import Deck, DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.note_identity import NoteGuids, deck_key
+
+
+class DeckMerger:
+    """Combines several decks into one, tagging every card with its sub-deck.
+
+    Cards found in more than one deck are kept once, carrying the sub-deck
+    tag of every deck they were found in. Every card keeps the GUID it has
+    in its own deck's export, so adding or dropping a deck leaves the notes
+    of the others alone. Pass a ``CardDeduplicator``
+    configured for near duplicates to also merge reworded copies, or
+    ``CardDeduplicator(DedupConfig(exact=False))`` to keep every card.
+    """
+
+    def __init__(self, deduplicator: Optional[CardDeduplicator] = None):
+        self.logger = logging.getLogger(__name__)
+        self.deduplicator = deduplicator or CardDeduplicator()
+
+    def merge(self, title: str, decks: List[Deck], url: str, source_id: Optional[str] = None) -> Deck:
+        parent_tag = self._tag(title)
+        flashcards: List[Flashcard] = []
+
+        for deck in decks:
+            sub_deck_tag = f"{parent_tag}::{self._tag(deck.title)}"
+            guids = NoteGuids(deck_key(DeckInfo(deck.title, deck.url, deck.source_id)))
+            for flashcard in deck.flashcards:
+                tags = flashcard.tags if sub_deck_tag in flashcard.tags else flashcard.tags + (sub_deck_tag,)
+                flashcards.append(replace(flashcard, tags=tags, guid=flashcard.guid or guids.assign(flashcard)))
+
+        result = self.deduplicator.deduplicate(flashcards)
+        if result.exact_duplicates or result.near_duplicates:
+            self.logger.info(
+                f"Merged {len(decks)} decks into '{title}': {len(result.flashcards)} of {len(flashcards)} cards kept, "
+                f"{result.exact_duplicates} exact and {result.near_duplicates} near duplicates merged"
+            )
+        return Deck(title=title, flashcards=result.flashcards, url=url, source_id=source_id)
+
+    def _tag(self, name: str) -> str:
+        # Anki tags are space separated and use :: for hierarchy
+        tag = re.sub(r"\s+", "_", name.strip())
+        return tag.replace("::", "_") or "deck"
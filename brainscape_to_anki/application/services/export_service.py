@@ -1,12 +1,15 @@
+import logging
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterable, Optional
 
 from brainscape_to_anki.domain.interfaces.exporter import ExporterInterface
-from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.deck import Deck, DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
 
 
 class ExportService:
     def __init__(self, exporter: ExporterInterface):
+        self.logger = logging.getLogger(__name__)
         self.exporter = exporter
     
     def export_deck(self, deck: Deck, output_dir: Path) -> Optional[Path]:
@@ -14,3 +17,23 @@ class ExportService:
             return self.exporter.export(deck, output_dir)
         except Exception:
             return None
+
+    async def export_stream(
+            self, info: DeckInfo, flashcards: AsyncIterable[Flashcard], output_dir: Path
+    ) -> Optional[Path]:
+        """Export cards as they arrive; a stream without cards writes no file."""
+        iterator = aiter(flashcards)
+        first = await anext(iterator, None)
+        if first is None:
+            return None
+
+        async def chained():
+            yield first
+            async for flashcard in iterator:
+                yield flashcard
+
+        try:
+            return await self.exporter.export_async_stream(info, chained(), output_dir)
+        except Exception as e:
+            self.logger.exception(f"Error exporting {info.url}: {str(e)}")
+            return None
@@ -1,12 +1,52 @@
-from typing import Optional
+import asyncio
+import logging
+from typing import AsyncIterable, AsyncIterator, List, Optional
 
 from brainscape_to_anki.domain.interfaces.scraper import ScraperInterface
-from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.deck import Deck, DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.pack import Pack
 
 
 class ScraperService:
-    def __init__(self, scraper: ScraperInterface):
+    def __init__(self, scraper: ScraperInterface, max_concurrency: int = 8):
+        self.logger = logging.getLogger(__name__)
         self.scraper = scraper
+        self.max_concurrency = max_concurrency
+
+    async def __aenter__(self) -> "ScraperService":
+        await self.scraper.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.scraper.close()
     
     async def scrape_deck(self, url: str) -> Optional[Deck]:
         return await self.scraper.scrape(url)
+
+    def iter_flashcards(self, url: str, info: Optional[DeckInfo] = None) -> AsyncIterator[Flashcard]:
+        return self.scraper.iter_flashcards(url, info)
+
+    async def fetch_media(self, deck: Deck) -> Deck:
+        return await self.scraper.fetch_media(deck)
+
+    def fetch_card_media(self, flashcards: AsyncIterable[Flashcard], url: str) -> AsyncIterator[Flashcard]:
+        return self.scraper.fetch_card_media(flashcards, url)
+
+    async def expand_pack(self, url: str) -> Optional[Pack]:
+        return await self.scraper.expand_pack(url)
+
+    async def scrape_decks(self, urls: List[str]) -> List[Optional[Deck]]:
+        # Bounded worker pool; results keep the order of the input URLs
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def scrape_one(url: str) -> Optional[Deck]:
+            async with semaphore:
+                try:
+                    return await self.scraper.scrape(url)
+                except Exception as e:
+                    # One broken deck must not take the rest of the pack down
+                    self.logger.exception(f"Error scraping {url}: {str(e)}")
+                    return None
+
+        return await asyncio.gather(*(scrape_one(url) for url in urls))
@@ -1,22 +1,114 @@
+import asyncio
+import hashlib
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import AsyncIterator, List, Optional, Tuple
 
+from brainscape_to_anki.application.services.deck_merger import DeckMerger
 from brainscape_to_anki.application.services.export_service import ExportService
 from brainscape_to_anki.application.services.scraper_service import ScraperService
-from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.deck import Deck, DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
 
 
 class ScrapeToAnkiUseCase:
-    def __init__(self, scraper_service: ScraperService, export_service: ExportService):
+    def __init__(
+            self, scraper_service: ScraperService, export_service: ExportService,
+            deck_merger: Optional[DeckMerger] = None
+    ):
         self.scraper_service = scraper_service
         self.export_service = export_service
+        self.deck_merger = deck_merger or DeckMerger()
+
+    async def __aenter__(self) -> "ScrapeToAnkiUseCase":
+        await self.scraper_service.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.scraper_service.__aexit__(exc_type, exc, tb)
     
+    async def fetch_media(self, deck: Deck) -> Deck:
+        return await self.scraper_service.fetch_media(deck)
+
     async def execute(self, url: str, output_dir: Path) -> Tuple[Optional[Deck], Optional[Path]]:
         deck = await self.scraper_service.scrape_deck(url)
         
         if not deck:
             return None, None
-        
-        output_path = self.export_service.export_deck(deck, output_dir)
+
+        deck = await self.scraper_service.fetch_media(deck)
+        output_path = await self._export(deck, output_dir)
         
         return deck, output_path
+
+    async def execute_streaming(self, url: str, output_dir: Path) -> Tuple[DeckInfo, Optional[Path]]:
+        """Scrape, fetch media and export a deck card by card.
+
+        No more than a chunk of cards is held at any time, so memory does
+        not grow with the size of the deck. ``card_count`` of the returned info
+        counts the cards exported.
+        """
+        info = DeckInfo(title="", url=url)
+        flashcards = self.scraper_service.fetch_card_media(self.scraper_service.iter_flashcards(url, info), url)
+        output_path = await self.export_service.export_stream(info, self._counted(flashcards, info), output_dir)
+        return info, output_path
+
+    @staticmethod
+    async def _counted(flashcards: AsyncIterator[Flashcard], info: DeckInfo) -> AsyncIterator[Flashcard]:
+        async for flashcard in flashcards:
+            info.card_count += 1
+            yield flashcard
+
+    async def execute_pack(
+            self, url: str, output_dir: Path, merge: bool = False
+    ) -> Optional[List[Tuple[Deck, Optional[Path]]]]:
+        """Scrape every deck of a pack concurrently.
+
+        Returns None when the URL is not a pack. Otherwise returns one
+        (deck, path) pair per exported file: one per deck, or a single merged
+        deck whose cards are tagged with their sub-deck when ``merge`` is set.
+        """
+        pack = await self.scraper_service.expand_pack(url)
+        if pack is None:
+            return None
+
+        decks = [deck for deck in await self.scraper_service.scrape_decks(pack.deck_urls) if deck]
+        if not decks:
+            return []
+        # Shared images are downloaded once however many decks use them
+        decks = list(await asyncio.gather(*(self.scraper_service.fetch_media(deck) for deck in decks)))
+
+        if merge:
+            merged = self.deck_merger.merge(pack.title, decks, pack.url, pack.source_id)
+            return [(merged, await self._export(merged, output_dir))]
+
+        return [(deck, await self._export(deck, output_dir)) for deck in decks]
+
+    async def execute_merged(
+            self, title: str, urls: List[str], output_dir: Path
+    ) -> Tuple[Optional[Deck], Optional[Path]]:
+        """Scrape every deck behind ``urls``, packs expanded, into one merged file.
+
+        Cards are tagged with their sub-deck and a card found in several
+        decks is exported once. Cards keep the note identity of their own
+        deck, so changing the links keeps the notes of the decks still in
+        them; the merged deck's ``source_id``, which names the Anki deck and
+        the delta manifest, depends only on the set of deck URLs.
+        """
+        deck_urls: List[str] = []
+        for url in urls:
+            pack = await self.scraper_service.expand_pack(url)
+            deck_urls.extend(pack.deck_urls if pack else [url])
+        deck_urls = list(dict.fromkeys(deck_urls))
+
+        decks = [deck for deck in await self.scraper_service.scrape_decks(deck_urls) if deck]
+        if not decks:
+            return None, None
+        decks = list(await asyncio.gather(*(self.scraper_service.fetch_media(deck) for deck in decks)))
+
+        key = hashlib.blake2b("\n".join(sorted(deck_urls)).encode("utf-8"), digest_size=8).hexdigest()
+        merged = self.deck_merger.merge(title, decks, urls[0], f"merged-{key}")
+        return merged, await self._export(merged, output_dir)
+
+    async def _export(self, deck: Deck, output_dir: Path) -> Optional[Path]:
+        # Exporters block on disk and network I/O
+        return await asyncio.to_thread(self.export_service.export_deck, deck, output_dir)
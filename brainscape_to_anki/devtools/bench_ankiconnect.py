@@ -0,0 +1,133 @@
+"""Checks and times the AnkiConnect exporter against a simulated Anki.
+
+Sends a synthetic deck of ``--cards`` cards to an in-process
+``MockAnkiConnectServer``, first one note per request (on the first
+``--baseline-cards`` cards) and then in batches, and prints notes/s and
+requests of each. Then sends the deck again with ``--edits`` changed
+backs and as many new cards, and once more unchanged::
+
+    python -m brainscape_to_anki.devtools.bench_ankiconnect --cards 20000 --batch-size 500 --concurrency 2
+
+``--latency`` and ``--note-cost`` set what each request and each note
+cost the simulated Anki. Every run must leave exactly the deck's notes in
+Anki, add and update exactly what changed and store every media file.
+Exits with status 1 on any mismatch.
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List
+
+from brainscape_to_anki.devtools.bench_apkg_export import build_deck
+from brainscape_to_anki.devtools.mock_ankiconnect import MockAnkiConnectConfig, MockAnkiConnectServer
+from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import BACK, FRONT
+from brainscape_to_anki.infrastructure.exporters.anki_exporter import html_field
+from brainscape_to_anki.infrastructure.exporters.ankiconnect_exporter import AnkiConnectConfig, AnkiConnectExporter
+from brainscape_to_anki.infrastructure.media.store import MediaStore
+
+
+def expected_notes(deck: Deck) -> Counter:
+    return Counter(
+        (
+            html_field(flashcard, FRONT),
+            html_field(flashcard, BACK),
+            tuple(tag.replace(" ", "_") for tag in flashcard.tags),
+        )
+        for flashcard in deck.flashcards
+    )
+
+
+def anki_notes(server: MockAnkiConnectServer, deck: Deck) -> Counter:
+    return Counter(
+        (note["fields"]["Front"], note["fields"]["Back"], tuple(note["tags"])) for note in server.notes(deck.title)
+    )
+
+
+def edit_deck(deck: Deck, edits: int, rng: random.Random) -> Deck:
+    flashcards: List[Flashcard] = list(deck.flashcards)
+    for i in rng.sample(range(len(flashcards)), edits):
+        flashcards[i] = replace(flashcards[i], back=flashcards[i].back + " (corrected)")
+    for n in range(edits):
+        flashcards.insert(rng.randrange(len(flashcards)), Flashcard(front=f"New question {n}", back=f"New answer {n}"))
+    return replace(deck, flashcards=flashcards)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check and time the AnkiConnect exporter")
+    parser.add_argument("--cards", type=int, default=20000)
+    parser.add_argument("--media", type=int, default=20, help="distinct images, on every tenth card")
+    parser.add_argument("--baseline-cards", type=int, default=1000, help="cards sent one note per request")
+    parser.add_argument("--batch-size", type=int, default=AnkiConnectConfig.batch_size)
+    parser.add_argument("--concurrency", type=int, default=AnkiConnectConfig.concurrency)
+    parser.add_argument("--edits", type=int, default=100, help="changed backs, and as many new cards")
+    parser.add_argument("--latency", type=float, default=0.002, help="seconds each request costs")
+    parser.add_argument("--note-cost", type=float, default=0.00002, help="seconds each note costs Anki")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rng = random.Random(1)
+    problems: List[str] = []
+    with tempfile.TemporaryDirectory(prefix="brainscape_ankiconnect_") as scratch, MockAnkiConnectServer(
+            MockAnkiConnectConfig(latency=args.latency, note_cost=args.note_cost)
+    ) as server:
+        scratch_dir = Path(scratch)
+        store = MediaStore(scratch_dir / "store")
+        deck = build_deck(args.cards, args.media, store)
+        # Repeated fronts must stay separate notes and be matched again later
+        deck.flashcards[10:10] = [Flashcard(front="Same question", back=f"Answer {n}") for n in range(3)]
+        baseline = replace(deck, title="Baseline deck", flashcards=deck.flashcards[:args.baseline_cards])
+        edited = edit_deck(deck, args.edits, rng)
+
+        runs = [
+            ("per note", baseline, AnkiConnectConfig(url=server.url, batch_size=1, concurrency=1),
+             {"added": len(baseline.flashcards)}),
+            ("batched", deck, None, {"added": len(deck.flashcards)}),
+            ("after edits", edited, None,
+             {"added": args.edits, "updated": args.edits, "unchanged": len(deck.flashcards) - args.edits}),
+            ("unchanged", edited, None, {"unchanged": len(edited.flashcards)}),
+        ]
+        batched_config = AnkiConnectConfig(url=server.url, batch_size=args.batch_size, concurrency=args.concurrency)
+        for name, version, config, expected in runs:
+            exporter = AnkiConnectExporter(config or batched_config, store)
+            requests_before = server.stats().get("requests", 0)
+            started = time.perf_counter()
+            report_path = exporter.export(version, scratch_dir / "reports")
+            elapsed = time.perf_counter() - started
+            exporter.close()
+            requests = server.stats().get("requests", 0) - requests_before
+
+            report: Dict[str, object] = json.loads(report_path.read_text(encoding="utf-8"))
+            counts = {key: report[key] for key in ("added", "updated", "unchanged")}
+            print(f"{name:<12} {elapsed:7.2f}s {len(version.flashcards) / elapsed:9.0f} cards/s "
+                  f"{requests:>6} requests   {counts}, {len(report['failed'])} failed")
+
+            if {key: value for key, value in counts.items() if value} != expected or report["failed"]:
+                problems.append(f"{name}: report {counts}, {len(report['failed'])} failed, expected {expected}")
+            if anki_notes(server, version) != expected_notes(version):
+                problems.append(f"{name}: Anki's deck does not hold the deck's notes")
+
+        stats = server.stats()
+        referenced = {ref.filename for flashcard in deck.flashcards for ref in flashcard.media}
+        if set(server.collection.media) != referenced:
+            problems.append(f"{len(server.collection.media)} media files in Anki for {len(referenced)} referenced")
+        if stats.get("createModel") != 1:
+            problems.append(f"note type created {stats.get('createModel', 0)} times")
+
+    if problems:
+        for problem in problems:
+            print(f"MISMATCH: {problem}")
+        sys.exit(1)
+    print(f"Anki holds every deck's notes; actions run: {dict(sorted(stats.items()))}")
+
+
+if __name__ == "__main__":
+    main()
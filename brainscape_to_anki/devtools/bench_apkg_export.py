@@ -0,0 +1,138 @@
+"""Benchmark of the Anki package exporter against the CSV exporter.
+
+Exports one synthetic deck of ``--cards`` cards (50k by default) with
+``AnkiExporter`` and ``ApkgExporter``, prints the time and file size of
+each, then opens the package and checks every note, card, tag and media
+file against the deck::
+
+    python -m brainscape_to_anki.devtools.bench_apkg_export --cards 50000 --media 20
+
+Only the export side is timed here. The CSV file still has to be parsed
+and its fields mapped by Anki's importer; the package imports as is.
+Exits with status 1 if the package does not match the deck.
+"""
+import argparse
+import html
+import json
+import logging
+import sqlite3
+import sys
+import tempfile
+import time
+import zipfile
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from brainscape_to_anki.devtools.mock_brainscape import MockServerConfig, deck_cards
+from brainscape_to_anki.domain.interfaces.exporter import ExporterInterface
+from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import BACK, FRONT, IMAGE, MediaRef
+from brainscape_to_anki.infrastructure.exporters.anki_exporter import AnkiExporter, html_field
+from brainscape_to_anki.infrastructure.exporters.apkg_exporter import COLLECTION_NAME, FIELD_SEPARATOR, ApkgExporter
+from brainscape_to_anki.infrastructure.media.store import MediaStore
+
+
+def build_deck(cards: int, media: int, store: MediaStore) -> Deck:
+    filenames = [store.put(f"image {i}".encode("utf-8") * 64, ".png") for i in range(media)]
+    flashcards = []
+    for i, (front, back) in enumerate(deck_cards(1, MockServerConfig(cards_per_deck=cards))):
+        refs = ()
+        if filenames and i % 10 == 0:
+            refs = (MediaRef(f"/media/{i}.png", IMAGE, FRONT, filenames[i // 10 % len(filenames)]),)
+        tags = (f"chapter_{i % 12}",) if i % 3 == 0 else ()
+        flashcards.append(Flashcard(front=f"{front} <&>", back=back, tags=tags, media=refs))
+    return Deck(title="Benchmark deck", flashcards=flashcards, url="https://example.com/decks/1", source_id="1")
+
+
+def timed(export: Callable[[], Path]) -> Tuple[Path, float]:
+    started = time.perf_counter()
+    path = export()
+    return path, time.perf_counter() - started
+
+
+def check_package(path: Path, deck: Deck, store: MediaStore) -> List[str]:
+    problems = []
+    with zipfile.ZipFile(path) as package, tempfile.TemporaryDirectory() as scratch:
+        collection_path = Path(package.extract(COLLECTION_NAME, scratch))
+        media_map = json.loads(package.read("media"))
+        for member, filename in media_map.items():
+            if package.read(member) != store.path(filename).read_bytes():
+                problems.append(f"media {member} is not {filename}")
+
+        connection = sqlite3.connect(collection_path)
+        try:
+            if connection.execute("PRAGMA integrity_check").fetchone()[0] != "ok":
+                problems.append("collection fails the integrity check")
+            notes = connection.execute("SELECT id, guid, flds, tags FROM notes ORDER BY id").fetchall()
+            cards = connection.execute("SELECT nid, due FROM cards ORDER BY id").fetchall()
+            decks = json.loads(connection.execute("SELECT decks FROM col").fetchone()[0])
+        finally:
+            connection.close()
+
+    if len(notes) != len(deck.flashcards) or len(cards) != len(deck.flashcards):
+        problems.append(f"{len(notes)} notes and {len(cards)} cards for {len(deck.flashcards)} flashcards")
+    if len({guid for _, guid, _, _ in notes}) != len(notes):
+        problems.append("note GUIDs are not unique")
+    if not any(entry["name"] == deck.title for entry in decks.values()):
+        problems.append(f"no deck named {deck.title!r}")
+    referenced = {ref.filename for flashcard in deck.flashcards for ref in flashcard.media}
+    if set(media_map.values()) != referenced:
+        problems.append(f"{len(media_map)} media files packed for {len(referenced)} referenced")
+
+    for i, (flashcard, (note_id, _, fields, tags), (card_note, due)) in enumerate(zip(deck.flashcards, notes, cards)):
+        expected = html_field(flashcard, FRONT) + FIELD_SEPARATOR + html_field(flashcard, BACK)
+        if fields != expected or html.unescape(fields.split(FIELD_SEPARATOR)[1]) != flashcard.back:
+            problems.append(f"note {i + 1} has fields {fields!r}")
+        if tags.split() != list(flashcard.tags):
+            problems.append(f"note {i + 1} has tags {tags!r}")
+        if card_note != note_id or due != i + 1:
+            problems.append(f"card {i + 1} belongs to note {card_note} at position {due}")
+        if len(problems) > 10:
+            break
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the .apkg exporter against CSV export")
+    parser.add_argument("--cards", type=int, default=50000)
+    parser.add_argument("--media", type=int, default=20, help="distinct images, on every tenth card")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per exporter; the fastest counts")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory(prefix="brainscape_apkg_") as scratch:
+        scratch_dir = Path(scratch)
+        store = MediaStore(scratch_dir / "store")
+        deck = build_deck(args.cards, args.media, store)
+        # The CSV exporter links media next to the file once; later runs find it there
+        exporters: List[Tuple[str, ExporterInterface]] = [
+            ("csv", AnkiExporter(store)),
+            ("apkg", ApkgExporter(store)),
+        ]
+
+        results = {}
+        for name, exporter in exporters:
+            output_dir = scratch_dir / name
+            runs = [timed(lambda: exporter.export(deck, output_dir)) for _ in range(args.repeat)]
+            path = runs[0][0]
+            best = min(elapsed for _, elapsed in runs)
+            results[name] = (path, best)
+            print(f"{name:<5} {best:7.3f}s  {len(deck.flashcards) / best:9.0f} cards/s  "
+                  f"{path.stat().st_size / 2 ** 20:6.1f} MiB  {path.name}")
+
+        problems = check_package(results["apkg"][0], deck, store)
+        # A deck without media exercises the plain-text fields too
+        plain = replace(deck, flashcards=[replace(flashcard, media=()) for flashcard in deck.flashcards[:100]])
+        problems += check_package(ApkgExporter().export(plain, scratch_dir / "plain"), plain, store)
+
+    if problems:
+        for problem in problems:
+            print(f"MISMATCH: {problem}")
+        sys.exit(1)
+    print(f"Package matches the deck: {len(deck.flashcards)} notes and cards, {args.media} media files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Checks and times merging decks that share cards into one export.
+
+Builds ``--decks`` synthetic decks, ``--cards`` cards in all, that share
+cards the way the decks of a course do: a share ``--shared`` of the cards
+are copies of cards from a common pool, some of them with other case,
+spacing or end punctuation and a share ``--reworded`` with one word
+changed. Deduplicates the merged cards with exact duplicates only and with
+near duplicates as well, on half of the decks and on all of them, then
+exports the deck unmerged and merged as CSV::
+
+    python -m brainscape_to_anki.devtools.bench_deck_merge --cards 300000 --decks 60
+
+No card may be merged into a copy of another card, and in exact mode
+every copy that only differs in formatting must be merged. Exits with
+status 1 on any mismatch.
+"""
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from brainscape_to_anki.application.services.card_deduplicator import CardDeduplicator, DedupConfig, DedupResult
+from brainscape_to_anki.application.services.deck_merger import DeckMerger
+from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.infrastructure.exporters.anki_exporter import AnkiExporter
+
+SYLLABLES = ["ka", "lo", "mi", "ner", "tra", "vo", "pe", "shi", "du", "ran", "el", "os", "ta", "quin", "bar"]
+
+
+def sentence(rng: random.Random, words: List[str], shortest: int, longest: int) -> str:
+    return " ".join(rng.choice(words) for _ in range(rng.randint(shortest, longest)))
+
+
+def reformat(text: str, rng: random.Random) -> str:
+    """Same card text as another export of it might spell it."""
+    roll = rng.random()
+    if roll < 0.4:
+        return text.upper()
+    if roll < 0.7:
+        return "  " + text.replace(" ", "  ")
+    return text.rstrip("?") + "."
+
+
+def build_decks(
+        cards: int, decks: int, shared: float, reworded: float, rng: random.Random
+) -> Tuple[List[Deck], List[Tuple[int, int]]]:
+    """Decks, and for every card in merge order the pool card it copies and the word it changed (-1 if none)."""
+    words = list({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(20000)})
+    pool = [(sentence(rng, words, 4, 12) + "?", sentence(rng, words, 1, 15)) for _ in range(int(cards * shared / 3))]
+    result: List[Deck] = []
+    origins: List[Tuple[int, int]] = []
+    for d in range(decks):
+        flashcards = []
+        for _ in range(cards // decks):
+            if pool and rng.random() < shared:
+                origin, changed = rng.randrange(len(pool)), -1
+                front, back = pool[origin]
+                roll = rng.random()
+                if roll < reworded:
+                    front_words = front.split()
+                    changed = rng.randrange(len(front_words))
+                    front_words[changed] += "s"
+                    front = " ".join(front_words)
+                elif roll < reworded + 0.3:
+                    front = reformat(front, rng)
+            else:
+                # Cards of one deck only get origins no pool card has
+                origin, changed = len(pool) + len(origins), -1
+                front, back = sentence(rng, words, 4, 12) + "?", sentence(rng, words, 1, 15)
+            flashcards.append(Flashcard(front=front, back=back))
+            origins.append((origin, changed))
+        url = f"https://example.com/decks/{d + 1}"
+        result.append(Deck(title=f"Chapter {d + 1}", flashcards=flashcards, url=url, source_id=str(d + 1)))
+    return result, origins
+
+
+def check(result: DedupResult, origins: List[Tuple[int, int]], near: bool) -> List[str]:
+    problems = []
+    wrong = sum(1 for i, target in enumerate(result.merged_into) if origins[target][0] != origins[i][0])
+    if wrong:
+        problems.append(f"{wrong} cards merged into a copy of another card")
+    if not near:
+        if any(origins[target] != origins[i] for i, target in enumerate(result.merged_into)):
+            problems.append("exact mode merged cards that differ in more than formatting")
+        if len(result.flashcards) != len(set(origins)):
+            problems.append(f"exact mode kept {len(result.flashcards)} cards, expected {len(set(origins))}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check and time merging decks that share cards")
+    parser.add_argument("--cards", type=int, default=300000, help="cards across all decks")
+    parser.add_argument("--decks", type=int, default=60)
+    parser.add_argument("--shared", type=float, default=0.5, help="share of cards copied from a common pool")
+    parser.add_argument("--reworded", type=float, default=0.2, help="share of copies with one word changed")
+    parser.add_argument("--threshold", type=float, default=DedupConfig.threshold)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    decks, origins = build_decks(args.cards, args.decks, args.shared, args.reworded, random.Random(1))
+    # Tagged with their sub-deck but not deduplicated, which is what every mode starts from
+    unmerged = DeckMerger(CardDeduplicator(DedupConfig(exact=False))).merge("Course", decks, decks[0].url, "course")
+    reworded_copies = sum(1 for _, changed in origins if changed >= 0)
+    print(f"{len(unmerged.flashcards)} cards in {len(decks)} decks, {reworded_copies} reworded copies")
+
+    problems: List[str] = []
+    merged = {}
+    for near in (False, True):
+        config = DedupConfig(near=near, threshold=args.threshold)
+        mode = "exact+near" if near else "exact"
+        for share in (2, 1):
+            count = len(unmerged.flashcards) // share
+            started = time.perf_counter()
+            result = CardDeduplicator(config).deduplicate(unmerged.flashcards[:count])
+            elapsed = time.perf_counter() - started
+            print(f"{mode:<11} {count:>7} cards {elapsed:7.2f}s {count / elapsed:9.0f} cards/s   "
+                  f"{len(result.flashcards):>7} kept, {result.exact_duplicates} exact and "
+                  f"{result.near_duplicates} near duplicates")
+            problems.extend(f"{mode}, {count} cards: {problem}" for problem in check(result, origins[:count], near))
+        merged[mode] = Deck(title="Course", flashcards=result.flashcards, url=unmerged.url, source_id="course")
+
+    with tempfile.TemporaryDirectory(prefix="brainscape_merge_") as scratch:
+        for name, deck in [("unmerged", unmerged), *merged.items()]:
+            started = time.perf_counter()
+            path = AnkiExporter().export(deck, Path(scratch) / name)
+            elapsed = time.perf_counter() - started
+            size = path.stat().st_size / 1e6
+            print(f"export {name:<11} {len(deck.flashcards):>7} notes {size:8.1f} MB {elapsed:6.2f}s")
+
+    if problems:
+        for problem in problems:
+            print(f"MISMATCH: {problem}")
+        sys.exit(1)
+    print("Only copies of the same card were merged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Checks and times delta exports of a re-scraped deck.
+
+Exports a synthetic deck of ``--cards`` cards as an Anki package through
+``DeltaExporter``, then edits it the way a re-scrape would find it
+(``--edits`` changed backs, changed fronts, new and deleted cards each)
+and exports it again, and once more unchanged::
+
+    python -m brainscape_to_anki.devtools.bench_delta_export --cards 50000 --edits 100
+
+Every run must write exactly the added and changed notes, keep the GUID
+of each card whose front did not change, agree with a plain full export
+on every GUID, list exactly the removed notes and leave the full export
+next to it alone. Exits with status 1 on any mismatch.
+"""
+import argparse
+import csv
+import logging
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import zipfile
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Set
+
+from brainscape_to_anki.devtools.mock_brainscape import MockServerConfig, deck_cards
+from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.infrastructure.exporters.apkg_exporter import COLLECTION_NAME, ApkgExporter
+from brainscape_to_anki.infrastructure.exporters.delta_exporter import DeltaExporter, ManifestStore, removed_path
+
+
+def read_notes(path: Path) -> Dict[str, str]:
+    """GUID -> fields of every note in a package."""
+    with zipfile.ZipFile(path) as package, tempfile.TemporaryDirectory() as scratch:
+        connection = sqlite3.connect(package.extract(COLLECTION_NAME, scratch))
+        try:
+            return dict(connection.execute("SELECT guid, flds FROM notes"))
+        finally:
+            connection.close()
+
+
+def read_removed(path: Path) -> Set[str]:
+    list_path = removed_path(path)
+    if not list_path.exists():
+        return set()
+    with open(list_path, newline="", encoding="utf-8") as removed_file:
+        return {row[0] for row in list(csv.reader(removed_file))[1:]}
+
+
+def edit_deck(deck: Deck, edits: int, rng: random.Random) -> Deck:
+    flashcards: List[Flashcard] = list(deck.flashcards)
+    positions = rng.sample(range(len(flashcards)), 3 * edits)
+    for i in positions[:edits]:
+        flashcards[i] = replace(flashcards[i], back=flashcards[i].back + " (corrected)")
+    for i in positions[edits:2 * edits]:
+        flashcards[i] = replace(flashcards[i], front=flashcards[i].front + " (reworded)")
+    for i in sorted(positions[2 * edits:], reverse=True):
+        del flashcards[i]
+    for n in range(edits):
+        flashcards.insert(rng.randrange(len(flashcards)), Flashcard(front=f"New question {n}", back=f"New answer {n}"))
+    return replace(deck, flashcards=flashcards)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check and time delta exports")
+    parser.add_argument("--cards", type=int, default=50000)
+    parser.add_argument("--edits", type=int, default=100, help="cards of each kind of edit")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rng = random.Random(1)
+    cards = deck_cards(1, MockServerConfig(cards_per_deck=args.cards))
+    flashcards = [Flashcard(front=front, back=back) for front, back in cards]
+    # Repeated fronts must still get distinct, stable GUIDs
+    flashcards[10:10] = [Flashcard(front="Same question", back=f"Answer {n}") for n in range(3)]
+    deck = Deck(title="Delta deck", flashcards=flashcards, url="https://example.com/decks/1", source_id="1")
+    edited = edit_deck(deck, args.edits, rng)
+
+    problems: List[str] = []
+    with tempfile.TemporaryDirectory(prefix="brainscape_delta_") as scratch:
+        scratch_dir = Path(scratch)
+        delta = DeltaExporter(ApkgExporter(), ManifestStore(scratch_dir / "manifests"))
+
+        # A plain full export of each version gives the GUIDs every delta must agree with
+        previous: Dict[str, str] = {}
+        for name, version in [("first delta", deck), ("after edits", edited), ("unchanged", edited)]:
+            started = time.perf_counter()
+            full_path = ApkgExporter().export(version, scratch_dir)
+            full = read_notes(full_path)
+            full_time = time.perf_counter() - started
+
+            # Into the same directory, where it must leave the full export alone
+            started = time.perf_counter()
+            path = delta.export(version, scratch_dir)
+            delta_time = time.perf_counter() - started
+            if path == full_path or read_notes(full_path) != full:
+                problems.append(f"{name}: delta export overwrote the full export")
+            written = read_notes(path)
+            removed = read_removed(path)
+            print(f"{name:<12} full {full_time:6.2f}s {len(full):>6} notes   "
+                  f"delta {delta_time:6.2f}s {len(written):>6} notes, {len(removed)} removed")
+
+            expected = {guid: fields for guid, fields in full.items() if previous.get(guid) != fields}
+            if written != expected:
+                problems.append(f"{name}: wrote {len(written)} notes, expected {len(expected)}")
+            if removed != set(previous) - set(full):
+                problems.append(f"{name}: listed {len(removed)} removed, expected {len(set(previous) - set(full))}")
+            if len(full) != len(version.flashcards):
+                problems.append(f"{name}: {len(full)} distinct GUIDs for {len(version.flashcards)} cards")
+            if name == "after edits":
+                kept = len(set(previous) & set(full))
+                if kept != len(deck.flashcards) - 2 * args.edits or len(written) != 3 * args.edits:
+                    problems.append(f"{name}: {kept} GUIDs kept and {len(written)} notes written")
+            previous = full
+
+    if problems:
+        for problem in problems:
+            print(f"MISMATCH: {problem}")
+        sys.exit(1)
+    print("Delta exports match the edits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark of batch page parsing in-process against the parse pool.
+
+Parses ``--pages`` synthetic deck pages once on the calling thread and then
+through a ``ParsePool`` with 1, 2, 4, ... up to ``--workers`` processes,
+checks every run extracts the same cards and prints pages/sec and the
+speedup over the in-process run::
+
+    python -m brainscape_to_anki.devtools.bench_parse_pool --pages 64 --workers 16
+
+Throughput only scales with workers up to the number of free cores.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import List, Tuple
+
+from brainscape_to_anki.devtools.mock_brainscape import MockServerConfig, render_deck_page
+from brainscape_to_anki.infrastructure.parsing.html_backend import get_backend
+from brainscape_to_anki.infrastructure.parsing.process_pool import ParsePool, ParsePoolConfig
+from brainscape_to_anki.infrastructure.scrapers.brainscape_scraper import extract_deck_page
+
+
+def worker_counts(max_workers: int) -> List[int]:
+    counts = []
+    count = 1
+    while count < max_workers:
+        counts.append(count)
+        count *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def run_in_process(pages: List[bytes], backend: str) -> Tuple[list, float]:
+    started = time.perf_counter()
+    results = [extract_deck_page(page, "utf-8", backend, True, False) for page in pages]
+    return results, time.perf_counter() - started
+
+
+def run_in_pool(pages: List[bytes], backend: str, workers: int) -> Tuple[list, float]:
+    with ParsePool(ParsePoolConfig(max_workers=workers)) as pool:
+        # Start every worker before timing, so spawn cost is not counted
+        for future in [pool.submit(extract_deck_page, pages[0], "utf-8", backend, True, False)
+                       for _ in range(workers)]:
+            future.result()
+
+        started = time.perf_counter()
+        futures = [pool.submit(extract_deck_page, page, "utf-8", backend, True, False) for page in pages]
+        results = [future.result() for future in futures]
+        return results, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark parsing pages in a process pool")
+    parser.add_argument("--pages", type=int, default=32)
+    parser.add_argument("--cards", type=int, default=200, help="cards per page")
+    parser.add_argument("--page-chrome", type=int, default=100, help="navigation/script blocks per page")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", default=None, help="HTML parser backend (default: fastest installed)")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    backend = get_backend(args.backend).name
+    config = MockServerConfig(cards_per_deck=args.cards, layout="mixed", page_chrome=args.page_chrome)
+    pages = [render_deck_page(deck_id, config).encode("utf-8") for deck_id in range(1, args.pages + 1)]
+    print(f"{len(pages)} pages of {len(pages[0]) // 1024} KiB, {backend} backend, {os.cpu_count()} CPUs")
+
+    expected, baseline = run_in_process(pages, backend)
+    print(f"in-process   {baseline:7.2f}s  {len(pages) / baseline:6.1f} pages/s")
+
+    mismatches = 0
+    for workers in worker_counts(args.workers):
+        results, elapsed = run_in_pool(pages, backend, workers)
+        status = "identical" if results == expected else "MISMATCH"
+        mismatches += results != expected
+        print(f"{workers:>2} workers   {elapsed:7.2f}s  {len(pages) / elapsed:6.1f} pages/s "
+              f"({baseline / elapsed:4.1f}x)  {status}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Checks and times sharded parsing of single large pasted pages.
+
+Every parser parity fixture plus one synthetic page of ``--cards`` rows is
+imported through ``DirectHtmlProcessor`` serially and then split into
+shards parsed by a ``ParsePool`` of ``--workers`` processes. Titles and
+flashcards must match the serial import exactly::
+
+    python -m brainscape_to_anki.devtools.bench_sharded_import --cards 20000 --workers 8
+
+Fixtures are sharded regardless of size, down to ``--min-rows`` rows per
+shard. The speedup on the large page only approaches the worker count when
+that many cores are free. Exits with status 1 on any mismatch.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from brainscape_to_anki.devtools.mock_brainscape import MockServerConfig, render_deck_page
+from brainscape_to_anki.devtools.parser_parity import fixtures, report_mismatch
+from brainscape_to_anki.infrastructure.parsing import html_import
+from brainscape_to_anki.infrastructure.parsing.html_backend import available_backends, get_backend
+from brainscape_to_anki.infrastructure.parsing.html_import import DirectHtmlProcessor
+from brainscape_to_anki.infrastructure.parsing.process_pool import ParsePool, ParsePoolConfig
+from brainscape_to_anki.infrastructure.parsing.sharding import plan_shards
+
+
+def timed(processor: DirectHtmlProcessor, html: str):
+    started = time.perf_counter()
+    result = processor.extract_flashcards_from_html(html)
+    return result, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare sharded and serial parsing of large pages")
+    parser.add_argument("--cards", type=int, default=20000, help="rows on the large synthetic page")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-rows", type=int, default=10, help="fewest rows per shard for the fixtures")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    pages = fixtures([])
+    pages["large page"] = render_deck_page(
+        11, MockServerConfig(cards_per_deck=args.cards, layout="mixed", page_chrome=100)
+    )
+    print(f"Large page of {len(pages['large page']) // 2 ** 20} MiB, {os.cpu_count()} CPUs")
+
+    mismatches = 0
+    with ParsePool(ParsePoolConfig(max_workers=args.workers)) as pool:
+        html_import.MIN_ROWS_PER_SHARD = args.min_rows
+        for name in available_backends():
+            backend = get_backend(name)
+            serial = DirectHtmlProcessor(backend)
+            sharded = DirectHtmlProcessor(backend, parse_pool=pool, shard_threshold=0)
+            # Start every worker before timing, so spawn cost is not counted
+            sharded.extract_flashcards_from_html(pages["mock mixed"])
+
+            for fixture_name, html in pages.items():
+                expected, serial_time = timed(serial, html)
+                result, sharded_time = timed(sharded, html)
+                plan = plan_shards(html, pool.max_workers * html_import.SHARDS_PER_WORKER, args.min_rows)
+                shards = f"{len(plan.regions) - 1:>3} shards" if plan else " not split"
+                status = "ok" if result == expected else "MISMATCH"
+                print(f"{name:<12} {fixture_name:<20} {len(expected[1]):>6} cards {shards}  "
+                      f"serial {serial_time:6.2f}s  sharded {sharded_time:6.2f}s "
+                      f"({serial_time / sharded_time:4.1f}x)  {status}")
+                if result != expected:
+                    mismatches += 1
+                    report_mismatch(expected, result)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark of the card text cleaner against the BeautifulSoup-based original.
+
+Cleans every front and back of a synthetic deck (10k cards by default) with
+the original per-field implementation and with ``TextCleaner``, checks the
+output is identical and prints the speedup::
+
+    python -m brainscape_to_anki.devtools.bench_text_cleaner --cards 10000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+import warnings
+from typing import Callable, List
+
+from bs4 import BeautifulSoup
+
+from brainscape_to_anki.infrastructure.parsing.text_cleaner import BRAINSCAPE_UI_RULES, TextCleaner
+
+
+def original_scraper_clean(html_content: str) -> str:
+    if not html_content:
+        return ""
+    if "<" in html_content and ">" in html_content:
+        text = BeautifulSoup(html_content, "html.parser").get_text()
+    else:
+        text = html_content
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def original_processor_clean(html_content: str) -> str:
+    if not html_content:
+        return ""
+    if "<" in html_content and ">" in html_content:
+        text = BeautifulSoup(html_content, "html.parser").get_text()
+    else:
+        text = html_content
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'How well did you know this\?', '', text)
+    text = re.sub(r'Not at all.*?Perfectly', '', text)
+    text = re.sub(r'([A-G]\.)\s+', '', text)
+    return text.strip()
+
+
+def deck_fields(cards: int, seed: int = 0) -> List[str]:
+    """Fronts and backs shaped like cards API fields and page text."""
+    rng = random.Random(seed)
+    words = ["cell", "mitochondria", "energy", "ATP", "membrane", "protein", "enzyme", "DNA", "x < y", "2 > 1"]
+    fields = []
+    for i in range(cards):
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+        kind = rng.random()
+        if kind < 0.5:
+            fields.append(f"<p>{sentence} &amp; <b>{i}</b></p>")
+            fields.append(f"<div>{sentence}<br>\n  &nbsp;A. first  B. second</div>")
+        elif kind < 0.8:
+            fields.append(f"  {sentence}\n\t{i}  ")
+            fields.append(f"{sentence} How well did you know this? Not at all 1 2 3 4 5 Perfectly")
+        else:
+            fields.append(f"&lt;b&gt;{sentence}&lt;/b&gt;")
+            fields.append("True" if i % 2 else "False")
+    return fields
+
+
+def timed(clean: Callable[[List[str]], List[str]], fields: List[str], repeat: int):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = clean(fields)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the card text cleaner")
+    parser.add_argument("--cards", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many runs")
+    args = parser.parse_args()
+
+    # Fields such as "True" make BeautifulSoup warn that they look like file names
+    warnings.filterwarnings("ignore", module="bs4")
+
+    fields = deck_fields(args.cards)
+    print(f"{args.cards} cards, {len(fields)} fields")
+
+    failed = False
+    profiles = (
+        ("scraper", original_scraper_clean, TextCleaner()),
+        ("html import", original_processor_clean, TextCleaner(BRAINSCAPE_UI_RULES)),
+    )
+    for name, original, cleaner in profiles:
+        expected, original_time = timed(lambda values: [original(v) for v in values], fields, args.repeat)
+        per_field, per_field_time = timed(lambda values: [cleaner.clean(v) for v in values], fields, args.repeat)
+        batch, batch_time = timed(cleaner.clean_many, fields, args.repeat)
+
+        identical = expected == per_field == batch
+        failed = failed or not identical
+        print(
+            f"{name:<12} original {original_time * 1000:8.1f}ms  "
+            f"clean {per_field_time * 1000:7.1f}ms ({original_time / per_field_time:4.1f}x)  "
+            f"clean_many {batch_time * 1000:7.1f}ms ({original_time / batch_time:4.1f}x)  "
+            f"{'identical' if identical else 'OUTPUT DIFFERS'}"
+        )
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
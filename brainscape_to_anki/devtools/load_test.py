@@ -0,0 +1,303 @@
+"""End-to-end throughput test for ``ScrapeToAnkiUseCase``.
+
+Scrapes and exports ``--decks`` decks at ``--concurrency``-way concurrency,
+by default against an in-process ``MockBrainscapeServer``, and reports
+decks/sec, cards/sec, per-deck latency percentiles and peak memory::
+
+    python -m brainscape_to_anki.devtools.load_test --decks 200 --concurrency 16 --latency 0.05
+
+Pass ``--base-url`` to target a mock server running in another process, so
+that serving pages does not compete with the scraper for the GIL. With
+``--format ankiconnect`` the decks go to an in-process
+``MockAnkiConnectServer``, or to ``--anki-url``.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from brainscape_to_anki.application.services.export_service import ExportService
+from brainscape_to_anki.application.services.scraper_service import ScraperService
+from brainscape_to_anki.application.use_cases.scrape_to_anki import ScrapeToAnkiUseCase
+from brainscape_to_anki.devtools.mock_ankiconnect import MockAnkiConnectServer
+from brainscape_to_anki.devtools.mock_brainscape import (
+    MockBrainscapeServer,
+    add_server_arguments,
+    config_from_args,
+)
+from brainscape_to_anki.domain.interfaces.exporter import ExporterInterface
+from brainscape_to_anki.infrastructure.exporters.anki_exporter import AnkiExporter
+from brainscape_to_anki.infrastructure.exporters.ankiconnect_exporter import AnkiConnectConfig, AnkiConnectExporter
+from brainscape_to_anki.infrastructure.exporters.apkg_exporter import ApkgExporter
+from brainscape_to_anki.infrastructure.http.rate_limiter import RateLimitConfig
+from brainscape_to_anki.infrastructure.media.pipeline import MediaConfig, MediaPipeline
+from brainscape_to_anki.infrastructure.media.store import MediaStore
+from brainscape_to_anki.infrastructure.parsing.process_pool import ParsePool, ParsePoolConfig
+from brainscape_to_anki.infrastructure.scrapers.brainscape_scraper import BrainscapeScraper
+from brainscape_to_anki.infrastructure.scrapers.deck_id_resolver import DeckIdResolver
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class LoadTestReport:
+    decks_requested: int
+    decks_scraped: int
+    decks_failed: int
+    cards: int
+    concurrency: int
+    elapsed: float
+    decks_per_sec: float
+    cards_per_sec: float
+    latency: Dict[str, float]
+    peak_traced_bytes: Optional[int] = None
+    peak_rss_bytes: Optional[int] = None
+    server_responses: Dict[int, int] = field(default_factory=dict)
+    scraper_metrics: Dict[str, object] = field(default_factory=dict)
+    anki_actions: Dict[str, int] = field(default_factory=dict)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def run_load_test(
+        use_case: ScrapeToAnkiUseCase,
+        urls: List[str],
+        output_dir: Path,
+        concurrency: int,
+        stream: bool = False,
+) -> LoadTestReport:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    cards = 0
+    failed = 0
+
+    async def run_one(url: str) -> None:
+        nonlocal cards, failed
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if stream:
+                    info, path = await use_case.execute_streaming(url, output_dir)
+                    count = info.card_count
+                else:
+                    deck, path = await use_case.execute(url, output_dir)
+                    count = len(deck.flashcards) if deck else 0
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"{url} raised {type(e).__name__}: {str(e)}")
+                path, count = None, 0
+            latencies.append(time.perf_counter() - started)
+
+        if path is None:
+            failed += 1
+        else:
+            cards += count
+
+    started = time.perf_counter()
+    async with use_case:
+        await asyncio.gather(*(run_one(url) for url in urls))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    scraped = len(urls) - failed
+    return LoadTestReport(
+        decks_requested=len(urls),
+        decks_scraped=scraped,
+        decks_failed=failed,
+        cards=cards,
+        concurrency=concurrency,
+        elapsed=elapsed,
+        decks_per_sec=scraped / elapsed if elapsed else 0.0,
+        cards_per_sec=cards / elapsed if elapsed else 0.0,
+        latency={
+            "min": latencies[0] if latencies else 0.0,
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+    )
+
+
+def format_report(report: LoadTestReport) -> str:
+    lines = [
+        f"Decks:       {report.decks_scraped}/{report.decks_requested} scraped, {report.decks_failed} failed",
+        f"Cards:       {report.cards}",
+        f"Concurrency: {report.concurrency}",
+        f"Elapsed:     {report.elapsed:.2f}s",
+        f"Throughput:  {report.decks_per_sec:.1f} decks/s, {report.cards_per_sec:.0f} cards/s",
+        "Latency:     " + ", ".join(f"{name} {value * 1000:.0f}ms" for name, value in report.latency.items()),
+    ]
+    if report.peak_traced_bytes is not None:
+        lines.append(f"Peak heap:   {report.peak_traced_bytes / 2 ** 20:.1f} MiB (tracemalloc)")
+    if report.peak_rss_bytes is not None:
+        lines.append(f"Peak RSS:    {report.peak_rss_bytes / 2 ** 20:.1f} MiB")
+    if report.server_responses:
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(report.server_responses.items()))
+        lines.append(f"Server:      {statuses}")
+    media = report.scraper_metrics.get("media")
+    if media:
+        lines.append(
+            f"Media:       {media['downloaded']} downloaded ({media['downloaded_bytes'] / 2 ** 20:.1f} MiB), "
+            f"{media['reused']} reused, {media['failed']} failed, {media['store']['files']} files stored"
+        )
+    if report.anki_actions:
+        actions = report.anki_actions
+        lines.append(
+            f"Anki:        {actions.get('requests', 0)} requests, {actions.get('addNote', 0)} notes added, "
+            f"{actions.get('updateNoteFields', 0)} updated"
+        )
+    return "\n".join(lines)
+
+
+def build_exporter(
+        args: argparse.Namespace, media_store: Optional[MediaStore], anki_url: Optional[str]
+) -> ExporterInterface:
+    if args.format == "apkg":
+        return ApkgExporter(media_store)
+    if args.format == "ankiconnect":
+        config = AnkiConnectConfig(url=anki_url, batch_size=args.anki_batch_size, concurrency=args.anki_concurrency)
+        return AnkiConnectExporter(config, media_store)
+    return AnkiExporter(media_store)
+
+
+def build_use_case(
+        args: argparse.Namespace,
+        base_url: str,
+        state_dir: Path,
+        parse_pool: Optional[ParsePool] = None,
+        anki_url: Optional[str] = None,
+) -> ScrapeToAnkiUseCase:
+    rate_limit_config = RateLimitConfig(
+        requests_per_second=args.client_rps or None,
+        max_concurrency=float(max(args.concurrency, RateLimitConfig.max_concurrency)),
+    )
+    media_store = None
+    media_pipeline = None
+    if args.media:
+        media_store = MediaStore(args.media_dir or state_dir / "media")
+        media_pipeline = MediaPipeline(media_store, MediaConfig(concurrency=args.media_concurrency))
+    scraper = BrainscapeScraper(
+        rate_limit_config=rate_limit_config,
+        speculative=args.speculative,
+        api_page_size=args.client_page_size,
+        deck_id_resolver=DeckIdResolver(state_dir / "deck_ids.json"),
+        base_url=base_url,
+        parse_pool=parse_pool,
+        media_pipeline=media_pipeline,
+    )
+    return ScrapeToAnkiUseCase(
+        ScraperService(scraper, max_concurrency=args.concurrency),
+        ExportService(build_exporter(args, media_store, anki_url)),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the scrape-and-export pipeline")
+    parser.add_argument("--decks", type=int, default=100, help="number of decks to scrape")
+    parser.add_argument("--first-deck-id", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=8, help="decks scraped at the same time")
+    parser.add_argument("--base-url", default=None, help="use an already running mock server")
+    parser.add_argument("--client-rps", type=float, default=0,
+                        help="client-side rate limit (0 disables the token bucket)")
+    parser.add_argument("--client-page-size", type=int, default=None, help="cards API page size to request")
+    parser.add_argument("--speculative", action="store_true", help="race deck page against cards API")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="parse pages in this many worker processes (0 parses on the event loop)")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream each deck page card by card into the exporter")
+    parser.add_argument("--format", choices=("csv", "apkg", "ankiconnect"), default="csv", help="export format")
+    parser.add_argument("--anki-url", default=None, help="send ankiconnect exports to this AnkiConnect")
+    parser.add_argument("--anki-batch-size", type=int, default=AnkiConnectConfig.batch_size,
+                        help="notes per AnkiConnect request")
+    parser.add_argument("--anki-concurrency", type=int, default=AnkiConnectConfig.concurrency,
+                        help="AnkiConnect requests in flight at once")
+    parser.add_argument("--media", action="store_true", help="download card media and export it with the decks")
+    parser.add_argument("--media-dir", type=Path, default=None, help="keep the media store here between runs")
+    parser.add_argument("--media-concurrency", type=int, default=MediaConfig.concurrency,
+                        help="media downloads in flight at once")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="track the peak Python heap (slows the run down noticeably)")
+    parser.add_argument("--output-dir", type=Path, default=None, help="keep exported files here")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the scraper's INFO logs")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # The scraper logs every card at INFO, which would dominate the run
+        logging.disable(logging.INFO)
+
+    server = None
+    anki_server = None
+    parse_pool = ParsePool(ParsePoolConfig(max_workers=args.parse_workers)) if args.parse_workers else None
+    if args.base_url is None:
+        server = MockBrainscapeServer(config_from_args(args)).start()
+    base_url = (args.base_url or server.base_url).rstrip("/")
+    if args.format == "ankiconnect" and args.anki_url is None:
+        anki_server = MockAnkiConnectServer().start()
+    anki_url = args.anki_url or (anki_server.url if anki_server is not None else None)
+    urls = [f"{base_url}/decks/{deck_id}" for deck_id in range(args.first_deck_id, args.first_deck_id + args.decks)]
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="brainscape_load_") as scratch:
+            scratch_dir = Path(scratch)
+            output_dir = args.output_dir or scratch_dir / "export"
+            use_case = build_use_case(args, base_url, scratch_dir, parse_pool, anki_url)
+
+            if args.tracemalloc:
+                tracemalloc.start()
+            report = asyncio.run(run_load_test(use_case, urls, output_dir, args.concurrency, args.stream))
+            if args.tracemalloc:
+                report.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            report.peak_rss_bytes = peak_rss_bytes()
+            report.scraper_metrics = use_case.scraper_service.scraper.metrics()
+            if server is not None:
+                report.server_responses = server.stats()
+            if anki_server is not None:
+                report.anki_actions = anki_server.stats()
+            if isinstance(use_case.export_service.exporter, AnkiConnectExporter):
+                use_case.export_service.exporter.close()
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        if server is not None:
+            server.stop()
+        if anki_server is not None:
+            anki_server.stop()
+
+    if args.json:
+        print(json.dumps(asdict(report), indent=2, default=str))
+    else:
+        print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
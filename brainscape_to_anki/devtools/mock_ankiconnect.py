@@ -0,0 +1,374 @@
+"""Local stand-in for Anki with the AnkiConnect add-on, for exporter tests.
+
+Run it on its own with ``python -m brainscape_to_anki.devtools.mock_ankiconnect``
+or embed ``MockAnkiConnectServer`` in a script. It answers the version 6
+protocol for the actions the exporter uses, keeping decks, note types,
+notes and media in memory, and refuses what Anki refuses: unknown decks
+and note types, empty or duplicate first fields, a note type created twice.
+``MockCollection.import_note`` stands in for importing a package or CSV
+file, the only way a note gets a GUID of the exporter's choosing.
+"""
+import argparse
+import base64
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+API_VERSION = 6
+
+
+@dataclass(frozen=True)
+class MockAnkiConnectConfig:
+    """Simulated cost of talking to Anki.
+
+    ``latency`` seconds are added to every request and ``note_cost``
+    seconds to every note added or updated. Actions run one at a time, the
+    way AnkiConnect runs them on Anki's main thread, while the latency of
+    different requests overlaps. Requests must carry ``api_key`` when set.
+    """
+    latency: float = 0.0
+    note_cost: float = 0.0
+    api_key: Optional[str] = None
+
+
+class MockAnkiError(Exception):
+    pass
+
+
+def search_pattern(term: str) -> "re.Pattern[str]":
+    """Anki search text as a regex: ``*`` and ``_`` are wildcards unless escaped."""
+    parts = []
+    escaped = False
+    for char in term:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "*":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+
+
+class MockCollection:
+    """Decks, note types, notes and media of the simulated Anki."""
+
+    def __init__(self, config: MockAnkiConnectConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.decks: Dict[str, int] = {"Default": 1}
+        self.models: Dict[str, List[str]] = {"Basic": ["Front", "Back"]}
+        self.notes: Dict[int, Dict[str, Any]] = {}
+        self.media: Dict[str, int] = {}
+        self.actions: Counter = Counter()
+        self._next_id = 1_500_000_000_000
+        # (deck, note type, first field) -> notes, for the duplicate check
+        self._first_fields: Counter = Counter()
+
+    def run(self, action: str, params: Dict[str, Any]) -> Any:
+        handler: Optional[Callable[..., Any]] = getattr(self, f"_action_{action}", None)
+        if handler is None:
+            raise MockAnkiError("unsupported action")
+        self.actions[action] += 1
+        return handler(**params)
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _action_version(self) -> int:
+        return API_VERSION
+
+    def _action_multi(self, actions: List[Dict[str, Any]]) -> List[Any]:
+        replies = []
+        for entry in actions:
+            try:
+                result, error = self.run(entry["action"], entry.get("params", {})), None
+            except Exception as e:
+                result, error = None, str(e)
+            # Actions without a version answer in the old format, the bare result
+            if entry.get("version", 4) >= 5:
+                replies.append({"result": result, "error": error})
+            else:
+                replies.append(result if error is None else {"error": error})
+        return replies
+
+    def _action_deckNames(self) -> List[str]:
+        return list(self.decks)
+
+    def _action_createDeck(self, deck: str) -> int:
+        if deck not in self.decks:
+            self.decks[deck] = self._new_id()
+        return self.decks[deck]
+
+    def _action_modelNames(self) -> List[str]:
+        return list(self.models)
+
+    def _action_modelFieldNames(self, modelName: str) -> List[str]:
+        if modelName not in self.models:
+            raise MockAnkiError(f"model was not found: {modelName}")
+        return list(self.models[modelName])
+
+    def _action_createModel(
+            self, modelName: str, inOrderFields: List[str], cardTemplates: List[Dict[str, str]], css: str = "",
+            **_: Any
+    ) -> Dict[str, Any]:
+        if modelName in self.models:
+            raise MockAnkiError("Model name already exists")
+        if not inOrderFields or not cardTemplates:
+            raise MockAnkiError("Must provide at least one field and one card template")
+        self.models[modelName] = list(inOrderFields)
+        return {"name": modelName, "id": self._new_id(), "css": css}
+
+    def _action_addNote(self, note: Dict[str, Any]) -> int:
+        deck, model = note.get("deckName"), note.get("modelName")
+        if deck not in self.decks:
+            raise MockAnkiError(f"deck was not found: {deck}")
+        if model not in self.models:
+            raise MockAnkiError(f"model was not found: {model}")
+        fields = {name: note.get("fields", {}).get(name, "") for name in self.models[model]}
+        first = fields[self.models[model][0]]
+        if not first.strip():
+            raise MockAnkiError("cannot create note because it is empty")
+        allow_duplicate = note.get("options", {}).get("allowDuplicate", False)
+        if not allow_duplicate and self._first_fields[(deck, model, first)]:
+            raise MockAnkiError("cannot create note because it is a duplicate")
+
+        if self.config.note_cost:
+            time.sleep(self.config.note_cost)
+        # Anki picks a GUID of its own; AnkiConnect has no way to set one
+        guid = base64.urlsafe_b64encode(self._next_id.to_bytes(9, "big")).decode("ascii")
+        return self.import_note(deck, model, fields, guid, note.get("tags", []))
+
+    def import_note(
+            self, deck: str, model: str, fields: Dict[str, str], guid: str, tags: Sequence[str] = ()
+    ) -> int:
+        """Add a note the way importing a package or CSV file does, with the GUID it carries."""
+        if deck not in self.decks:
+            self.decks[deck] = self._new_id()
+        note_id = self._new_id()
+        self.notes[note_id] = {"deck": deck, "model": model, "fields": dict(fields), "tags": list(tags), "guid": guid}
+        self._first_fields[(deck, model, fields[self.models[model][0]])] += 1
+        return note_id
+
+    def _action_addNotes(self, notes: List[Dict[str, Any]]) -> List[int]:
+        results, errors = [], []
+        for note in notes:
+            try:
+                results.append(self._action_addNote(note))
+            except MockAnkiError as e:
+                errors.append(str(e))
+        # AnkiConnect keeps the notes it could add but only reports the errors
+        if errors:
+            raise MockAnkiError(str(errors))
+        return results
+
+    def _action_updateNoteFields(self, note: Dict[str, Any]) -> None:
+        stored = self.notes.get(note.get("id"))
+        if stored is None:
+            raise MockAnkiError(f"Note was not found: {note.get('id')}")
+        first_name = self.models[stored["model"]][0]
+        self._first_fields[(stored["deck"], stored["model"], stored["fields"][first_name])] -= 1
+        for name, value in note.get("fields", {}).items():
+            if name in stored["fields"]:
+                stored["fields"][name] = value
+        self._first_fields[(stored["deck"], stored["model"], stored["fields"][first_name])] += 1
+        if self.config.note_cost:
+            time.sleep(self.config.note_cost)
+
+    def _action_updateNoteTags(self, note: int, tags: List[str]) -> None:
+        stored = self.notes.get(note)
+        if stored is None:
+            raise MockAnkiError(f"Note was not found: {note}")
+        stored["tags"] = list(tags)
+
+    def _action_deleteNotes(self, notes: List[int]) -> None:
+        for note_id in notes:
+            stored = self.notes.pop(note_id, None)
+            if stored is not None:
+                first = stored["fields"][self.models[stored["model"]][0]]
+                self._first_fields[(stored["deck"], stored["model"], first)] -= 1
+
+    def _action_findNotes(self, query: str) -> List[int]:
+        # Just the quoted deck:, note: and guid: terms the exporter searches with
+        terms = re.findall(r'(-?)"(deck|note|guid):((?:[^"\\]|\\.)*)"', query)
+        if not terms or re.sub(r'-?"(?:deck|note|guid):(?:[^"\\]|\\.)*"', "", query).strip():
+            raise MockAnkiError(f"unsupported search: {query}")
+        conditions = [(negated == "-", key, search_pattern(term)) for negated, key, term in terms]
+        return [
+            note_id for note_id, note in self.notes.items()
+            if all(
+                bool(pattern.fullmatch(note["model"] if key == "note" else note[key])) != negated
+                for negated, key, pattern in conditions
+            )
+        ]
+
+    def _action_notesInfo(self, notes: List[int]) -> List[Dict[str, Any]]:
+        infos = []
+        for note_id in notes:
+            note = self.notes.get(note_id)
+            if note is None:
+                infos.append({})
+                continue
+            infos.append({
+                "noteId": note_id,
+                "modelName": note["model"],
+                "tags": list(note["tags"]),
+                "fields": {
+                    name: {"value": value, "order": i} for i, (name, value) in enumerate(note["fields"].items())
+                },
+                "cards": [note_id],
+            })
+        return infos
+
+    def _action_storeMediaFile(
+            self, filename: str, data: Optional[str] = None, path: Optional[str] = None, **_: Any
+    ) -> str:
+        if path is not None:
+            try:
+                self.media[filename] = Path(path).stat().st_size
+            except OSError as e:
+                raise MockAnkiError(f"could not read {path}: {str(e)}")
+        elif data is not None:
+            self.media[filename] = len(data) * 3 // 4
+        else:
+            raise MockAnkiError("You must provide a \"data\", \"path\", or \"url\" field.")
+        return filename
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    server: "_MockHTTPServer"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; Nagle would hold the body back
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        collection = self.server.collection
+        config = collection.config
+        length = int(self.headers.get("Content-Length", 0))
+        if config.latency:
+            time.sleep(config.latency)
+
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if config.api_key and request.get("key") != config.api_key:
+                raise MockAnkiError("valid api key must be provided")
+            with collection.lock:
+                collection.actions["requests"] += 1
+                result, error = collection.run(request.get("action", ""), request.get("params", {})), None
+        except Exception as e:
+            result, error = None, str(e)
+
+        body = json.dumps({"result": result, "error": error}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: MockAnkiConnectConfig):
+        super().__init__(address, _MockHandler)
+        self.collection = MockCollection(config)
+
+
+class MockAnkiConnectServer:
+    """Runs the simulated Anki on a background thread.
+
+    Use it as a context manager; ``url`` is what ``AnkiConnectConfig``
+    should be pointed at, and ``notes``/``stats`` show what it received.
+    """
+
+    def __init__(self, config: Optional[MockAnkiConnectConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.logger = logging.getLogger(__name__)
+        self.config = config or MockAnkiConnectConfig()
+        self._server = _MockHTTPServer((host, port), self.config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def collection(self) -> MockCollection:
+        return self._server.collection
+
+    def start(self) -> "MockAnkiConnectServer":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="mock-ankiconnect", daemon=True
+            )
+            self._thread.start()
+            self.logger.info(f"Mock AnkiConnect listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def notes(self, deck: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Notes in the order they were added, optionally of one deck."""
+        with self.collection.lock:
+            return [
+                {"id": note_id, **note, "fields": dict(note["fields"])}
+                for note_id, note in sorted(self.collection.notes.items())
+                if deck is None or note["deck"] == deck
+            ]
+
+    def stats(self) -> Dict[str, int]:
+        """Requests received and how often each action ran."""
+        with self.collection.lock:
+            return dict(self.collection.actions)
+
+    def __enter__(self) -> "MockAnkiConnectServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a simulated AnkiConnect locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="AnkiConnect's own port by default")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--note-cost", type=float, default=0.0, help="seconds per note added or updated")
+    parser.add_argument("--api-key", default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = MockAnkiConnectConfig(latency=args.latency, note_cost=args.note_cost, api_key=args.api_key)
+    server = MockAnkiConnectServer(config, args.host, args.port)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""Local stand-in for the Brainscape site, for load tests and offline runs.
+
+Run it on its own with ``python -m brainscape_to_anki.devtools.mock_brainscape``
+or embed ``MockBrainscapeServer`` in a script. Every deck is generated
+deterministically from its ID, so two runs against the same configuration
+see exactly the same cards.
+"""
+import argparse
+import html
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+LAYOUTS = ("full-card", "card-face", "scf-face", "qa-indicator")
+
+
+@dataclass(frozen=True)
+class MockServerConfig:
+    """Shape of the synthetic content and of the simulated server behaviour.
+
+    ``layout`` is one of ``LAYOUTS``, ``"rotate"`` (picked from the deck ID)
+    or ``"mixed"`` (picked per row). ``latency`` plus up to ``jitter``
+    seconds is added to every response. A share ``error_rate`` of requests
+    fails with a 500, and requests above ``throttle_rps`` get a 429 with a
+    ``Retry-After`` of ``retry_after`` seconds. ``page_chrome`` wraps deck
+    pages in that many blocks of navigation, script and style markup, the
+    way real pages carry far more of it than card content. A share
+    ``media_rate`` of questions shows one of ``media_pool`` images of
+    ``media_bytes`` bytes; odd decks share image addresses, even decks get
+    their own address for the same content.
+    """
+
+    cards_per_deck: int = 50
+    decks_per_pack: int = 10
+    layout: str = "rotate"
+    api_enabled: bool = True
+    api_page_size: Optional[int] = None
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rps: Optional[float] = None
+    retry_after: int = 1
+    seed: int = 0
+    page_chrome: int = 0
+    media_rate: float = 0.0
+    media_pool: int = 20
+    media_bytes: int = 8192
+
+
+def deck_cards(deck_id: int, config: MockServerConfig) -> List[Tuple[str, str]]:
+    rng = random.Random(config.seed * 1_000_003 + deck_id)
+    return [
+        (
+            f"Deck {deck_id} question {i + 1}: what is {rng.randint(1, 10_000)}?",
+            f"Answer {i + 1} for deck {deck_id}: {rng.randint(1, 10_000)}",
+        )
+        for i in range(config.cards_per_deck)
+    ]
+
+
+def deck_media(deck_id: int, config: MockServerConfig) -> List[Optional[str]]:
+    """Image address shown with each question of a deck, if any."""
+    if not config.media_rate:
+        return [None] * config.cards_per_deck
+    rng = random.Random(config.seed * 1_000_003 + deck_id + 7)
+    images = []
+    for _ in range(config.cards_per_deck):
+        if rng.random() >= config.media_rate:
+            images.append(None)
+            continue
+        image = f"/media/{rng.randrange(config.media_pool)}.png"
+        images.append(image if deck_id % 2 else f"{image}?deck={deck_id}")
+    return images
+
+
+def media_payload(image_id: int, config: MockServerConfig) -> bytes:
+    rng = random.Random(config.seed * 1_000_003 + image_id)
+    body = bytes(rng.getrandbits(8) for _ in range(max(0, config.media_bytes - 8)))
+    return b"\x89PNG\r\n\x1a\n" + body
+
+
+def deck_layout(deck_id: int, config: MockServerConfig, row: int = 0) -> str:
+    if config.layout == "rotate":
+        return LAYOUTS[deck_id % len(LAYOUTS)]
+    if config.layout == "mixed":
+        return LAYOUTS[(deck_id + row) % len(LAYOUTS)]
+    return config.layout
+
+
+def render_row(layout: str, question: str, answer: str, image: Optional[str] = None) -> str:
+    question = html.escape(question)
+    answer = html.escape(answer)
+    if image:
+        question += f'<img src="{html.escape(image)}" alt="">'
+
+    if layout == "full-card":
+        return (
+            '<div class="flashcard-row full-card">'
+            '<div class="question-contents"><div class="main-fields-container">'
+            f"<p>{question}</p></div></div>"
+            '<div class="answer-contents"><div class="main-fields-container">'
+            f"<p>{answer}</p></div></div>"
+            "</div>"
+        )
+    if layout == "card-face":
+        return (
+            '<div class="flashcard-row">'
+            f'<div class="card-face question"><div class="question-content">{question}</div></div>'
+            f'<div class="card-face answer"><div class="answer-content">{answer}</div></div>'
+            "</div>"
+        )
+    if layout == "scf-face":
+        return (
+            '<div class="flashcard-row">'
+            f'<div class="scf-face">{question}</div>'
+            f'<div class="scf-face">{answer}</div>'
+            "</div>"
+        )
+    if layout == "qa-indicator":
+        return (
+            '<div class="flashcard-row">'
+            '<div class="card-header"><div class="flashcard-type-indicator">Q</div></div>'
+            f'<div class="main-fields-container">{question}</div>'
+            '<div class="card-header"><div class="flashcard-type-indicator">A</div></div>'
+            f'<div class="main-fields-container">{answer}</div>'
+            "</div>"
+        )
+    raise ValueError(f"Unknown layout: {layout}")
+
+
+def render_page_chrome(block: int) -> str:
+    links = "".join(
+        f'<li class="nav-item"><a class="nav-link" href="/subjects/{block}-{i}">Subject {block}.{i}</a></li>'
+        for i in range(20)
+    )
+    return (
+        f'<nav class="site-nav" id="nav-{block}"><ul class="nav-list">{links}</ul></nav>'
+        f"<script>window.__state_{block} = {{\"deckIds\": [{', '.join(str(i) for i in range(50))}]}};</script>"
+        f"<style>.nav-{block} .nav-link {{ color: #{block % 0xffffff:06x}; }}</style>"
+        f'<footer class="site-footer"><p>Footer block {block} with <a href="/about">links</a></p></footer>'
+    )
+
+
+def render_deck_page(deck_id: int, config: MockServerConfig) -> str:
+    rows = "\n".join(
+        render_row(deck_layout(deck_id, config, i), question, answer, image)
+        for i, ((question, answer), image) in enumerate(zip(deck_cards(deck_id, config), deck_media(deck_id, config)))
+    )
+    header = "".join(render_page_chrome(block) for block in range(config.page_chrome // 2))
+    footer = "".join(render_page_chrome(block) for block in range(config.page_chrome // 2, config.page_chrome))
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>Mock Deck {deck_id} | Brainscape</title>"
+        f'<link rel="canonical" href="/decks/{deck_id}">'
+        "</head><body>"
+        f"{header}"
+        f'<h1 class="deck-title">Mock Deck {deck_id}</h1>'
+        f'<div class="deck-cards" data-deck-id="{deck_id}">\n{rows}\n</div>'
+        f"{footer}"
+        "</body></html>"
+    )
+
+
+def render_study_page(deck_id: int, config: MockServerConfig) -> str:
+    rows = "\n".join(
+        render_row("card-face", question, answer, image)
+        for (question, answer), image in zip(deck_cards(deck_id, config), deck_media(deck_id, config))
+    )
+    return f"<!DOCTYPE html><html><head><title>Study</title></head><body>\n{rows}\n</body></html>"
+
+
+def pack_deck_ids(pack_id: int, config: MockServerConfig) -> List[int]:
+    return [pack_id * 1000 + i for i in range(1, config.decks_per_pack + 1)]
+
+
+def render_pack_page(pack_id: int, config: MockServerConfig) -> str:
+    links = "\n".join(
+        f'<a href="/flashcards/mock-deck-{deck_id}/packs/mock-pack-{pack_id}">Mock Deck {deck_id}</a>'
+        for deck_id in pack_deck_ids(pack_id, config)
+    )
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>Mock Pack {pack_id}</title></head><body>"
+        f"<h1>Mock Pack {pack_id}</h1>\n{links}\n</body></html>"
+    )
+
+
+def render_cards_json(deck_id: int, config: MockServerConfig, query: Dict[str, List[str]]) -> str:
+    cards = [
+        {
+            "id": i + 1,
+            "question": f"<p>{html.escape(question)}</p>" + (f'<img src="{html.escape(image)}">' if image else ""),
+            "answer": html.escape(answer),
+        }
+        for i, ((question, answer), image) in enumerate(zip(deck_cards(deck_id, config), deck_media(deck_id, config)))
+    ]
+
+    def param(name: str) -> Optional[int]:
+        try:
+            return int(query[name][0])
+        except (KeyError, ValueError):
+            return None
+
+    if "offset" in query:
+        offset = param("offset") or 0
+        limit = param("limit") or config.api_page_size or len(cards)
+        return json.dumps({
+            "cards": cards[offset:offset + limit],
+            "offset": offset,
+            "limit": limit,
+            "total": len(cards),
+        })
+
+    per_page = param("per_page") or config.api_page_size
+    if per_page:
+        page = param("page") or 1
+        start = (page - 1) * per_page
+        return json.dumps({
+            "cards": cards[start:start + per_page],
+            "page": page,
+            "per_page": per_page,
+            "total": len(cards),
+        })
+
+    return json.dumps(cards)
+
+
+class _Throttle:
+    """Server-side token bucket; a request without a token gets a 429."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_MockHTTPServer"
+
+    routes = (
+        (re.compile(r"^/decks/(\d+)/?$"), "deck"),
+        (re.compile(r"^/learn/(\d+)/?$"), "deck"),
+        (re.compile(r"^/flashcards/[^/]*?-(\d+)/packs/[^/]+/?$"), "deck"),
+        (re.compile(r"^/flashcards/[^/]*?-(\d+)/?$"), "deck"),
+        (re.compile(r"^/packs/(?:[^/]*-)?(\d+)/?$"), "pack"),
+        (re.compile(r"^/api/decks/(\d+)/cards/?$"), "cards_api"),
+        (re.compile(r"^/api/packs/(\d+)/decks/?$"), "pack_api"),
+        (re.compile(r"^/media/(\d+)\.png$"), "media"),
+    )
+
+    def do_GET(self) -> None:
+        config = self.server.config
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+
+        delay = config.latency + (random.uniform(0, config.jitter) if config.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.server.throttle is not None and not self.server.throttle.allow():
+            self._send(429, "text/plain", "Too Many Requests", {"Retry-After": str(config.retry_after)})
+            return
+        if config.error_rate and random.random() < config.error_rate:
+            self._send(500, "text/plain", "Internal Server Error")
+            return
+
+        route, item_id = self._route(parts.path)
+        if route == "deck":
+            self._send(200, "text/html; charset=utf-8", render_deck_page(item_id, config))
+        elif route == "pack":
+            self._send(200, "text/html; charset=utf-8", render_pack_page(item_id, config))
+        elif route == "cards_api" and config.api_enabled:
+            self._send(200, "application/json", render_cards_json(item_id, config, query))
+        elif route == "pack_api":
+            self._send(200, "application/json", json.dumps(
+                {"decks": [{"id": deck_id} for deck_id in pack_deck_ids(item_id, config)]}
+            ))
+        elif route == "media" and item_id < config.media_pool:
+            self._send(200, "image/png", media_payload(item_id, config))
+        elif parts.path == "/study" and query.get("deck_id", [""])[0].isdigit():
+            deck_id = int(query["deck_id"][0])
+            self._send(200, "text/html; charset=utf-8", render_study_page(deck_id, config))
+        else:
+            self._send(404, "text/plain", "Not Found")
+
+    def _route(self, path: str) -> Tuple[Optional[str], int]:
+        for pattern, route in self.routes:
+            match = pattern.match(path)
+            if match:
+                return route, int(match.group(1))
+        return None, 0
+
+    def _send(
+            self, status: int, content_type: str, body: Union[str, bytes], headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        payload = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # Cancelled speculative requests hang up mid-response
+            self.close_connection = True
+        self.server.count(status)
+
+    def log_message(self, format: str, *args) -> None:
+        logging.getLogger(__name__).debug(f"{self.address_string()} - {format % args}")
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: MockServerConfig):
+        super().__init__(address, _MockHandler)
+        self.config = config
+        self.throttle = _Throttle(config.throttle_rps) if config.throttle_rps else None
+        self.status_counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+
+    def handle_error(self, request, client_address) -> None:
+        logging.getLogger(__name__).debug(f"Connection from {client_address} dropped", exc_info=True)
+
+    def count(self, status: int) -> None:
+        with self._counts_lock:
+            self.status_counts[status] += 1
+
+
+class MockBrainscapeServer:
+    """Runs the mock site on a background thread.
+
+    Use it as a context manager; ``base_url`` is what ``BrainscapeScraper``
+    should be pointed at and ``deck_url``/``pack_url`` build page URLs.
+    """
+
+    def __init__(self, config: Optional[MockServerConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.logger = logging.getLogger(__name__)
+        self.config = config or MockServerConfig()
+        self._server = _MockHTTPServer((host, port), self.config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def deck_url(self, deck_id: int) -> str:
+        return f"{self.base_url}/decks/{deck_id}"
+
+    def pack_url(self, pack_id: int) -> str:
+        return f"{self.base_url}/packs/mock-pack-{pack_id}"
+
+    def start(self) -> "MockBrainscapeServer":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="mock-brainscape", daemon=True
+            )
+            self._thread.start()
+            self.logger.info(f"Mock Brainscape server listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def stats(self) -> Dict[int, int]:
+        with self._server._counts_lock:
+            return dict(self._server.status_counts)
+
+    def __enter__(self) -> "MockBrainscapeServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--cards", type=int, default=50, help="cards per deck")
+    parser.add_argument("--decks-per-pack", type=int, default=10)
+    parser.add_argument("--layout", default="rotate", choices=LAYOUTS + ("rotate", "mixed"))
+    parser.add_argument("--no-api", action="store_true", help="answer the cards API with 404")
+    parser.add_argument("--api-page-size", type=int, default=None, help="paginate the cards API")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--throttle-rps", type=float, default=None, help="answer 429 above this rate")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--page-chrome", type=int, default=0, help="navigation/script blocks per deck page")
+    parser.add_argument("--media-rate", type=float, default=0.0, help="share of questions showing an image")
+    parser.add_argument("--media-pool", type=int, default=20, help="distinct images shared by all decks")
+    parser.add_argument("--media-bytes", type=int, default=8192, help="size of each image")
+
+
+def config_from_args(args: argparse.Namespace) -> MockServerConfig:
+    return MockServerConfig(
+        cards_per_deck=args.cards,
+        decks_per_pack=args.decks_per_pack,
+        layout=args.layout,
+        api_enabled=not args.no_api,
+        api_page_size=args.api_page_size,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rps=args.throttle_rps,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        page_chrome=args.page_chrome,
+        media_rate=args.media_rate,
+        media_pool=args.media_pool,
+        media_bytes=args.media_bytes,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a synthetic Brainscape site locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = MockBrainscapeServer(config_from_args(args), args.host, args.port)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
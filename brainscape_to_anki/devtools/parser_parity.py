@@ -0,0 +1,196 @@
+"""Checks that every installed HTML parser backend extracts the same cards.
+
+A full ``html.parser`` parse is the reference. Each fixture (the mock
+server's layouts, a page of awkward markup, and any saved pages passed with
+``--file``) is run through both extractors with every backend, once parsing
+the full page and once parsing only the card and title elements; titles and
+flashcards must match exactly. Parse and extraction times are reported
+alongside, and totalled per backend and mode at the end; the totals are
+what ``BACKEND_PREFERENCE`` is ordered by::
+
+    python -m brainscape_to_anki.devtools.parser_parity --file saved_deck.html
+
+Exits with status 1 when any backend disagrees with the reference.
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from brainscape_to_anki.devtools.mock_brainscape import (
+    LAYOUTS,
+    MockServerConfig,
+    render_deck_page,
+    render_study_page,
+)
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.infrastructure.parsing.html_backend import (
+    HtmlParserBackend,
+    available_backends,
+    get_backend,
+    parse_targeted,
+)
+from brainscape_to_anki.infrastructure.parsing.html_import import DirectHtmlProcessor
+from brainscape_to_anki.infrastructure.parsing.targets import DECK_PAGE_TARGETS
+from brainscape_to_anki.infrastructure.scrapers.brainscape_scraper import BrainscapeScraper
+
+REFERENCE_BACKEND = "html.parser"
+
+# Markup the mock server never produces but real pages and pasted HTML do
+AWKWARD_PAGE = """<!DOCTYPE html>
+<html><head>
+<meta property="og:title" content="Awkward &amp; Edgy Deck">
+<title>Ignored because the h1 wins</title>
+<script>var deckId = 42; if (a < b && c > d) {}</script>
+<style>.flashcard-row { display: block }</style>
+</head>
+<body>
+<nav><ul><li><a href="/">Home</a><li><a href="/subjects">Subjects</a></ul></nav>
+<h1 class="deck-title">  Awkward &amp; Edgy  </h1>
+<!-- <div class="flashcard-row">commented out</div> -->
+<div class="flashcard-row full-card">
+  <div class="question-contents"><div class="main-fields-container">
+    <p>What is 2 &lt; 3?<br>Line two</p><!-- note -->
+  </div></div>
+  <div class="answer-contents"><div class="main-fields-container">
+    <p>True &mdash; <b>obviously</b> &#x2713;</p>
+  </div></div>
+</div>
+<div class="flashcard-row full-card">
+  <div class="scf-face">Unclosed <p>paragraph</div>
+  <div class="scf-face">Answer with <span>nested <i>tags</i></span></div>
+</div>
+<div class="flashcard-row full-card">
+  <div class="preview-html">Preview front</div>
+  <div class="preview-html">Preview back</div>
+</div>
+<div class="flashcard-row is-blurrable">
+  <div class="card-face question">Blurred question</div>
+  <div class="card-face answer"><div class="answer-content">Hidden <a href="/subscribe">Unlock</a>answer</div></div>
+</div>
+<div class="flashcard-row">
+  <div class="card-face question"><div class="question-content">A. First B. Second</div></div>
+  <div class="card-face answer"><div class="answer-content">How well did you know this? Not at all 1 2 3 4 5 Perfectly</div></div>
+</div>
+<div class="flashcard-row" data-empty>
+  <div class="card-header"><div class="flashcard-type-indicator">Q</div></div>
+  <div class="main-fields-container"><ul><li>one<li>two</ul></div>
+  <div class="card-header"><div class="flashcard-type-indicator">A</div></div>
+  <div class="main-fields-container"><table><tr><td>cell</td></tr></table></div>
+</div>
+<div class="flashcard-row"><div class="scf-face">Only one face</div></div>
+</body></html>
+"""
+
+Extractor = Callable[[HtmlParserBackend, str, bool], Tuple[str, List[Flashcard]]]
+
+
+def fixtures(files: List[Path]) -> Dict[str, str]:
+    config = MockServerConfig(cards_per_deck=200)
+    pages = {
+        f"mock {layout}": render_deck_page(0, MockServerConfig(cards_per_deck=200, layout=layout))
+        for layout in LAYOUTS
+    }
+    pages["mock mixed"] = render_deck_page(7, MockServerConfig(cards_per_deck=200, layout="mixed"))
+    pages["mock study page"] = render_study_page(3, config)
+    pages["mock with chrome"] = render_deck_page(
+        7, MockServerConfig(cards_per_deck=200, layout="mixed", page_chrome=200)
+    )
+    pages["awkward markup"] = AWKWARD_PAGE
+    for path in files:
+        pages[path.name] = path.read_text(encoding="utf-8", errors="replace")
+    return pages
+
+
+def scraper_extractor() -> Extractor:
+    scraper = BrainscapeScraper()
+
+    def extract(backend: HtmlParserBackend, html: str, partial: bool) -> Tuple[str, List[Flashcard]]:
+        soup = parse_targeted(backend, html, DECK_PAGE_TARGETS) if partial else backend.parse(html)
+        return scraper._extract_title(soup), scraper._extract_flashcards_from_html(soup)
+
+    return extract
+
+
+def html_processor_extractor() -> Extractor:
+    def extract(backend: HtmlParserBackend, html: str, partial: bool) -> Tuple[str, List[Flashcard]]:
+        return DirectHtmlProcessor(backend, partial_parse=partial).extract_flashcards_from_html(html)
+
+    return extract
+
+
+def timed(extract: Extractor, backend: HtmlParserBackend, html: str, partial: bool, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = extract(backend, html, partial)
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare HTML parser backends for extraction parity")
+    parser.add_argument("--file", type=Path, action="append", default=[], help="saved Brainscape page")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per fixture")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    extractors: Dict[str, Extractor] = {
+        "BrainscapeScraper": scraper_extractor(),
+        "DirectHtmlProcessor": html_processor_extractor(),
+    }
+
+    backends = [get_backend(name) for name in available_backends()]
+    reference = get_backend(REFERENCE_BACKEND)
+    print(f"Backends: {', '.join(backend.name for backend in backends)}")
+
+    mismatches = 0
+    totals: Dict[Tuple[str, str], float] = {}
+    for fixture_name, html in fixtures(args.file).items():
+        for extractor_name, extract in extractors.items():
+            expected, reference_time = timed(extract, reference, html, False, args.repeat)
+            print(f"{fixture_name:<20} {extractor_name:<20} {len(expected[1]):>4} cards")
+
+            for backend in backends:
+                line = [f"    {backend.name:<12}"]
+                for partial in (False, True):
+                    mode = "partial" if partial else "full"
+                    if backend is reference and not partial:
+                        totals[backend.name, mode] = totals.get((backend.name, mode), 0.0) + reference_time
+                        line.append(f"{mode} {reference_time * 1000:7.1f}ms reference")
+                        continue
+                    result, elapsed = timed(extract, backend, html, partial, args.repeat)
+                    totals[backend.name, mode] = totals.get((backend.name, mode), 0.0) + elapsed
+                    status = "ok" if result == expected else "MISMATCH"
+                    line.append(f"{mode} {elapsed * 1000:7.1f}ms {status:<9}")
+                    if result != expected:
+                        mismatches += 1
+                        report_mismatch(expected, result)
+                print("  ".join(line))
+
+    print("Total over all fixtures and extractors:")
+    for backend in backends:
+        print(f"    {backend.name:<12}" + "  ".join(
+            f"{mode} {totals[backend.name, mode] * 1000:7.1f}ms" for mode in ("full", "partial")
+        ))
+
+    if mismatches:
+        print(f"{mismatches} backend/mode/fixture combinations disagree with {REFERENCE_BACKEND}")
+        sys.exit(1)
+    print("All backends and parse modes agree")
+
+
+def report_mismatch(expected: Tuple[str, List[Flashcard]], result: Tuple[str, List[Flashcard]]) -> None:
+    if expected[0] != result[0]:
+        print(f"    title: {expected[0]!r} != {result[0]!r}")
+    if len(expected[1]) != len(result[1]):
+        print(f"    card count: {len(expected[1])} != {len(result[1])}")
+    for i, (want, got) in enumerate(zip(expected[1], result[1])):
+        if want != got:
+            print(f"    card {i + 1}: {want} != {got}")
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,96 @@
+import asyncio
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import AsyncIterable, Iterable, List
 
-from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.deck import Deck, DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+
+# Cards a stream hands to its writer at a time
+STREAM_CHUNK_SIZE = 100
+
+
+class DeckWriter(ABC):
+    """Writes one deck card by card.
+
+    Nothing appears at the destination until ``commit``, which finishes
+    the file and renames it into place; leaving the ``with`` block without
+    committing discards everything written.
+    """
+
+    # Goes between the deck's title and the extension of the file written
+    name_suffix = ""
+
+    @abstractmethod
+    def write(self, flashcard: Flashcard) -> None:
+        pass
+
+    def remove(self, guid: str, front: str) -> None:
+        """Drop a note exported earlier; files cannot express that, so by default nothing happens."""
+
+    @abstractmethod
+    def commit(self) -> Path:
+        pass
+
+    @abstractmethod
+    def abort(self) -> None:
+        """Discard the deck; does nothing once committed."""
+
+    def __enter__(self) -> "DeckWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.abort()
 
 
 class ExporterInterface(ABC):
     @abstractmethod
+    def open_deck(self, info: DeckInfo, output_path: Path) -> DeckWriter:
+        """Start a deck whose cards are not known yet.
+
+        The file is named when it is committed, so a title the scraper only
+        fills into ``info`` while streaming is still used.
+        """
+
     def export(self, deck: Deck, output_path: Path) -> Path:
-        pass
+        return self.export_stream(DeckInfo(deck.title, deck.url, deck.source_id), deck.flashcards, output_path)
+
+    def export_stream(self, info: DeckInfo, flashcards: Iterable[Flashcard], output_path: Path) -> Path:
+        return self._write_all(self.open_deck(info, output_path), flashcards)
+
+    async def export_async_stream(
+            self, info: DeckInfo, flashcards: AsyncIterable[Flashcard], output_path: Path
+    ) -> Path:
+        """Write cards as they arrive without blocking the event loop.
+
+        Writers block on disk and network I/O, so they run on a thread of
+        the deck's own, ``STREAM_CHUNK_SIZE`` cards at a time; one thread
+        throughout, because some writers hold SQLite connections.
+        """
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="deck-writer") as thread:
+            writer = await loop.run_in_executor(thread, self.open_deck, info, output_path)
+            try:
+                chunk: List[Flashcard] = []
+                async for flashcard in flashcards:
+                    chunk.append(flashcard)
+                    if len(chunk) >= STREAM_CHUNK_SIZE:
+                        await loop.run_in_executor(thread, self._write_chunk, writer, chunk)
+                        chunk = []
+                await loop.run_in_executor(thread, self._write_chunk, writer, chunk)
+                return await loop.run_in_executor(thread, writer.commit)
+            finally:
+                await loop.run_in_executor(thread, writer.abort)
+
+    @staticmethod
+    def _write_chunk(writer: DeckWriter, flashcards: List[Flashcard]) -> None:
+        for flashcard in flashcards:
+            writer.write(flashcard)
+
+    @staticmethod
+    def _write_all(writer: DeckWriter, flashcards: Iterable[Flashcard]) -> Path:
+        with writer:
+            for flashcard in flashcards:
+                writer.write(flashcard)
+            return writer.commit()
@@ -1,10 +1,58 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import AsyncIterable, AsyncIterator, Optional
 
-from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.deck import Deck, DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.pack import Pack
 
 
 class ScraperInterface(ABC):
     @abstractmethod
     async def scrape(self, url: str) -> Optional[Deck]:
         pass
+
+    async def iter_flashcards(
+            self, url: str, info: Optional[DeckInfo] = None
+    ) -> AsyncIterator[Flashcard]:
+        """Yield the cards of a deck one by one, filling ``info`` on the way.
+
+        The default implementation scrapes the whole deck first; scrapers
+        that can stream should override it.
+        """
+        deck = await self.scrape(url)
+        if deck is None:
+            return
+
+        if info is not None:
+            info.title = deck.title
+            info.source_id = deck.source_id
+        for flashcard in deck.flashcards:
+            yield flashcard
+
+    async def fetch_media(self, deck: Deck) -> Deck:
+        """Download the media ``deck``'s cards refer to; by default there is none to get."""
+        return deck
+
+    async def fetch_card_media(
+            self, flashcards: AsyncIterable[Flashcard], url: str
+    ) -> AsyncIterator[Flashcard]:
+        """``fetch_media`` for a stream of the cards of the deck at ``url``."""
+        async for flashcard in flashcards:
+            yield flashcard
+
+    async def expand_pack(self, url: str) -> Optional[Pack]:
+        """Return the decks of a pack URL, or None if the URL is not a pack."""
+        return None
+
+    async def open(self) -> None:
+        """Acquire long-lived resources (e.g. a pooled HTTP client)."""
+
+    async def close(self) -> None:
+        """Release resources acquired by open()."""
+
+    async def __aenter__(self) -> "ScraperInterface":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
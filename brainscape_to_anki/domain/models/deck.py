@@ -10,3 +10,13 @@ class Deck:
     flashcards: List[Flashcard]
     url: str
     source_id: Optional[str] = None
+
+
+@dataclass
+class DeckInfo:
+    """Deck metadata without the cards, filled in while a deck is streamed."""
+
+    title: str
+    url: str
+    source_id: Optional[str] = None
+    card_count: int = 0
@@ -1,7 +1,14 @@
 from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from brainscape_to_anki.domain.models.media import MediaRef
 
 
 @dataclass(frozen=True)
 class Flashcard:
     front: str
     back: str
+    tags: Tuple[str, ...] = ()
+    media: Tuple[MediaRef, ...] = ()
+    # Note identity in Anki; exporters derive one when it is not set
+    guid: Optional[str] = None
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from typing import Optional
+
+IMAGE = "image"
+AUDIO = "audio"
+VIDEO = "video"
+
+FRONT = "front"
+BACK = "back"
+
+
+@dataclass(frozen=True)
+class MediaRef:
+    """An image, sound or video shown on one side of a card.
+
+    ``url`` is the source as written in the page, possibly relative.
+    ``filename`` is the file's name in the media store once it has been
+    downloaded, ``None`` until then.
+    """
+
+    url: str
+    kind: str = IMAGE
+    side: str = FRONT
+    filename: Optional[str] = None
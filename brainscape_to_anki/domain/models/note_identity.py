@@ -0,0 +1,50 @@
+import base64
+import hashlib
+from typing import Dict
+
+from brainscape_to_anki.domain.models.deck import DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+
+FIELD_SEPARATOR = "\x1f"
+
+
+def deck_key(info: DeckInfo) -> str:
+    return info.source_id or info.url or info.title
+
+
+def note_guid(*fields: str) -> str:
+    """Note id Anki uses to recognize a note on a later import."""
+    digest = hashlib.sha256(FIELD_SEPARATOR.join(fields).encode("utf-8")).digest()
+    # 72 bits in 12 characters, without padding
+    return base64.urlsafe_b64encode(digest[:9]).decode("ascii")
+
+
+def card_checksum(flashcard: Flashcard) -> str:
+    """Changes whenever anything exported for the card changes."""
+    parts = [flashcard.front, flashcard.back, " ".join(flashcard.tags)]
+    parts.extend(f"{ref.side}:{ref.kind}:{ref.filename or ref.url}" for ref in flashcard.media)
+    return hashlib.sha1(FIELD_SEPARATOR.join(parts).encode("utf-8")).hexdigest()
+
+
+class NoteGuids:
+    """Stable GUIDs for the cards of one deck, fed in deck order.
+
+    A card's GUID depends on the deck, its front and how many cards before
+    it in the deck have the same front, so re-scraping gives every card the
+    GUID it had before. A card whose back, tags or media changed keeps its
+    GUID and Anki updates the note in place; a changed front is a new note.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._occurrences: Dict[bytes, int] = {}
+
+    def assign(self, flashcard: Flashcard) -> str:
+        front = " ".join(flashcard.front.split())
+        # Digests rather than the fronts themselves, to keep long decks small
+        seen = hashlib.sha1(front.encode("utf-8")).digest()
+        occurrence = self._occurrences.get(seen, 0)
+        self._occurrences[seen] = occurrence + 1
+        if occurrence:
+            return note_guid(self.key, front, str(occurrence))
+        return note_guid(self.key, front)
@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class Pack:
+    title: str
+    deck_urls: List[str]
+    url: str
+    source_id: Optional[str] = None
@@ -1,54 +1,174 @@
 import csv
+import html
+import os
 import re
+import shutil
 import logging
+import tempfile
 from pathlib import Path
+from typing import Optional, Set
 
-from brainscape_to_anki.domain.interfaces.exporter import ExporterInterface
-from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.interfaces.exporter import DeckWriter, ExporterInterface
+from brainscape_to_anki.domain.models.deck import Deck, DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import BACK, FRONT, IMAGE
+from brainscape_to_anki.domain.models.note_identity import NoteGuids, deck_key
+from brainscape_to_anki.infrastructure.media.store import MediaStore
+
+# Next to the CSV files; its contents go into Anki's collection.media
+MEDIA_DIR_NAME = "media"
+# Rows are handed to the file system in pieces this large
+WRITE_BUFFER_SIZE = 2 ** 20
+
+
+def html_field(flashcard: Flashcard, side: str) -> str:
+    """One side of a card as an Anki field: escaped text, then its media."""
+    text = flashcard.front if side == FRONT else flashcard.back
+    parts = [html.escape(text, quote=False)] if text else []
+    for ref in flashcard.media:
+        if ref.side != side or not ref.filename:
+            continue
+        if ref.kind == IMAGE:
+            parts.append(f'<img src="{ref.filename}">')
+        else:
+            parts.append(f"[sound:{ref.filename}]")
+    return " ".join(parts)
+
+
+def sanitize_filename(filename: str) -> str:
+    # Replace invalid filename characters with underscores
+    sanitized = re.sub(r'[\\/*?:"<>|]', "_", filename)
+
+    # Limit filename length
+    if len(sanitized) > 100:
+        sanitized = sanitized[:97] + "..."
+
+    return sanitized
 
 
 class AnkiExporter(ExporterInterface):
-    def __init__(self):
+    def __init__(self, media_store: Optional[MediaStore] = None):
         self.logger = logging.getLogger(__name__)
+        self.media_store = media_store
 
     def export(self, deck: Deck, output_path: Path) -> Path:
-        self.logger.info(f"Exporting deck '{deck.title}' with {len(deck.flashcards)} cards to {output_path}")
+        # The whole deck is known here, so columns only appear when a card
+        # needs them: tags (e.g. merged packs), and HTML fields only when
+        # there is media to reference
+        with_tags = any(flashcard.tags for flashcard in deck.flashcards)
+        with_media = self.media_store is not None and any(
+            ref.filename for flashcard in deck.flashcards for ref in flashcard.media
+        )
+        info = DeckInfo(deck.title, deck.url, deck.source_id)
+        return self._write_all(self._open(info, output_path, with_tags, with_media), deck.flashcards)
 
+    def open_deck(self, info: DeckInfo, output_path: Path) -> "CsvDeckWriter":
+        # A stream cannot be looked ahead of, so it always has a tags column
+        # and HTML fields whenever media can be exported
+        return self._open(info, output_path, True, self.media_store is not None)
+
+    def _open(self, info: DeckInfo, output_path: Path, with_tags: bool, with_media: bool) -> "CsvDeckWriter":
+        self.logger.info(f"Exporting deck '{info.title or info.url}' to {output_path}")
         if not output_path.exists():
             self.logger.info(f"Creating output directory: {output_path}")
             output_path.mkdir(parents=True, exist_ok=True)
+        return CsvDeckWriter(info, output_path, self.media_store if with_media else None, with_tags)
 
-        sanitized_title = self._sanitize_filename(deck.title)
-        file_path = output_path / f"{sanitized_title}.csv"
 
-        self.logger.info(f"Writing to file: {file_path}")
+class CsvDeckWriter(DeckWriter):
+    """Writes rows through a buffer into a temporary file next to the
+    destination, which ``commit`` renames to the deck's title. Media files
+    are linked into the media folder as the cards referring to them arrive.
 
-        try:
-            with open(file_path, "w", newline="", encoding="utf-8") as csvfile:
-                writer = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL)
+    The file starts with Anki's import headers, so the columns map to the
+    fields without setup and the GUID column lets a re-import update the
+    notes of an earlier one instead of duplicating them.
+    """
 
-                # Write header row
-                writer.writerow(["Front", "Back"])
+    def __init__(self, info: DeckInfo, output_path: Path, media_store: Optional[MediaStore], with_tags: bool):
+        self.logger = logging.getLogger(__name__)
+        self.info = info
+        self.output_path = output_path
+        self.media_store = media_store
+        self.with_tags = with_tags
+        self.count = 0
 
-                # Write flashcards
-                for i, flashcard in enumerate(deck.flashcards):
-                    self.logger.debug(
-                        f"Writing card {i + 1}: Front: {flashcard.front[:30]}... Back: {flashcard.back[:30]}...")
-                    writer.writerow([flashcard.front, flashcard.back])
+        self._linked: Set[str] = set()
+        self._added = 0
+        # Scrapers may fill in the deck id while streaming, so this waits for the first card
+        self._guids: Optional[NoteGuids] = None
+        fd, name = tempfile.mkstemp(dir=output_path, prefix=".", suffix=".csv.tmp")
+        self._tmp_path = Path(name)
+        self._file = open(fd, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+        self._writer = csv.writer(self._file, quoting=csv.QUOTE_MINIMAL)
+        self._write_headers()
 
-            self.logger.info(f"Successfully exported {len(deck.flashcards)} cards to {file_path}")
-            return file_path
+    def write(self, flashcard: Flashcard) -> None:
+        if self._guids is None:
+            self._guids = NoteGuids(deck_key(self.info))
+        if self.media_store is not None:
+            self._link_media(flashcard)
+            fields = [html_field(flashcard, FRONT), html_field(flashcard, BACK)]
+        else:
+            fields = [flashcard.front, flashcard.back]
+        if self.with_tags:
+            fields.append(" ".join(flashcard.tags))
+        fields.append(flashcard.guid or self._guids.assign(flashcard))
+        self._writer.writerow(fields)
+        self.count += 1
 
+    def commit(self) -> Path:
+        file_path = self.output_path / f"{sanitize_filename(self.info.title)}{self.name_suffix}.csv"
+        try:
+            self._file.close()
+            os.replace(self._tmp_path, file_path)
         except Exception as e:
+            self._tmp_path.unlink(missing_ok=True)
             self.logger.error(f"Error exporting deck: {str(e)}")
             raise
 
-    def _sanitize_filename(self, filename: str) -> str:
-        # Replace invalid filename characters with underscores
-        sanitized = re.sub(r'[\\/*?:"<>|]', "_", filename)
+        if self._linked:
+            self.logger.info(
+                f"{len(self._linked)} media files in {self.output_path / MEDIA_DIR_NAME} ({self._added} new); "
+                f"copy them into Anki's collection.media folder and allow HTML in fields when importing"
+            )
+        self.logger.info(f"Successfully exported {self.count} cards to {file_path}")
+        return file_path
+
+    def abort(self) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def _write_headers(self) -> None:
+        columns = ["Front", "Back", "Tags", "GUID"] if self.with_tags else ["Front", "Back", "GUID"]
+        headers = [
+            "#separator:comma",
+            f"#html:{'true' if self.media_store is not None else 'false'}",
+            f"#columns:{','.join(columns)}",
+            f"#guid column:{len(columns)}",
+        ]
+        if self.with_tags:
+            headers.append("#tags column:3")
+        self._file.write("".join(f"{header}\n" for header in headers))
 
-        # Limit filename length
-        if len(sanitized) > 100:
-            sanitized = sanitized[:97] + "..."
+    def _link_media(self, flashcard: Flashcard) -> None:
+        for ref in flashcard.media:
+            if not ref.filename or ref.filename in self._linked:
+                continue
+            self._linked.add(ref.filename)
 
-        return sanitized
\ No newline at end of file
+            media_dir = self.output_path / MEDIA_DIR_NAME
+            media_dir.mkdir(exist_ok=True)
+            # Content-addressed names: an existing file already has this content
+            target = media_dir / ref.filename
+            if target.exists():
+                continue
+            source = self.media_store.path(ref.filename)
+            try:
+                os.link(source, target)
+            except OSError:
+                # Other file system, or links not supported
+                shutil.copyfile(source, target)
+            self._added += 1
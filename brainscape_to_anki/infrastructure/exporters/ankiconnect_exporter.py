@@ -0,0 +1,411 @@
+import html
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from brainscape_to_anki.domain.interfaces.exporter import DeckWriter, ExporterInterface
+from brainscape_to_anki.domain.models.deck import DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import BACK, FRONT
+from brainscape_to_anki.infrastructure.exporters.anki_exporter import html_field, sanitize_filename
+from brainscape_to_anki.infrastructure.exporters.apkg_exporter import (
+    ANSWER_FORMAT,
+    CSS,
+    MODEL_NAME,
+    QUESTION_FORMAT,
+    deck_name,
+)
+from brainscape_to_anki.infrastructure.media.store import MediaStore
+
+API_VERSION = 6
+FIELD_NAMES = ["Front", "Back"]
+
+# What one action of a ``multi`` request answered: result and error
+ActionResult = Tuple[Any, Optional[str]]
+# Kind of an action sent in a batch ("media", "add", "update" or "tags") and what it was for
+ActionLabel = Tuple[str, str]
+# Note id, back field and tags of a note already in the deck
+ExistingNote = Tuple[int, str, List[str]]
+# The images and sounds ``html_field`` puts after a field's text
+FIELD_MEDIA = re.compile(r'(?: ?(?:<img src="[^"]*">|\[sound:[^\]]*\]))+$')
+
+
+class AnkiConnectError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class AnkiConnectConfig:
+    """Where AnkiConnect listens and how notes are sent to it.
+
+    Notes go ``batch_size`` at a time in one ``multi`` request, with up to
+    ``concurrency`` requests in flight. Anki handles requests one after the
+    other, so more than one in flight only overlaps the transfer and JSON
+    work of the next batch with Anki adding the current one; it also lets
+    batches finish out of order, which is the order new cards are studied
+    in. ``api_key`` is needed when AnkiConnect is configured with one.
+    """
+    url: str = "http://127.0.0.1:8765"
+    api_key: Optional[str] = None
+    batch_size: int = 500
+    concurrency: int = 2
+    timeout: float = 120.0
+
+
+def anki_action(action: str, **params: Any) -> Dict[str, Any]:
+    return {"action": action, "version": API_VERSION, "params": params}
+
+
+def escape_search(text: str) -> str:
+    """Text matched literally inside a quoted Anki search term."""
+    return re.sub(r'([\\"*_])', r"\\\1", text)
+
+
+def field_text(field: str) -> str:
+    """A field written by ``html_field`` without its media, still escaped."""
+    return FIELD_MEDIA.sub("", field)
+
+
+class AnkiConnectClient:
+    """Calls AnkiConnect actions; safe to share between threads."""
+
+    def __init__(self, config: AnkiConnectConfig):
+        self.config = config
+        self._http = httpx.Client(
+            timeout=httpx.Timeout(config.timeout, connect=5.0),
+            limits=httpx.Limits(max_connections=config.concurrency + 1),
+        )
+
+    def invoke(self, action: str, **params: Any) -> Any:
+        payload = anki_action(action, **params)
+        if self.config.api_key:
+            payload["key"] = self.config.api_key
+        try:
+            response = self._http.post(self.config.url, json=payload)
+            response.raise_for_status()
+            reply = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise AnkiConnectError(f"Could not reach AnkiConnect at {self.config.url}: {str(e)}") from e
+
+        if not isinstance(reply, dict) or "error" not in reply or "result" not in reply:
+            raise AnkiConnectError(f"{self.config.url} did not answer like AnkiConnect")
+        if reply["error"] is not None:
+            raise AnkiConnectError(f"AnkiConnect {action} failed: {reply['error']}")
+        return reply["result"]
+
+    def multi(self, actions: List[Dict[str, Any]]) -> List[ActionResult]:
+        """Runs several actions in one request; each succeeds or fails on its own."""
+        replies = self.invoke("multi", actions=actions)
+        return [(reply.get("result"), reply.get("error")) for reply in replies]
+
+    def close(self) -> None:
+        self._http.close()
+
+
+class AnkiConnectExporter(ExporterInterface):
+    """Sends decks straight into a running Anki through the AnkiConnect add-on.
+
+    Each deck goes into an Anki deck named after its title, with the same
+    note type as the ``.apkg`` export; both are created when missing, so
+    exporting again never fails on them. AnkiConnect cannot set note GUIDs,
+    so cards are matched to the notes already in the deck by their front
+    (cards sharing a front in deck order): a matched card updates its note
+    when the back or the tags changed and is skipped otherwise, the rest are
+    added. Notes a delta export reports removed are looked up by GUID, which
+    notes imported from this tool's packages and CSV files carry, or else
+    by their front among the deck's notes of that note type, and deleted.
+    Media referenced by the cards is handed over from the ``MediaStore``.
+
+    Nothing is written to the output directory but a report of what Anki
+    did with the deck, ``<title>.ankiconnect.json``, which is what
+    ``commit`` returns.
+    """
+
+    def __init__(self, config: Optional[AnkiConnectConfig] = None, media_store: Optional[MediaStore] = None):
+        self.logger = logging.getLogger(__name__)
+        self.config = config or AnkiConnectConfig()
+        self.media_store = media_store
+        self.client = AnkiConnectClient(self.config)
+        self._lock = threading.Lock()
+        self._model_ready = False
+        self._stored_media: Set[str] = set()
+
+    def open_deck(self, info: DeckInfo, output_path: Path) -> "AnkiConnectDeckWriter":
+        self.logger.info(f"Sending deck '{info.title or info.url}' to AnkiConnect at {self.config.url}")
+        output_path.mkdir(parents=True, exist_ok=True)
+        return AnkiConnectDeckWriter(self, info, output_path)
+
+    def close(self) -> None:
+        self.client.close()
+
+    def prepare(self, deck: str) -> None:
+        """Create the deck and the note type unless Anki has them already."""
+        # Held throughout, so two decks starting together create the note type once
+        with self._lock:
+            actions = [anki_action("createDeck", deck=deck)]
+            if not self._model_ready:
+                actions.append(anki_action("modelNames"))
+            results = self.client.multi(actions)
+            for (_, error), action in zip(results, actions):
+                if error is not None:
+                    raise AnkiConnectError(f"AnkiConnect {action['action']} failed: {error}")
+            if self._model_ready:
+                return
+
+            if MODEL_NAME in results[1][0]:
+                fields = self.client.invoke("modelFieldNames", modelName=MODEL_NAME)
+                if fields[:len(FIELD_NAMES)] != FIELD_NAMES:
+                    raise AnkiConnectError(f"Anki's note type '{MODEL_NAME}' has fields {fields}, not {FIELD_NAMES}")
+            else:
+                self.logger.info(f"Creating note type '{MODEL_NAME}' in Anki")
+                self.client.invoke(
+                    "createModel",
+                    modelName=MODEL_NAME,
+                    inOrderFields=FIELD_NAMES,
+                    css=CSS,
+                    cardTemplates=[{"Name": "Card 1", "Front": QUESTION_FORMAT, "Back": ANSWER_FORMAT}],
+                )
+            self._model_ready = True
+
+    def existing_notes(self, deck: str) -> Dict[str, Deque[ExistingNote]]:
+        """Front field -> (note id, back field, tags) of the deck's notes, oldest first."""
+        deck_term = escape_search(deck)
+        query = f'"deck:{deck_term}" -"deck:{deck_term}::*" "note:{escape_search(MODEL_NAME)}"'
+        note_ids = sorted(self.client.invoke("findNotes", query=query))
+        existing: Dict[str, Deque[ExistingNote]] = {}
+        for start in range(0, len(note_ids), self.config.batch_size):
+            for note in self.client.invoke("notesInfo", notes=note_ids[start:start + self.config.batch_size]):
+                fields = note["fields"]
+                existing.setdefault(fields["Front"]["value"], deque()).append(
+                    (note["noteId"], fields["Back"]["value"], note.get("tags", []))
+                )
+        return existing
+
+    def find_guids(self, guids: List[str]) -> Dict[str, List[int]]:
+        """Note ids of the notes with each of these GUIDs."""
+        found: Dict[str, List[int]] = {}
+        for start in range(0, len(guids), self.config.batch_size):
+            batch = guids[start:start + self.config.batch_size]
+            actions = [anki_action("findNotes", query=f'"guid:{escape_search(guid)}"') for guid in batch]
+            for guid, (result, error) in zip(batch, self.client.multi(actions)):
+                if error is not None:
+                    raise AnkiConnectError(f"AnkiConnect findNotes failed: {error}")
+                if result:
+                    found[guid] = result
+        return found
+
+    def delete_notes(self, note_ids: List[int]) -> int:
+        if note_ids:
+            self.client.invoke("deleteNotes", notes=note_ids)
+        return len(note_ids)
+
+    def media_actions(self, flashcard: Flashcard) -> List[Tuple[ActionLabel, Dict[str, Any]]]:
+        """``storeMediaFile`` for each file of the card not handed to Anki yet."""
+        if self.media_store is None:
+            return []
+        actions = []
+        with self._lock:
+            for ref in flashcard.media:
+                if not ref.filename or ref.filename in self._stored_media:
+                    continue
+                source = self.media_store.path(ref.filename)
+                if not source.exists():
+                    self.logger.warning(f"Media file {ref.filename} is missing from the store")
+                    continue
+                self._stored_media.add(ref.filename)
+                # Anki runs on this machine and copies the file itself
+                action = anki_action("storeMediaFile", filename=ref.filename, path=str(source.resolve()))
+                actions.append((("media", ref.filename), action))
+        return actions
+
+
+class AnkiConnectDeckWriter(DeckWriter):
+    """Sends one deck to Anki as cards arrive.
+
+    The deck and note type are set up and the deck's notes read on the
+    first card. Cards then collect into batches of ``batch_size`` notes;
+    each batch goes out as one ``multi`` request on a worker thread, at
+    most ``concurrency`` at a time, while the next batch is built. A note
+    Anki refuses is recorded in the report rather than failing the deck.
+    Anki has nothing to roll back, so batches already sent stay in Anki
+    when the deck is aborted.
+    """
+
+    def __init__(self, exporter: AnkiConnectExporter, info: DeckInfo, output_path: Path):
+        self.logger = logging.getLogger(__name__)
+        self.exporter = exporter
+        self.config = exporter.config
+        self.info = info
+        self.output_path = output_path
+        self.count = 0
+        self.added = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.failed: List[Dict[str, str]] = []
+
+        # Scrapers may fill in the title while streaming, so these wait for the first card
+        self._deck: Optional[str] = None
+        self._existing: Dict[str, Deque[ExistingNote]] = {}
+        self._removed: List[Tuple[str, str]] = []
+        self._batch: List[Tuple[ActionLabel, Dict[str, Any]]] = []
+        self._batch_notes = 0
+        self._pending: Deque[Tuple[Future, List[ActionLabel]]] = deque()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+
+    def write(self, flashcard: Flashcard) -> None:
+        if self._deck is None:
+            self._start_deck()
+        front = html_field(flashcard, FRONT)
+        back = html_field(flashcard, BACK)
+        tags = [tag.replace(" ", "_") for tag in flashcard.tags]
+        self._batch.extend(self.exporter.media_actions(flashcard))
+
+        matches = self._existing.get(front)
+        if matches:
+            note_id, current_back, current_tags = matches.popleft()
+            updates = []
+            if current_back != back:
+                fields = {"Front": front, "Back": back}
+                updates.append(anki_action("updateNoteFields", note={"id": note_id, "fields": fields}))
+            if sorted(current_tags) != sorted(tags):
+                updates.append(anki_action("updateNoteTags", note=note_id, tags=tags))
+            if not updates:
+                self.unchanged += 1
+            # The note counts as updated once, with its first action
+            for i, action in enumerate(updates):
+                self._batch.append((("tags" if i else "update", flashcard.front), action))
+        else:
+            note = {
+                "deckName": self._deck,
+                "modelName": MODEL_NAME,
+                "fields": {"Front": front, "Back": back},
+                "tags": tags,
+                # Fronts were matched against the deck above; a front the
+                # deck repeats is a note of its own
+                "options": {"allowDuplicate": True},
+            }
+            self._batch.append((("add", flashcard.front), anki_action("addNote", note=note)))
+
+        self.count += 1
+        self._batch_notes += 1
+        if self._batch_notes >= self.config.batch_size:
+            self._flush()
+
+    def remove(self, guid: str, front: str) -> None:
+        self._removed.append((guid, front))
+
+    def commit(self) -> Path:
+        try:
+            if self._deck is None:
+                self._start_deck()
+            self._flush()
+            while self._pending:
+                self._collect(*self._pending.popleft())
+            if self._removed:
+                self.removed = self.exporter.delete_notes(self._notes_to_remove())
+            file_path = self._write_report()
+        except Exception as e:
+            self.logger.error(f"Error sending deck to AnkiConnect: {str(e)}")
+            raise
+        finally:
+            self.abort()
+
+        self.logger.info(
+            f"Sent {self.count} cards to Anki deck '{self._deck}': {self.added} added, {self.updated} updated, "
+            f"{self.unchanged} unchanged, {self.removed} removed, {len(self.failed)} failed"
+        )
+        return file_path
+
+    def abort(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._pool is not None:
+            for future, _ in self._pending:
+                future.cancel()
+            # Requests already on their way cannot be called back
+            self._pool.shutdown(wait=True)
+        self._pending.clear()
+
+    def _start_deck(self) -> None:
+        self._deck = deck_name(self.info)
+        self.exporter.prepare(self._deck)
+        self._existing = self.exporter.existing_notes(self._deck)
+
+    def _notes_to_remove(self) -> List[int]:
+        found = self.exporter.find_guids([guid for guid, _ in self._removed])
+        note_ids = {note_id for ids in found.values() for note_id in ids}
+
+        # Notes AnkiConnect added got GUIDs of Anki's own, so the rest are
+        # matched by front among the deck's notes no card was written to
+        unclaimed: Dict[str, List[int]] = {}
+        for field, notes in self._existing.items():
+            unclaimed.setdefault(field_text(field), []).extend(
+                note_id for note_id, _, _ in notes if note_id not in note_ids
+            )
+        for guid, front in self._removed:
+            candidates = unclaimed.get(html.escape(front, quote=False))
+            if guid not in found and candidates:
+                note_ids.add(candidates.pop())
+        return sorted(note_ids)
+
+    def _flush(self) -> None:
+        self._batch_notes = 0
+        if not self._batch:
+            return
+        labels = [label for label, _ in self._batch]
+        actions = [action for _, action in self._batch]
+        self._batch = []
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.config.concurrency, thread_name_prefix="ankiconnect")
+        while len(self._pending) >= self.config.concurrency:
+            self._collect(*self._pending.popleft())
+        self._pending.append((self._pool.submit(self.exporter.client.multi, actions), labels))
+
+    def _collect(self, future: Future, labels: List[ActionLabel]) -> None:
+        for (kind, subject), (_, error) in zip(labels, future.result()):
+            if error is not None:
+                if kind == "media":
+                    self.logger.warning(f"Anki did not store media file {subject}: {error}")
+                else:
+                    self.failed.append({"front": subject, "error": error})
+            elif kind == "add":
+                self.added += 1
+            elif kind == "update":
+                self.updated += 1
+
+    def _write_report(self) -> Path:
+        file_path = self.output_path / f"{sanitize_filename(self.info.title)}.ankiconnect.json"
+        report = {
+            "deck": self._deck,
+            "url": self.info.url,
+            "anki": self.config.url,
+            "cards": self.count,
+            "added": self.added,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "removed": self.removed,
+            "failed": self.failed,
+        }
+        fd, name = tempfile.mkstemp(dir=self.output_path, prefix=".", suffix=".json.tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as report_file:
+                json.dump(report, report_file, indent=2)
+            os.replace(name, file_path)
+        except OSError:
+            Path(name).unlink(missing_ok=True)
+            raise
+        return file_path
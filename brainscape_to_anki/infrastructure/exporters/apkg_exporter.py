@@ -0,0 +1,313 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from brainscape_to_anki.domain.interfaces.exporter import DeckWriter, ExporterInterface
+from brainscape_to_anki.domain.models.deck import DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import BACK, FRONT
+from brainscape_to_anki.domain.models.note_identity import FIELD_SEPARATOR, NoteGuids, deck_key
+from brainscape_to_anki.infrastructure.exporters.anki_exporter import html_field, sanitize_filename
+from brainscape_to_anki.infrastructure.media.store import MediaStore
+
+# Anki 2.1 collection schema 11, the format every Anki version imports
+SCHEMA = """
+CREATE TABLE col (
+    id integer PRIMARY KEY, crt integer NOT NULL, mod integer NOT NULL, scm integer NOT NULL,
+    ver integer NOT NULL, dty integer NOT NULL, usn integer NOT NULL, ls integer NOT NULL,
+    conf text NOT NULL, models text NOT NULL, decks text NOT NULL, dconf text NOT NULL, tags text NOT NULL
+);
+CREATE TABLE notes (
+    id integer PRIMARY KEY, guid text NOT NULL, mid integer NOT NULL, mod integer NOT NULL,
+    usn integer NOT NULL, tags text NOT NULL, flds text NOT NULL, sfld integer NOT NULL,
+    csum integer NOT NULL, flags integer NOT NULL, data text NOT NULL
+);
+CREATE TABLE cards (
+    id integer PRIMARY KEY, nid integer NOT NULL, did integer NOT NULL, ord integer NOT NULL,
+    mod integer NOT NULL, usn integer NOT NULL, type integer NOT NULL, queue integer NOT NULL,
+    due integer NOT NULL, ivl integer NOT NULL, factor integer NOT NULL, reps integer NOT NULL,
+    lapses integer NOT NULL, left integer NOT NULL, odue integer NOT NULL, odid integer NOT NULL,
+    flags integer NOT NULL, data text NOT NULL
+);
+CREATE TABLE revlog (
+    id integer PRIMARY KEY, cid integer NOT NULL, usn integer NOT NULL, ease integer NOT NULL,
+    ivl integer NOT NULL, lastIvl integer NOT NULL, factor integer NOT NULL, time integer NOT NULL,
+    type integer NOT NULL
+);
+CREATE TABLE graves (usn integer NOT NULL, oid integer NOT NULL, type integer NOT NULL);
+"""
+# Built after the bulk inserts, which is faster than maintaining them per row
+INDEXES = """
+CREATE INDEX ix_notes_usn ON notes (usn);
+CREATE INDEX ix_cards_usn ON cards (usn);
+CREATE INDEX ix_revlog_usn ON revlog (usn);
+CREATE INDEX ix_cards_nid ON cards (nid);
+CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+CREATE INDEX ix_revlog_cid ON revlog (cid);
+CREATE INDEX ix_notes_csum ON notes (csum);
+"""
+
+COLLECTION_NAME = "collection.anki2"
+# Fixed, so every exported deck shares one note type in Anki
+MODEL_ID = 1_342_697_561_419
+MODEL_NAME = "Brainscape Basic"
+QUESTION_FORMAT = "{{Front}}"
+ANSWER_FORMAT = "{{FrontSide}}\n\n<hr id=answer>\n\n{{Back}}"
+# Size of the pieces the serialized collection is compressed in
+CHUNK_SIZE = 2 ** 20
+# Cards held before they are inserted with one executemany
+BATCH_SIZE = 1000
+
+CONF = {
+    "activeDecks": [1], "curDeck": 1, "newSpread": 0, "collapseTime": 1200, "timeLim": 0,
+    "estTimes": True, "dueCounts": True, "curModel": None, "nextPos": 1, "sortType": "noteFld",
+    "sortBackwards": False, "addToCur": True,
+}
+DECK_CONF = {
+    "id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True, "timer": 0,
+    "replayq": True, "dyn": False,
+    "new": {"bury": True, "delays": [1.0, 10.0], "initialFactor": 2500, "ints": [1, 4, 7], "order": 1,
+            "perDay": 20, "separate": True},
+    "lapse": {"delays": [10.0], "leechAction": 0, "leechFails": 8, "minInt": 1, "mult": 0.0},
+    "rev": {"bury": True, "ease4": 1.3, "fuzz": 0.05, "ivlFct": 1.0, "maxIvl": 36500, "minSpace": 1,
+            "perDay": 100},
+}
+CSS = (
+    ".card {\n font-family: arial;\n font-size: 20px;\n text-align: center;\n"
+    " color: black;\n background-color: white;\n}\n"
+)
+
+
+def deck_id(info: DeckInfo) -> int:
+    # Stable per deck, so importing a deck again updates it in place
+    key = deck_key(info)
+    return (1 << 30) + int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:4], "big") % (1 << 30)
+
+
+def deck_name(info: DeckInfo) -> str:
+    # "::" would nest the deck under a parent named after the title's prefix
+    return info.title.replace("::", ":") or "Brainscape"
+
+
+def field_checksum(text: str) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+class ApkgExporter(ExporterInterface):
+    """Writes a deck as a native Anki package (``.apkg``).
+
+    Media referenced by the cards is copied from the ``MediaStore`` into
+    the package, so Anki imports notes, fields, tags and media in one step
+    without any field mapping.
+    """
+
+    def __init__(self, media_store: Optional[MediaStore] = None):
+        self.logger = logging.getLogger(__name__)
+        self.media_store = media_store
+
+    def open_deck(self, info: DeckInfo, output_path: Path) -> "ApkgDeckWriter":
+        self.logger.info(f"Exporting deck '{info.title or info.url}' to {output_path}")
+        output_path.mkdir(parents=True, exist_ok=True)
+        return ApkgDeckWriter(info, output_path, self.media_store)
+
+
+class ApkgDeckWriter(DeckWriter):
+    """Builds the collection of one package as cards arrive.
+
+    Cards are inserted ``BATCH_SIZE`` at a time with one ``executemany``
+    per table, all inside a single transaction. The collection is an
+    in-memory SQLite database, which holds the cards far more compactly
+    than Python objects; ``commit`` adds the deck row, builds the indexes,
+    serializes the database and compresses it straight into a temporary
+    zip next to the destination, then renames it into place.
+    """
+
+    def __init__(self, info: DeckInfo, output_path: Path, media_store: Optional[MediaStore]):
+        self.logger = logging.getLogger(__name__)
+        self.info = info
+        self.output_path = output_path
+        self.media_store = media_store
+        self.count = 0
+
+        now = time.time()
+        self._seconds = int(now)
+        # Anki ids are millisecond timestamps; one per note and card
+        self._first_id = int(now * 1000)
+        # Scrapers may fill in the deck id while streaming, so these wait for the first card
+        self._deck_id: Optional[int] = None
+        self._guids: Optional[NoteGuids] = None
+        self._batch: List[Flashcard] = []
+        self._inserted = 0
+        self._filenames: Set[str] = set()
+        self._closed = False
+
+        self._db_path: Optional[str] = None
+        if hasattr(sqlite3.Connection, "serialize"):
+            self._connection = sqlite3.connect(":memory:")
+        else:
+            # Python < 3.11 cannot serialize an in-memory database
+            fd, self._db_path = tempfile.mkstemp(suffix=".anki2")
+            os.close(fd)
+            self._connection = sqlite3.connect(self._db_path)
+        self._connection.execute("PRAGMA journal_mode = OFF")
+        self._connection.execute("PRAGMA synchronous = OFF")
+        self._connection.executescript(SCHEMA)
+
+    def write(self, flashcard: Flashcard) -> None:
+        if self._deck_id is None:
+            self._start_deck()
+        self._batch.append(flashcard)
+        self._filenames.update(ref.filename for ref in flashcard.media if ref.filename)
+        self.count += 1
+        if len(self._batch) >= BATCH_SIZE:
+            self._flush()
+
+    def commit(self) -> Path:
+        file_path = self.output_path / f"{sanitize_filename(self.info.title)}{self.name_suffix}.apkg"
+        fd, name = tempfile.mkstemp(dir=self.output_path, prefix=".", suffix=".apkg.tmp")
+        os.close(fd)
+        tmp_path = Path(name)
+
+        try:
+            if self._deck_id is None:
+                self._start_deck()
+            self._flush()
+            self._connection.execute(
+                "INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+                (
+                    self._seconds - self._seconds % 86400, self._first_id, self._first_id,
+                    json.dumps(CONF), json.dumps(self._models(self._deck_id, self._seconds)),
+                    json.dumps(self._decks(self.info, self._deck_id, self._seconds)), json.dumps({"1": DECK_CONF}),
+                ),
+            )
+            # The one transaction every batch was inserted in
+            self._connection.commit()
+            self._connection.executescript(INDEXES)
+
+            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as package:
+                self._write_collection(package)
+                self._write_media(package)
+            os.replace(tmp_path, file_path)
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            self.logger.error(f"Error exporting deck: {str(e)}")
+            raise
+        finally:
+            self.abort()
+
+        self.logger.info(f"Successfully exported {self.count} cards to {file_path}")
+        return file_path
+
+    def abort(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._connection.close()
+        if self._db_path is not None:
+            os.unlink(self._db_path)
+
+    def _start_deck(self) -> None:
+        self._deck_id = deck_id(self.info)
+        self._guids = NoteGuids(deck_key(self.info))
+
+    def _flush(self) -> None:
+        if not self._batch:
+            return
+        first_id = self._first_id + self._inserted
+        self._connection.executemany(
+            "INSERT INTO notes VALUES (?, ?, ?, ?, -1, ?, ?, ?, ?, 0, '')",
+            self._note_rows(self._batch, first_id, self._seconds, self._guids),
+        )
+        self._connection.executemany(
+            "INSERT INTO cards VALUES (?, ?, ?, 0, ?, -1, 0, 0, ?, 0, 0, 0, 0, 0, 0, 0, 0, '')",
+            (
+                (first_id + i, first_id + i, self._deck_id, self._seconds, self._inserted + i + 1)
+                for i in range(len(self._batch))
+            ),
+        )
+        self._inserted += len(self._batch)
+        self._batch.clear()
+
+    def _write_collection(self, package: zipfile.ZipFile) -> None:
+        if self._db_path is not None:
+            self._connection.close()
+            package.write(self._db_path, COLLECTION_NAME)
+            return
+
+        data = memoryview(self._connection.serialize())
+        with package.open(COLLECTION_NAME, "w", force_zip64=len(data) > zipfile.ZIP64_LIMIT) as entry:
+            for start in range(0, len(data), CHUNK_SIZE):
+                entry.write(data[start:start + CHUNK_SIZE])
+
+    @staticmethod
+    def _note_rows(
+            flashcards: List[Flashcard], first_id: int, seconds: int, guids: NoteGuids
+    ) -> Iterator[Tuple[object, ...]]:
+        for i, flashcard in enumerate(flashcards):
+            front = html_field(flashcard, FRONT)
+            back = html_field(flashcard, BACK)
+            tags = " ".join(tag.replace(" ", "_") for tag in flashcard.tags)
+            yield (
+                first_id + i,
+                flashcard.guid or guids.assign(flashcard),
+                MODEL_ID,
+                seconds,
+                f" {tags} " if tags else "",
+                front + FIELD_SEPARATOR + back,
+                flashcard.front,
+                field_checksum(flashcard.front),
+            )
+
+    @staticmethod
+    def _models(did: int, seconds: int) -> Dict[str, object]:
+        fields = [
+            {"name": name, "ord": i, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []}
+            for i, name in enumerate(("Front", "Back"))
+        ]
+        template = {
+            "name": "Card 1", "ord": 0, "qfmt": QUESTION_FORMAT, "afmt": ANSWER_FORMAT,
+            "did": None, "bqfmt": "", "bafmt": "",
+        }
+        model = {
+            "id": MODEL_ID, "name": MODEL_NAME, "type": 0, "mod": seconds, "usn": -1, "sortf": 0,
+            "did": did, "tmpls": [template], "flds": fields, "css": CSS,
+            "latexPre": "\\documentclass[12pt]{article}\n\\special{papersize=3in,5in}\n\\usepackage{amssymb,amsmath}\n"
+                        "\\pagestyle{empty}\n\\setlength{\\parindent}{0in}\n\\begin{document}\n",
+            "latexPost": "\\end{document}", "latexsvg": False, "req": [[0, "any", [0]]], "tags": [], "vers": [],
+        }
+        return {str(MODEL_ID): model}
+
+    @staticmethod
+    def _decks(info: DeckInfo, did: int, seconds: int) -> Dict[str, object]:
+        def entry(identifier: int, name: str, description: str = "") -> Dict[str, object]:
+            return {
+                "id": identifier, "name": name, "desc": description, "mod": seconds, "usn": -1, "conf": 1,
+                "dyn": 0, "collapsed": False, "extendNew": 10, "extendRev": 50,
+                "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0], "timeToday": [0, 0],
+            }
+
+        return {"1": entry(1, "Default"), str(did): entry(did, deck_name(info), info.url)}
+
+    def _write_media(self, package: zipfile.ZipFile) -> None:
+        media_map = {}
+        if self.media_store is not None:
+            for filename in sorted(self._filenames):
+                source = self.media_store.path(filename)
+                if not source.exists():
+                    self.logger.warning(f"Media file {filename} is missing from the store")
+                    continue
+                # Packages number their media files; the map gives the real names
+                member = str(len(media_map))
+                # Images and audio are already compressed
+                package.write(source, member, compress_type=zipfile.ZIP_STORED)
+                media_map[member] = filename
+        package.writestr("media", json.dumps(media_map))
+        if media_map:
+            self.logger.info(f"Packed {len(media_map)} media files")
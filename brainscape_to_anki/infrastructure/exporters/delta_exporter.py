@@ -0,0 +1,151 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from brainscape_to_anki.domain.interfaces.exporter import DeckWriter, ExporterInterface
+from brainscape_to_anki.domain.models.deck import DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.note_identity import NoteGuids, card_checksum, deck_key
+from brainscape_to_anki.infrastructure.paths import default_cache_dir
+
+# GUID -> (checksum, front) of every card of a deck
+ManifestCards = Dict[str, Tuple[str, str]]
+# A delta goes next to the deck's full export, never over it
+DELTA_SUFFIX = ".delta"
+
+
+def removed_path(file_path: Path) -> Path:
+    """Where the notes missing from a delta export are listed."""
+    return file_path.with_name(f"{file_path.stem.removesuffix(DELTA_SUFFIX)}.removed.csv")
+
+
+class ManifestStore:
+    """What was last exported of each deck, one JSON file per deck."""
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory) if directory else default_cache_dir() / "manifests"
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]}.json"
+
+    def load(self, key: str) -> ManifestCards:
+        try:
+            with open(self.path(key), "r", encoding="utf-8") as manifest_file:
+                cards = json.load(manifest_file)["cards"]
+            return {guid: (checksum, front) for guid, (checksum, front) in cards.items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Ignoring unreadable export manifest for {key}: {str(e)}")
+            return {}
+
+    def save(self, key: str, title: str, cards: ManifestCards) -> None:
+        path = self.path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+                json.dump({"deck": key, "title": title, "cards": cards}, manifest_file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Could not save export manifest for {key}: {str(e)}")
+
+
+class DeltaExporter(ExporterInterface):
+    """Exports only what changed in a deck since its last export.
+
+    Wraps another exporter: cards that are new or whose content changed
+    are written through it with their stable GUID to ``<deck>.delta.<ext>``,
+    unchanged cards are skipped, and cards that disappeared are passed to
+    the writer's ``remove`` and listed in ``<deck>.removed.csv``. The first
+    export of a deck, with no manifest yet, writes every card.
+    """
+
+    def __init__(self, exporter: ExporterInterface, manifests: Optional[ManifestStore] = None):
+        self.exporter = exporter
+        self.manifests = manifests or ManifestStore()
+
+    def open_deck(self, info: DeckInfo, output_path: Path) -> "DeltaDeckWriter":
+        return DeltaDeckWriter(self.exporter.open_deck(info, output_path), info, self.manifests)
+
+
+class DeltaDeckWriter(DeckWriter):
+    def __init__(self, writer: DeckWriter, info: DeckInfo, manifests: ManifestStore):
+        self.logger = logging.getLogger(__name__)
+        self.writer = writer
+        self.writer.name_suffix = DELTA_SUFFIX
+        self.info = info
+        self.manifests = manifests
+        self.added = 0
+        self.changed = 0
+        self.unchanged = 0
+
+        # Scrapers may fill in the deck id while streaming, so these wait for the first card
+        self._guids: Optional[NoteGuids] = None
+        self._previous: ManifestCards = {}
+        self._current: ManifestCards = {}
+
+    def write(self, flashcard: Flashcard) -> None:
+        if self._guids is None:
+            self._start_deck()
+
+        guid = flashcard.guid or self._guids.assign(flashcard)
+        checksum = card_checksum(flashcard)
+        self._current[guid] = (checksum, flashcard.front)
+        previous = self._previous.pop(guid, None)
+        if previous is None:
+            self.added += 1
+        elif previous[0] != checksum:
+            self.changed += 1
+        else:
+            self.unchanged += 1
+            return
+        self.writer.write(replace(flashcard, guid=guid))
+
+    def commit(self) -> Path:
+        if self._guids is None:
+            self._start_deck()
+
+        # Whatever the manifest still holds was not seen this time
+        removed = self._previous
+        for guid, (_, front) in removed.items():
+            self.writer.remove(guid, front)
+        file_path = self.writer.commit()
+        self._write_removed(file_path, removed)
+        self.manifests.save(self._guids.key, self.info.title, self._current)
+
+        self.logger.info(
+            f"Delta export of '{self.info.title}': {self.added} added, {self.changed} changed, "
+            f"{len(removed)} removed, {self.unchanged} unchanged"
+        )
+        return file_path
+
+    def abort(self) -> None:
+        self.writer.abort()
+
+    def _start_deck(self) -> None:
+        key = deck_key(self.info)
+        self._guids = NoteGuids(key)
+        self._previous = self.manifests.load(key)
+
+    @staticmethod
+    def _write_removed(file_path: Path, removed: ManifestCards) -> None:
+        list_path = removed_path(file_path)
+        if not removed:
+            # A list left by an earlier run no longer applies
+            list_path.unlink(missing_ok=True)
+            return
+
+        tmp_path = list_path.with_suffix(".csv.tmp")
+        with open(tmp_path, "w", newline="", encoding="utf-8") as removed_file:
+            writer = csv.writer(removed_file, quoting=csv.QUOTE_MINIMAL)
+            writer.writerow(["GUID", "Front"])
+            for guid, (_, front) in removed.items():
+                writer.writerow([guid, front])
+        os.replace(tmp_path, list_path)
@@ -0,0 +1,374 @@
+import asyncio
+import email.utils
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from brainscape_to_anki.infrastructure.paths import default_cache_dir
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+CACHEABLE_STATUS_CODES = (200, 203)
+CHUNK_SIZE = 64 * 1024
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used as cache key: lower-case scheme and host, no
+    default port or fragment, query parameters sorted."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    if not value:
+        return directives
+    for part in value.split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers: httpx.Headers, now: float) -> Optional[float]:
+    """Absolute expiry time from ``max-age``/``Expires``, or ``None`` when the
+    response must be revalidated before every use."""
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        return None
+
+    max_age = directives.get("max-age")
+    if max_age is not None:
+        try:
+            return now + max(0, int(max_age))
+        except ValueError:
+            return None
+
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return email.utils.parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    url: str
+    status_code: int
+    headers: List[Tuple[str, str]]
+    expires_at: Optional[float]
+    size: int
+
+    @property
+    def etag(self) -> Optional[str]:
+        return httpx.Headers(self.headers).get("ETag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return httpx.Headers(self.headers).get("Last-Modified")
+
+    def is_fresh(self, now: float) -> bool:
+        return self.expires_at is not None and now < self.expires_at
+
+
+class HttpCache:
+    """Persistent response cache with an SQLite index and LRU eviction.
+
+    Bodies are stored as-is (still content-encoded) in one file per entry;
+    the index keeps headers, expiry, size and last access time so the least
+    recently used entries can be dropped once ``max_bytes`` is exceeded.
+    Every method blocks on disk; ``CachingTransport`` calls them through
+    ``asyncio.to_thread`` so the event loop keeps running.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = 256 * 1024 * 1024):
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory) if directory else default_cache_dir() / "http"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        self._bodies = self.directory / "bodies"
+        self._bodies.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.directory / "index.sqlite", check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, url TEXT NOT NULL, status_code INTEGER NOT NULL,"
+            " headers TEXT NOT NULL, expires_at REAL, size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self._db.commit()
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def body_path(self, key: str) -> Path:
+        return self._bodies / key
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        key = self.key_for(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, status_code, headers, expires_at, size FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if not self.body_path(key).exists():
+                self._delete(key)
+                return None
+            self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+
+        url, status_code, headers, expires_at, size = row
+        return CacheEntry(key, url, status_code, [tuple(h) for h in json.loads(headers)], expires_at, size)
+
+    def new_body_file(self, key: str) -> Path:
+        return self._bodies / f"{key}.{uuid.uuid4().hex}.tmp"
+
+    def store(self, url: str, status_code: int, headers: httpx.Headers, body_file: Path) -> None:
+        key = self.key_for(url)
+        size = body_file.stat().st_size
+        now = time.time()
+        os.replace(body_file, self.body_path(key))
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status_code, json.dumps(headers.multi_items()),
+                 freshness_lifetime(headers, now), size, now),
+            )
+            self._db.commit()
+            self._evict()
+
+    def refresh(self, entry: CacheEntry, not_modified_headers: httpx.Headers) -> CacheEntry:
+        """Merge the headers of a 304 response into a stored entry."""
+        headers = httpx.Headers(entry.headers)
+        for name in ("Cache-Control", "Date", "ETag", "Expires", "Last-Modified", "Vary"):
+            if name in not_modified_headers:
+                headers[name] = not_modified_headers[name]
+
+        entry.headers = headers.multi_items()
+        entry.expires_at = freshness_lifetime(headers, time.time())
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET headers = ?, expires_at = ? WHERE key = ?",
+                (json.dumps(entry.headers), entry.expires_at, entry.key),
+            )
+            self._db.commit()
+        return entry
+
+    def invalidate(self, url: str) -> None:
+        with self._lock:
+            self._delete(self.key_for(url))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _delete(self, key: str) -> None:
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            self.body_path(key).unlink(missing_ok=True)
+        except OSError as e:
+            # Windows refuses to delete a body that is still being served
+            self.logger.debug(f"Could not delete cached body {key}: {str(e)}")
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._db.execute(
+                "SELECT key, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._delete(key)
+            total -= size
+            self.logger.debug(f"Evicted cache entry {key} ({size} bytes)")
+        self._db.commit()
+
+
+def is_storable(response: httpx.Response) -> bool:
+    if response.status_code not in CACHEABLE_STATUS_CODES:
+        return False
+    if "no-store" in parse_cache_control(response.headers.get("Cache-Control")):
+        return False
+    if response.headers.get("Vary", "").strip() == "*":
+        return False
+    return True
+
+
+class _FileStream(httpx.AsyncByteStream):
+    """Serves a cached body from a file opened before the response was
+    returned, so evicting the entry meanwhile cannot break the read."""
+
+    def __init__(self, body: BinaryIO):
+        self._body = body
+
+    async def __aiter__(self):
+        while True:
+            chunk = await asyncio.to_thread(self._body.read, CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    async def aclose(self) -> None:
+        self._body.close()
+
+
+class _TeeStream(httpx.AsyncByteStream):
+    """Passes the network body through while writing it to the cache.
+
+    The entry is only committed once the body has been read to the end, so
+    a partially consumed or failed download never poisons the cache.
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream, cache: HttpCache, url: str, status_code: int,
+                 headers: httpx.Headers):
+        self._stream = stream
+        self._cache = cache
+        self._url = url
+        self._status_code = status_code
+        self._headers = headers
+        self._path = cache.new_body_file(cache.key_for(url))
+        self._file: Optional[BinaryIO] = None
+        self._complete = False
+
+    async def __aiter__(self):
+        self._file = await asyncio.to_thread(open, self._path, "wb")
+        async for chunk in self._stream:
+            await asyncio.to_thread(self._file.write, chunk)
+            yield chunk
+        self._complete = True
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            await asyncio.to_thread(self._finish)
+
+    def _finish(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        if self._complete:
+            try:
+                self._cache.store(self._url, self._status_code, self._headers, self._path)
+            except (OSError, sqlite3.Error) as e:
+                logging.getLogger(__name__).warning(f"Could not cache {self._url}: {str(e)}")
+                self._path.unlink(missing_ok=True)
+        else:
+            self._path.unlink(missing_ok=True)
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """Serves GETs from an ``HttpCache``, revalidating stale entries with
+    ``If-None-Match``/``If-Modified-Since`` and answering 304s from disk.
+
+    Index lookups and body files are handled off the event loop. An entry
+    whose body has vanished, e.g. evicted by another request, is a miss.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: HttpCache):
+        self.logger = logging.getLogger(__name__)
+        self._transport = transport
+        self.cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or "no-store" in parse_cache_control(request.headers.get("Cache-Control")):
+            return await self._transport.handle_async_request(request)
+
+        url = str(request.url)
+        entry = await asyncio.to_thread(self.cache.get, url)
+
+        if entry is not None and entry.is_fresh(time.time()):
+            response = await self._cached_response(request, entry)
+            if response is not None:
+                self.cache.hits += 1
+                self.logger.debug(f"Cache hit: {url}")
+                return response
+            entry = None
+
+        if entry is not None:
+            if entry.etag:
+                request.headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request.headers["If-Modified-Since"] = entry.last_modified
+
+        response = await self._transport.handle_async_request(request)
+
+        if entry is not None and response.status_code == 304:
+            await response.aclose()
+            entry = await asyncio.to_thread(self.cache.refresh, entry, response.headers)
+            cached = await self._cached_response(request, entry)
+            if cached is not None:
+                self.cache.revalidated += 1
+                self.logger.debug(f"Cache revalidated: {url}")
+                return cached
+            # The body went away between the lookup and the 304; fetch it for real
+            for name in ("If-None-Match", "If-Modified-Since"):
+                request.headers.pop(name, None)
+            response = await self._transport.handle_async_request(request)
+
+        self.cache.misses += 1
+        if is_storable(response):
+            response.stream = _TeeStream(
+                response.stream, self.cache, url, response.status_code, response.headers
+            )
+        elif entry is not None:
+            await asyncio.to_thread(self.cache.invalidate, url)
+        return response
+
+    async def _cached_response(self, request: httpx.Request, entry: CacheEntry) -> Optional[httpx.Response]:
+        try:
+            body = await asyncio.to_thread(open, self.cache.body_path(entry.key), "rb")
+        except OSError as e:
+            self.logger.debug(f"Cached body of {entry.url} is gone ({str(e)}), treating as a miss")
+            return None
+        return httpx.Response(
+            status_code=entry.status_code,
+            headers=entry.headers,
+            stream=_FileStream(body),
+            request=request,
+            extensions={"from_cache": True},
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
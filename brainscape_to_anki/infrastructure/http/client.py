@@ -0,0 +1,63 @@
+import importlib.util
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from brainscape_to_anki.infrastructure.http.cache import CachingTransport, HttpCache
+from brainscape_to_anki.infrastructure.http.rate_limiter import AdaptiveRateLimiter, RateLimitedTransport
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HttpClientConfig:
+    """Connection pool and timeout settings for the shared scraper client."""
+
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    connect_timeout: float = 10.0
+    read_timeout: float = 30.0
+    write_timeout: float = 10.0
+    pool_timeout: float = 10.0
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_transport(config: HttpClientConfig) -> httpx.AsyncBaseTransport:
+    http2 = config.http2
+    if http2 and not _http2_available():
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry,
+    )
+    return httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+
+
+def create_async_client(
+        config: HttpClientConfig,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        cache: Optional[HttpCache] = None,
+) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(
+        connect=config.connect_timeout,
+        read=config.read_timeout,
+        write=config.write_timeout,
+        pool=config.pool_timeout,
+    )
+    transport = create_transport(config)
+    if rate_limiter is not None:
+        transport = RateLimitedTransport(transport, rate_limiter)
+    if cache is not None:
+        # Outermost, so fresh hits never wait for a rate-limit token
+        transport = CachingTransport(transport, cache)
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
@@ -0,0 +1,330 @@
+import asyncio
+import email.utils
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from brainscape_to_anki.infrastructure.http.resilience import RetryPolicy
+
+THROTTLE_STATUS_CODES = (429, 503)
+# Request extension naming the limiter to use instead of the host's own
+RATE_LIMIT_KEY = "rate_limit_key"
+
+
+@dataclass(frozen=True)
+class RateLimitConfig:
+    """Per-host token bucket and AIMD concurrency settings.
+
+    ``requests_per_second`` is the ceiling enforced by the token bucket
+    (``None`` disables it). The concurrency limit starts at
+    ``initial_concurrency``, grows by ``additive_increase`` per round trip of
+    healthy responses and is multiplied by ``multiplicative_decrease`` on
+    429/503 responses or latency spikes. A ``Retry-After`` header on a
+    429/503 also pauses the host; on any other response it is ignored.
+    """
+
+    requests_per_second: Optional[float] = 10.0
+    burst: int = 10
+    initial_concurrency: float = 4.0
+    min_concurrency: float = 1.0
+    max_concurrency: float = 32.0
+    additive_increase: float = 1.0
+    multiplicative_decrease: float = 0.5
+    decrease_cooldown: float = 1.0
+    latency_spike_factor: float = 3.0
+    latency_smoothing: float = 0.2
+    latency_min_samples: int = 5
+    max_retry_after: float = 60.0
+    max_throttle_retries: int = 2
+
+
+class TokenBucket:
+    def __init__(
+            self,
+            rate: float,
+            capacity: int,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], "asyncio.Future"] = asyncio.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await self._sleep((1 - self._tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """Token bucket plus an AIMD concurrency window for a single host."""
+
+    def __init__(
+            self,
+            host: str,
+            config: RateLimitConfig,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], "asyncio.Future"] = asyncio.sleep,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.host = host
+        self.config = config
+        self._clock = clock
+        self._sleep = sleep
+
+        self.concurrency = config.initial_concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.latency_samples = 0
+        self.throttle_events = 0
+        self.requests = 0
+
+        self._last_decrease = -math.inf
+        self._condition: Optional[asyncio.Condition] = None
+        self._bucket = (
+            TokenBucket(config.requests_per_second, config.burst, clock, sleep)
+            if config.requests_per_second else None
+        )
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self.concurrency))
+
+    async def acquire(self) -> None:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+        try:
+            pause = self.paused_until - self._clock()
+            if pause > 0:
+                await self._sleep(pause)
+            if self._bucket is not None:
+                await self._bucket.acquire()
+        except BaseException:
+            await self.release()
+            raise
+
+        self.requests += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record(
+            self,
+            status_code: Optional[int],
+            latency: float,
+            retry_after: Optional[float] = None,
+    ) -> None:
+        """Feed the outcome of one request back into the AIMD controller.
+
+        ``status_code`` is ``None`` when the request failed at transport level
+        (timeouts, resets), which is treated as a congestion signal too.
+        ``retry_after`` only counts on throttling responses (429/503); a 200
+        or a redirect may carry the header without asking us to slow down.
+        """
+        throttled = status_code is None or status_code in THROTTLE_STATUS_CODES
+        if throttled and retry_after is not None:
+            retry_after = min(retry_after, self.config.max_retry_after)
+            self.paused_until = max(self.paused_until, self._clock() + retry_after)
+
+        if throttled:
+            self.throttle_events += 1
+            self._decrease(f"status {status_code}")
+            return
+
+        spike = self._is_latency_spike(latency)
+        self._update_latency(latency)
+        if spike:
+            self._decrease(f"latency spike ({latency:.2f}s)")
+        else:
+            self.concurrency = min(
+                self.config.max_concurrency,
+                self.concurrency + self.config.additive_increase / self.concurrency,
+            )
+
+    def _is_latency_spike(self, latency: float) -> bool:
+        if self.latency_ewma is None or self.latency_samples < self.config.latency_min_samples:
+            return False
+        return latency > self.latency_ewma * self.config.latency_spike_factor
+
+    def _update_latency(self, latency: float) -> None:
+        alpha = self.config.latency_smoothing
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = (1 - alpha) * self.latency_ewma + alpha * latency
+        self.latency_samples += 1
+
+    def _decrease(self, reason: str) -> None:
+        now = self._clock()
+        # Requests already in flight when we backed off report the same
+        # congestion; only react once per cool-down window
+        if now - self._last_decrease < self.config.decrease_cooldown:
+            return
+
+        self._last_decrease = now
+        self.concurrency = max(
+            self.config.min_concurrency,
+            self.concurrency * self.config.multiplicative_decrease,
+        )
+        self.logger.warning(
+            f"Backing off {self.host} ({reason}): concurrency limit now {self.limit}"
+        )
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "concurrency_limit": self.limit,
+            "concurrency": round(self.concurrency, 2),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "throttle_events": self.throttle_events,
+            "latency_ewma": self.latency_ewma,
+            "paused_for": max(0.0, self.paused_until - self._clock()),
+        }
+
+
+class AdaptiveRateLimiter:
+    def __init__(
+            self,
+            config: Optional[RateLimitConfig] = None,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], "asyncio.Future"] = asyncio.sleep,
+    ):
+        self.config = config or RateLimitConfig()
+        self._clock = clock
+        self._sleep = sleep
+        self._hosts: Dict[str, HostRateLimiter] = {}
+
+    def for_host(self, host: str) -> HostRateLimiter:
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = HostRateLimiter(host, self.config, self._clock, self._sleep)
+            self._hosts[host] = limiter
+        return limiter
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        return {host: limiter.snapshot() for host, limiter in self._hosts.items()}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Holds the host slot until the response body has been consumed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, limiter: HostRateLimiter):
+        self._stream = stream
+        self._limiter = limiter
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                await self._limiter.release()
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that routes every request through the host's limiter.
+
+    Throttled GET requests (429/503) are retried after the advertised
+    ``Retry-After`` delay, or after a jittered ``retry_policy`` backoff when
+    the response does not advertise one, up to ``max_throttle_retries`` times.
+    """
+
+    def __init__(
+            self,
+            transport: httpx.AsyncBaseTransport,
+            rate_limiter: AdaptiveRateLimiter,
+            clock: Callable[[], float] = time.monotonic,
+            retry_policy: Optional[RetryPolicy] = None,
+            sleep: Callable[[float], "asyncio.Future"] = asyncio.sleep,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self._transport = transport
+        self.rate_limiter = rate_limiter
+        self._clock = clock
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._sleep = sleep
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = self.rate_limiter.for_host(request.extensions.get(RATE_LIMIT_KEY) or request.url.host)
+        retries = self.rate_limiter.config.max_throttle_retries if request.method == "GET" else 0
+
+        for attempt in range(retries + 1):
+            await limiter.acquire()
+            started = self._clock()
+            try:
+                response = await self._transport.handle_async_request(request)
+            except BaseException as e:
+                # Cancelled requests (e.g. losing speculative fetches) free
+                # their slot without counting as a congestion signal
+                if isinstance(e, httpx.TransportError):
+                    limiter.record(None, self._clock() - started)
+                await limiter.release()
+                raise
+
+            throttled = response.status_code in THROTTLE_STATUS_CODES
+            retry_after = parse_retry_after(response.headers.get("Retry-After")) if throttled else None
+            limiter.record(response.status_code, self._clock() - started, retry_after)
+
+            if throttled and attempt < retries:
+                self.logger.info(
+                    f"Throttled by {request.url.host} ({response.status_code}), "
+                    f"retrying ({attempt + 1}/{retries})"
+                )
+                await response.aclose()
+                await limiter.release()
+                # Retry-After already paused the host; without it, back off
+                # instead of retrying as soon as a token is free
+                if retry_after is None:
+                    await self._sleep(self.retry_policy.backoff(attempt))
+                continue
+
+            response.stream = _ReleasingStream(response.stream, limiter)
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
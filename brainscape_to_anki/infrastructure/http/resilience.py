@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def is_transient_error(error: BaseException) -> bool:
+    if isinstance(error, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+async def retry_async(
+        operation: Callable[[], Awaitable[T]],
+        policy: RetryPolicy,
+        is_retryable: Callable[[BaseException], bool] = is_transient_error,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+) -> T:
+    attempt = 0
+    while True:
+        try:
+            return await operation()
+        except Exception as e:
+            attempt += 1
+            if attempt >= policy.max_attempts or not is_retryable(e):
+                raise
+            delay = policy.backoff(attempt - 1)
+            logger.info(f"Transient failure ({str(e)}), retry {attempt} in {delay:.2f}s")
+            await sleep(delay)
+
+
+@dataclass(frozen=True)
+class CircuitBreakerConfig:
+    failure_threshold: int = 5
+    reset_timeout: float = 60.0
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for a single endpoint.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    ``allow_request`` returns ``False`` for ``reset_timeout`` seconds. The next
+    caller is then let through as a half-open probe: success closes the
+    circuit, failure re-opens it for another cool-down.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+            self,
+            name: str,
+            config: Optional[CircuitBreakerConfig] = None,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.config = config or CircuitBreakerConfig()
+        self._clock = clock
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_started: Optional[float] = None
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if self._clock() - self.opened_at < self.config.reset_timeout:
+                self.rejected += 1
+                return False
+            self.logger.info(f"Circuit '{self.name}' half-open, probing endpoint")
+            self.state = self.HALF_OPEN
+            self._probe_started = None
+
+        # Half-open: only one probe at a time. A probe that never reported
+        # back (e.g. it was cancelled) is abandoned after another cool-down
+        now = self._clock()
+        if self._probe_started is not None and now - self._probe_started < self.config.reset_timeout:
+            self.rejected += 1
+            return False
+        self._probe_started = now
+        return True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            self.logger.info(f"Circuit '{self.name}' closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_started = None
+
+        if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED
+                and self.consecutive_failures >= self.config.failure_threshold
+        ):
+            self.state = self.OPEN
+            self.opened_at = self._clock()
+            self.times_opened += 1
+            self.logger.warning(
+                f"Circuit '{self.name}' opened after {self.consecutive_failures} "
+                f"consecutive failures, skipping for {self.config.reset_timeout:.0f}s"
+            )
+
+    def snapshot(self) -> Dict[str, object]:
+        retry_in = 0.0
+        if self.state == self.OPEN:
+            retry_in = max(0.0, self.config.reset_timeout - (self._clock() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in": retry_in,
+        }
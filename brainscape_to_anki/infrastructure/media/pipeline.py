@@ -0,0 +1,247 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
+import mimetypes
+from collections import deque
+from dataclasses import dataclass, replace
+from pathlib import PurePosixPath
+from typing import AsyncIterable, AsyncIterator, Deque, Dict, Optional, Tuple, Union
+from urllib.parse import unquote_to_bytes, urljoin, urlsplit
+
+import httpx
+
+from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.infrastructure.http.rate_limiter import RATE_LIMIT_KEY
+from brainscape_to_anki.infrastructure.http.resilience import RetryPolicy, retry_async
+from brainscape_to_anki.infrastructure.media.store import MediaStore
+
+# Extensions Anki plays or shows; anything else is named from Content-Type
+MEDIA_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".bmp", ".tif", ".tiff", ".ico",
+    ".mp3", ".ogg", ".oga", ".wav", ".m4a", ".aac", ".flac", ".opus",
+    ".mp4", ".webm", ".ogv", ".mov",
+})
+# The store is the cache for media; keep the bodies out of the HTTP cache
+NO_STORE = {"Cache-Control": "no-store"}
+
+
+class MediaTooLargeError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class MediaConfig:
+    """Media download limits.
+
+    ``concurrency`` bounds the downloads in flight across every deck being
+    processed; files larger than ``max_bytes`` are skipped.
+    """
+
+    concurrency: int = 8
+    max_bytes: int = 100 * 2 ** 20
+
+
+def media_extension(url: str, content_type: Optional[str]) -> str:
+    suffix = PurePosixPath(urlsplit(url).path).suffix.lower()
+    if suffix in MEDIA_EXTENSIONS:
+        return suffix
+    if content_type:
+        guessed = mimetypes.guess_extension(content_type.split(";")[0].strip().lower())
+        if guessed:
+            return guessed
+    return ""
+
+
+def decode_data_uri(url: str) -> Optional[Tuple[bytes, str]]:
+    """``(bytes, extension)`` of a ``data:`` address, or ``None`` if malformed."""
+    header, comma, payload = url[len("data:"):].partition(",")
+    if not comma:
+        return None
+    mime_type, *parameters = header.split(";")
+    try:
+        if "base64" in parameters:
+            data = base64.b64decode(payload, validate=False)
+        else:
+            data = unquote_to_bytes(payload)
+    except (binascii.Error, ValueError):
+        return None
+    return data, media_extension("", mime_type or "text/plain")
+
+
+class MediaPipeline:
+    """Downloads the media cards refer to into a ``MediaStore``.
+
+    Downloads run concurrently over the caller's HTTP client, at most
+    ``MediaConfig.concurrency`` at a time. Each address is fetched once:
+    later decks find it in the store's index, and concurrent requests for
+    it share one download. Bodies are hashed while they stream to disk, so
+    identical content behind different addresses is stored once. The
+    store's disk work runs on worker threads, so the event loop never waits
+    on it.
+    """
+
+    def __init__(
+            self,
+            store: MediaStore,
+            config: Optional[MediaConfig] = None,
+            retry_policy: Optional[RetryPolicy] = None,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.store = store
+        self.config = config or MediaConfig()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.downloaded = 0
+        self.downloaded_bytes = 0
+        self.reused = 0
+        self.failed = 0
+
+        # Created on first use, inside the event loop that downloads
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+
+    async def fetch_deck(self, client: httpx.AsyncClient, deck: Deck, base_url: str) -> Deck:
+        """Return ``deck`` with the store's file name set on every media reference it could get."""
+        sources = {ref.url for flashcard in deck.flashcards for ref in flashcard.media}
+        if not sources:
+            return deck
+
+        page_url = self._page_url(deck.url, base_url)
+        resolved = {source: self._resolve(page_url, source) for source in sources}
+        urls = sorted(set(resolved.values()))
+        self.logger.info(f"Fetching {len(urls)} media files for deck '{deck.title}'")
+
+        filenames = dict(zip(urls, await asyncio.gather(*(self.fetch(client, url) for url in urls))))
+        await asyncio.to_thread(self.store.save)
+
+        flashcards = [
+            replace(flashcard, media=tuple(
+                replace(ref, filename=filenames[resolved[ref.url]]) for ref in flashcard.media
+            )) if flashcard.media else flashcard
+            for flashcard in deck.flashcards
+        ]
+        missing = sum(filename is None for filename in filenames.values())
+        if missing:
+            self.logger.warning(f"{missing} of {len(urls)} media files of deck '{deck.title}' are unavailable")
+        return replace(deck, flashcards=flashcards)
+
+    async def fetch_stream(
+            self, client: httpx.AsyncClient, flashcards: AsyncIterable[Flashcard], url: str, base_url: str
+    ) -> AsyncIterator[Flashcard]:
+        """Yield ``flashcards`` in order, with the media of each fetched.
+
+        Downloads start as cards arrive and run ahead of the consumer, but
+        at most ``MediaConfig.concurrency`` cards wait for their media at a
+        time, so a stream of any length is held in bounded memory.
+        """
+        page_url = self._page_url(url, base_url)
+        pending: Deque[Union[Flashcard, "asyncio.Future[Flashcard]"]] = deque()
+        try:
+            async for flashcard in flashcards:
+                if flashcard.media:
+                    pending.append(asyncio.ensure_future(self._fetch_card(client, flashcard, page_url)))
+                else:
+                    pending.append(flashcard)
+                while len(pending) > self.config.concurrency or (pending and isinstance(pending[0], Flashcard)):
+                    item = pending.popleft()
+                    yield item if isinstance(item, Flashcard) else await item
+            while pending:
+                item = pending.popleft()
+                yield item if isinstance(item, Flashcard) else await item
+        finally:
+            for item in pending:
+                if not isinstance(item, Flashcard):
+                    item.cancel()
+            await asyncio.to_thread(self.store.save)
+
+    async def fetch(self, client: httpx.AsyncClient, url: str) -> Optional[str]:
+        """Store file name for ``url``, downloading it unless it is already stored."""
+        if not url.startswith("data:"):
+            filename = await asyncio.to_thread(self.store.lookup, url)
+            if filename is not None:
+                self.reused += 1
+                return filename
+
+        task = self._in_flight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._download(client, url))
+            self._in_flight[url] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(url, None))
+        # A cancelled caller must not cancel the download other decks wait for
+        return await asyncio.shield(task)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "downloaded": self.downloaded,
+            "downloaded_bytes": self.downloaded_bytes,
+            "reused": self.reused,
+            "failed": self.failed,
+            "in_flight": len(self._in_flight),
+            "store": self.store.stats(),
+        }
+
+    async def _fetch_card(self, client: httpx.AsyncClient, flashcard: Flashcard, page_url: str) -> Flashcard:
+        filenames = await asyncio.gather(
+            *(self.fetch(client, self._resolve(page_url, ref.url)) for ref in flashcard.media)
+        )
+        return replace(flashcard, media=tuple(
+            replace(ref, filename=filename) for ref, filename in zip(flashcard.media, filenames)
+        ))
+
+    @staticmethod
+    def _page_url(url: str, base_url: str) -> str:
+        return url if urlsplit(url).scheme in ("http", "https") else base_url
+
+    @staticmethod
+    def _resolve(page_url: str, source: str) -> str:
+        if source.startswith("data:"):
+            return source
+        return urljoin(page_url, source)
+
+    async def _download(self, client: httpx.AsyncClient, url: str) -> Optional[str]:
+        if url.startswith("data:"):
+            decoded = decode_data_uri(url)
+            if decoded is None:
+                self.failed += 1
+                return None
+            return await asyncio.to_thread(self.store.put, *decoded)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.config.concurrency)
+        try:
+            async with self._semaphore:
+                return await retry_async(lambda: self._stream_to_store(client, url), self.retry_policy)
+        except (httpx.HTTPError, asyncio.TimeoutError, MediaTooLargeError, OSError) as e:
+            self.failed += 1
+            self.logger.warning(f"Could not download media {url}: {str(e)}")
+            return None
+
+    async def _stream_to_store(self, client: httpx.AsyncClient, url: str) -> str:
+        temp_path = await asyncio.to_thread(self.store.new_temp_file)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            # Paced apart from pages: a streamed page holds its host's slot
+            # until it is read, which waits for the media of its cards
+            extensions = {RATE_LIMIT_KEY: f"{urlsplit(url).hostname} media"}
+            async with client.stream("GET", url, headers=NO_STORE, extensions=extensions) as response:
+                response.raise_for_status()
+                media_file = await asyncio.to_thread(open, temp_path, "wb")
+                try:
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > self.config.max_bytes:
+                            raise MediaTooLargeError(f"larger than {self.config.max_bytes} bytes")
+                        digest.update(chunk)
+                        await asyncio.to_thread(media_file.write, chunk)
+                finally:
+                    await asyncio.to_thread(media_file.close)
+                extension = media_extension(url, response.headers.get("Content-Type"))
+
+            self.downloaded += 1
+            self.downloaded_bytes += size
+            return await asyncio.to_thread(self.store.commit, temp_path, digest.hexdigest(), extension, url)
+        finally:
+            await asyncio.to_thread(temp_path.unlink, missing_ok=True)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+from brainscape_to_anki.infrastructure.paths import default_cache_dir
+
+
+class MediaStore:
+    """Card media named after a hash of their content.
+
+    ``files`` holds one flat file per distinct content, named
+    ``<sha256><extension>``, so identical images from any number of decks
+    or addresses are kept once and the folder can be copied into Anki's
+    ``collection.media`` as is. ``index.json`` maps the addresses already
+    downloaded to their file, so an address is only fetched once. Every
+    method touches the disk and is safe to call from several threads at
+    once; async callers run them with ``asyncio.to_thread``.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory) if directory else default_cache_dir() / "media"
+        self.files_dir = self.directory / "files"
+        self.index_path = self.directory / "index.json"
+        self.files_written = 0
+        self.duplicates = 0
+
+        self._incoming = self.directory / "incoming"
+        self._lock = threading.Lock()
+        self._urls: Optional[Dict[str, str]] = None
+        self._digests: Dict[str, str] = {}
+        self._dirty = False
+
+    def path(self, filename: str) -> Path:
+        return self.files_dir / filename
+
+    def lookup(self, url: str) -> Optional[str]:
+        """File already stored for ``url``, if it is still there."""
+        with self._lock:
+            self._load()
+            filename = self._urls.get(url)
+        if filename is not None and self.path(filename).exists():
+            return filename
+        return None
+
+    def new_temp_file(self) -> Path:
+        # Same file system as the store, so committing is a rename
+        self._incoming.mkdir(parents=True, exist_ok=True)
+        return self._incoming / f"{uuid.uuid4().hex}.tmp"
+
+    def commit(self, temp_path: Path, digest: str, extension: str, url: Optional[str] = None) -> str:
+        """Move a downloaded file into the store, or drop it if its content is already there."""
+        with self._lock:
+            self._load()
+            filename = self._digests.get(digest)
+            if filename is not None and self.path(filename).exists():
+                temp_path.unlink(missing_ok=True)
+                self.duplicates += 1
+            else:
+                filename = f"{digest}{extension}"
+                self.files_dir.mkdir(parents=True, exist_ok=True)
+                os.replace(temp_path, self.path(filename))
+                self._digests[digest] = filename
+                self.files_written += 1
+
+            if url is not None and self._urls.get(url) != filename:
+                self._urls[url] = filename
+                self._dirty = True
+        return filename
+
+    def put(self, data: bytes, extension: str, url: Optional[str] = None) -> str:
+        temp_path = self.new_temp_file()
+        temp_path.write_bytes(data)
+        return self.commit(temp_path, hashlib.sha256(data).hexdigest(), extension, url)
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.index_path.with_suffix(".json.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as index_file:
+                    json.dump(self._urls, index_file, indent=0, sort_keys=True)
+                os.replace(tmp_path, self.index_path)
+                self._dirty = False
+            except OSError as e:
+                self.logger.warning(f"Could not save media index: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._load()
+            return {
+                "files": len(self._digests),
+                "urls": len(self._urls),
+                "files_written": self.files_written,
+                "duplicates": self.duplicates,
+            }
+
+    def _load(self) -> None:
+        if self._urls is not None:
+            return
+
+        self._urls = {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as index_file:
+                urls = json.load(index_file)
+            if isinstance(urls, dict):
+                self._urls = {url: name for url, name in urls.items() if isinstance(name, str)}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable media index: {str(e)}")
+
+        # File names start with the content hash, so the folder is its own index
+        if self.files_dir.is_dir():
+            for entry in os.scandir(self.files_dir):
+                if entry.is_file():
+                    self._digests.setdefault(entry.name.partition(".")[0], entry.name)
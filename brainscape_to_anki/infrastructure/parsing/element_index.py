@@ -0,0 +1,135 @@
+from bisect import bisect_left
+from typing import Dict, FrozenSet, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from bs4 import Tag
+
+
+def class_tokens(tag: Tag) -> Tuple[str, ...]:
+    value = tag.get("class")
+    if not value:
+        return ()
+    return tuple(value.split() if isinstance(value, str) else value)
+
+
+class ElementIndex:
+    """Every tag of a tree in document order, looked up by class or name.
+
+    Built in one walk over the tree. A tag's descendants take up the
+    positions right after its own, so searching inside an element is a
+    binary search over the positions of the tags with a class (or name)
+    instead of a walk of its subtree. ``find`` and ``find_all`` return the
+    elements BeautifulSoup's methods of the same name would, in the same
+    order: ``name`` may be one name or several, a ``class_`` with several
+    classes must equal the whole class attribute, and ``string`` must
+    equal the tag's ``.string``.
+
+    The index is a snapshot: elements removed from the tree later are
+    still returned, so only remove elements nothing will look up again.
+    """
+
+    def __init__(self, root: Tag):
+        self.tags: List[Tag] = []
+        self._classes: List[Tuple[str, ...]] = []
+        self._ends: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._by_class: Dict[str, List[int]] = {}
+        self._by_name: Dict[str, List[int]] = {}
+
+        open_positions: List[int] = []
+        for tag in self._walk(root):
+            position = len(self.tags)
+            while open_positions and self.tags[open_positions[-1]] is not tag.parent:
+                self._ends[open_positions.pop()] = position
+            open_positions.append(position)
+
+            classes = class_tokens(tag)
+            self.tags.append(tag)
+            self._classes.append(classes)
+            self._ends.append(position + 1)
+            self._positions[id(tag)] = position
+            self._by_name.setdefault(tag.name, []).append(position)
+            for token in set(classes):
+                self._by_class.setdefault(token, []).append(position)
+
+        for position in open_positions:
+            self._ends[position] = len(self.tags)
+
+    @staticmethod
+    def _walk(root: Tag) -> Iterator[Tag]:
+        yield root
+        for element in root.descendants:
+            if isinstance(element, Tag):
+                yield element
+
+    def find(
+            self,
+            scope: Tag,
+            name: Union[str, Sequence[str], None] = None,
+            class_: Optional[str] = None,
+            string: Optional[str] = None,
+            attrs: Optional[Mapping[str, str]] = None,
+    ) -> Optional[Tag]:
+        return next(self._matches(scope, name, class_, string, attrs), None)
+
+    def find_all(
+            self,
+            scope: Tag,
+            name: Union[str, Sequence[str], None] = None,
+            class_: Optional[str] = None,
+            string: Optional[str] = None,
+            attrs: Optional[Mapping[str, str]] = None,
+    ) -> List[Tag]:
+        return list(self._matches(scope, name, class_, string, attrs))
+
+    def classes(self, scope: Tag) -> FrozenSet[str]:
+        """Classes used by ``scope`` or anything inside it."""
+        start = self._positions[id(scope)]
+        found = set()
+        for classes in self._classes[start:self._ends[start]]:
+            found.update(classes)
+        return frozenset(found)
+
+    def _matches(
+            self,
+            scope: Tag,
+            name: Union[str, Sequence[str], None],
+            class_: Optional[str],
+            string: Optional[str],
+            attrs: Optional[Mapping[str, str]],
+    ) -> Iterator[Tag]:
+        start = self._positions[id(scope)]
+        end = self._ends[start]
+
+        names = (name,) if isinstance(name, str) else name
+        tokens = class_.split() if class_ else ()
+        if tokens:
+            candidates = self._by_class.get(tokens[0], ())
+        elif names is not None and len(names) == 1:
+            candidates = self._by_name.get(names[0], ())
+        elif names is not None:
+            candidates = sorted(
+                position
+                for tag_name in names
+                for position in self._within(self._by_name.get(tag_name, ()), start, end)
+            )
+        else:
+            candidates = range(start + 1, end)
+
+        for i in range(bisect_left(candidates, start + 1), len(candidates)):
+            position = candidates[i]
+            if position >= end:
+                return
+            tag = self.tags[position]
+            if names is not None and tag.name not in names:
+                continue
+            if len(tokens) > 1 and " ".join(self._classes[position]) != class_:
+                continue
+            if string is not None and tag.string != string:
+                continue
+            if attrs and any(tag.get(key) != value for key, value in attrs.items()):
+                continue
+            yield tag
+
+    @staticmethod
+    def _within(positions: Sequence[int], start: int, end: int) -> Sequence[int]:
+        return positions[bisect_left(positions, start + 1):bisect_left(positions, end)]
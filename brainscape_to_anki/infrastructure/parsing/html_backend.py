@@ -0,0 +1,221 @@
+import importlib.util
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence
+
+from bs4 import BeautifulSoup, Comment
+from bs4.builder import HTMLTreeBuilder
+
+from brainscape_to_anki.infrastructure.parsing.targets import ElementTarget, css_selector, target_filter
+
+logger = logging.getLogger(__name__)
+
+# Ordered by devtools/parser_parity's totals in partial mode, which the
+# scraper and HTML import use by default. Over its fixtures (repeat 5):
+# selectolax 243-278ms, lxml 303-341ms, html.parser 496ms. selectolax only
+# copies the targets into BeautifulSoup, so it wins on pages heavy with
+# chrome (34ms vs 138ms) and is level with lxml on bare pages. Full parses
+# are a toss-up between the two (460-550ms each). html.parser ships with
+# Python and is always available
+BACKEND_PREFERENCE = ("selectolax", "lxml", "html.parser")
+
+
+class HtmlParserBackend(ABC):
+    """Turns markup into a BeautifulSoup tree.
+
+    Every backend produces the same tree API, so extraction code is written
+    once; backends only differ in which tokenizer builds the tree. The C
+    tokenizers only pay off on whole pages: for small fragments their setup
+    cost outweighs the gain and ``html.parser`` is faster.
+    """
+
+    name: str = ""
+
+    @classmethod
+    @abstractmethod
+    def is_available(cls) -> bool:
+        pass
+
+    @abstractmethod
+    def parse(self, markup: str) -> BeautifulSoup:
+        pass
+
+    @abstractmethod
+    def parse_targets(self, markup: str, targets: Sequence[ElementTarget]) -> BeautifulSoup:
+        """Build only the outermost elements matching ``targets``, with their
+        subtrees, under an otherwise empty document."""
+        pass
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class HtmlParserLibBackend(HtmlParserBackend):
+    name = "html.parser"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    def parse(self, markup: str) -> BeautifulSoup:
+        return BeautifulSoup(markup, "html.parser")
+
+    def parse_targets(self, markup: str, targets: Sequence[ElementTarget]) -> BeautifulSoup:
+        return BeautifulSoup(markup, "html.parser", parse_only=target_filter(targets))
+
+
+class LxmlBackend(HtmlParserBackend):
+    name = "lxml"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return importlib.util.find_spec("lxml") is not None
+
+    def parse(self, markup: str) -> BeautifulSoup:
+        return BeautifulSoup(markup, "lxml")
+
+    def parse_targets(self, markup: str, targets: Sequence[ElementTarget]) -> BeautifulSoup:
+        return BeautifulSoup(markup, "lxml", parse_only=target_filter(targets))
+
+
+class _LexborTreeBuilder(HTMLTreeBuilder):
+    """Tree builder that lets lexbor (via selectolax) do the HTML parsing
+    and replays the resulting DOM into BeautifulSoup."""
+
+    NAME = "selectolax"
+    features = [NAME, "lexbor", "html", "fast"]
+
+    def __init__(self, targets: Sequence[ElementTarget] = (), **kwargs):
+        super().__init__(**kwargs)
+        self.targets = tuple(targets)
+
+    def prepare_markup(self, markup, user_specified_encoding=None,
+                       document_declared_encoding=None, exclude_encodings=None):
+        if isinstance(markup, bytes):
+            markup = markup.decode(user_specified_encoding or "utf-8", "replace")
+        yield markup, None, None, False
+
+    def feed(self, markup: str) -> None:
+        from selectolax.lexbor import LexborHTMLParser
+
+        root = LexborHTMLParser(markup).root
+        if root is None:
+            return
+
+        if not self.targets:
+            self._replay(root)
+            return
+
+        # lexbor finds the targets in document order; nested matches are
+        # already part of an enclosing target's subtree
+        kept = set()
+        for node in root.css(css_selector(self.targets)):
+            ancestor = node.parent
+            while ancestor is not None and ancestor.mem_id not in kept:
+                ancestor = ancestor.parent
+            if ancestor is None:
+                kept.add(node.mem_id)
+                self._replay(node)
+
+    def _replay(self, root) -> None:
+        # Node wrappers are recreated on every access, so track depth rather
+        # than comparing against the root node
+        soup = self.soup
+        node = root
+        depth = 0
+        while True:
+            tag = node.tag
+            if tag == "-text":
+                soup.handle_data(node.text_content or "")
+            elif tag == "-comment":
+                soup.endData()
+                soup.handle_data(node.comment_content or "")
+                soup.endData(Comment)
+            elif not tag.startswith("-"):
+                attrs = {key: "" if value is None else value for key, value in node.attributes.items()}
+                soup.handle_starttag(tag, None, None, attrs)
+                child = node.child
+                if child is not None:
+                    node = child
+                    depth += 1
+                    continue
+                soup.handle_endtag(tag)
+
+            # Climb until there is a next sibling, closing elements on the way
+            sibling = node.next
+            while sibling is None and depth > 0:
+                node = node.parent
+                depth -= 1
+                soup.handle_endtag(node.tag)
+                sibling = node.next
+            if depth == 0:
+                break
+            node = sibling
+
+    def close(self) -> None:
+        pass
+
+
+class SelectolaxBackend(HtmlParserBackend):
+    name = "selectolax"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return importlib.util.find_spec("selectolax") is not None
+
+    def parse(self, markup: str) -> BeautifulSoup:
+        return BeautifulSoup(markup, builder=_LexborTreeBuilder)
+
+    def parse_targets(self, markup: str, targets: Sequence[ElementTarget]) -> BeautifulSoup:
+        # lexbor still parses the whole page, but only the targets are
+        # copied into BeautifulSoup, which is where the time goes
+        return BeautifulSoup(markup, builder=_LexborTreeBuilder(targets))
+
+
+BACKENDS = {
+    backend.name: backend for backend in (SelectolaxBackend, LxmlBackend, HtmlParserLibBackend)
+}
+
+_instances: Dict[str, HtmlParserBackend] = {}
+
+
+def available_backends() -> List[str]:
+    return [name for name in BACKEND_PREFERENCE if BACKENDS[name].is_available()]
+
+
+def get_backend(name: Optional[str] = None) -> HtmlParserBackend:
+    """Return the named backend, or the fastest installed one.
+
+    Asking for a backend whose package is not installed logs a warning and
+    falls back to the default rather than failing.
+    """
+    if name is not None and name not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend '{name}', expected one of {sorted(BACKENDS)}")
+
+    if name is not None and not BACKENDS[name].is_available():
+        logger.warning(f"HTML parser backend '{name}' is not installed, using the default")
+        name = None
+
+    if name is None:
+        name = available_backends()[0]
+
+    backend = _instances.get(name)
+    if backend is None:
+        backend = BACKENDS[name]()
+        _instances[name] = backend
+    return backend
+
+
+def parse_targeted(backend: HtmlParserBackend, markup: str, targets: Sequence[ElementTarget]) -> BeautifulSoup:
+    """Parse only the ``targets`` of ``markup``, or the whole page if none are found.
+
+    Pages are mostly navigation, scripts and styles the extractors never
+    look at; a full tree is only worth building when the targeted parse
+    comes back empty.
+    """
+    soup = backend.parse_targets(markup, targets)
+    if soup.find(True) is not None:
+        return soup
+
+    logger.info("Targeted parse found nothing, parsing the full page")
+    return backend.parse(markup)
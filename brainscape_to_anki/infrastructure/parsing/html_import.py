@@ -0,0 +1,340 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import BACK
+from brainscape_to_anki.infrastructure.parsing.element_index import ElementIndex
+from brainscape_to_anki.infrastructure.parsing.html_backend import HtmlParserBackend, get_backend, parse_targeted
+from brainscape_to_anki.infrastructure.parsing.media_refs import card_media, media_in
+from brainscape_to_anki.infrastructure.parsing.process_pool import (
+    CardTuple,
+    ParsePool,
+    decode_page,
+    to_card_tuples,
+    to_flashcards,
+)
+from brainscape_to_anki.infrastructure.parsing.sharding import plan_shards
+from brainscape_to_anki.infrastructure.parsing.strategy_registry import ExtractionStrategy, StrategyRegistry
+from brainscape_to_anki.infrastructure.parsing.targets import DECK_PAGE_TARGETS
+from brainscape_to_anki.infrastructure.parsing.text_cleaner import BRAINSCAPE_UI_RULES, TextCleaner
+
+# Pages at least this large are split at row boundaries and parsed by
+# several pool workers at once
+DEFAULT_SHARD_THRESHOLD = 2 * 2 ** 20
+# More shards than workers, so a slow shard does not leave cores idle
+SHARDS_PER_WORKER = 4
+MIN_ROWS_PER_SHARD = 100
+
+# Text of the h1.deck-title, first h1, title and og:title elements, in
+# order of precedence; None where the element is missing
+TitleCandidates = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+class DirectHtmlProcessor:
+    """Utility class to directly process HTML content from Brainscape pages."""
+
+    def __init__(
+            self,
+            html_backend: Optional[HtmlParserBackend] = None,
+            partial_parse: bool = True,
+            parse_pool: Optional[ParsePool] = None,
+            shard_threshold: Optional[int] = DEFAULT_SHARD_THRESHOLD,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.html_backend = html_backend or get_backend()
+        self.partial_parse = partial_parse
+        self.parse_pool = parse_pool
+        self.shard_threshold = shard_threshold
+        self.text_cleaner = TextCleaner(BRAINSCAPE_UI_RULES)
+        self.strategy_registry = StrategyRegistry(self._extraction_strategies())
+
+    def extract_flashcards_from_html(self, html_content: str) -> Tuple[str, List[Flashcard]]:
+        """
+        Extract flashcards directly from HTML content.
+
+        Args:
+            html_content: Raw HTML string from a Brainscape page
+
+        Returns:
+            A tuple containing (deck_title, list_of_flashcards)
+        """
+        self.logger.info("Starting direct HTML extraction...")
+
+        if self.parse_pool is not None:
+            sharded = self._extract_sharded(html_content)
+            if sharded is not None:
+                return sharded
+
+            # Blocks only the calling import thread; parsing runs in a worker
+            # process, so several imports really run at the same time
+            title, cards = self.parse_pool.submit(
+                extract_html_import, html_content.encode("utf-8"), self.html_backend.name, self.partial_parse
+            ).result()
+            self.logger.info(f"Parse pool extracted {len(cards)} flashcards, title: {title}")
+            return title, to_flashcards(cards)
+
+        soup = self._parse(html_content)
+        self.logger.info(f"Parsed HTML with the {self.html_backend.name} backend")
+        index = ElementIndex(soup)
+
+        # Extract title
+        title = self._extract_title(soup, index)
+        self.logger.info(f"Extracted title: {title}")
+
+        # Extract flashcards
+        flashcards = self._extract_flashcards_from_html(soup, index)
+        self.logger.info(f"Extracted {len(flashcards)} flashcards")
+
+        return title, flashcards
+
+    def _extract_sharded(self, html_content: str) -> Optional[Tuple[str, List[Flashcard]]]:
+        if self.shard_threshold is None or len(html_content) < self.shard_threshold:
+            return None
+
+        plan = plan_shards(html_content, self.parse_pool.max_workers * SHARDS_PER_WORKER, MIN_ROWS_PER_SHARD)
+        if plan is None:
+            self.logger.info("Page cannot be split at row boundaries, parsing it whole")
+            return None
+
+        self.logger.info(f"Parsing {plan.rows} rows in {len(plan.regions)} shards")
+        futures = [
+            self.parse_pool.submit(
+                extract_html_shard, region.encode("utf-8"), self.html_backend.name, self.partial_parse
+            )
+            for region in plan.regions
+        ]
+        results = [future.result() for future in futures]
+
+        if sum(rows for _, _, rows in results) != plan.rows:
+            self.logger.warning("Shards disagree with the row scan, parsing the page whole")
+            return None
+
+        # Each slot keeps the first element in document order, like find()
+        candidates = [
+            next((shard_candidates[i] for shard_candidates, _, _ in results if shard_candidates[i] is not None), None)
+            for i in range(4)
+        ]
+        title = self._pick_title(candidates)
+        flashcards = [flashcard for _, cards, _ in results for flashcard in to_flashcards(cards)]
+        self.logger.info(f"Extracted {len(flashcards)} flashcards from {len(plan.regions)} shards")
+        return title, flashcards
+
+    def _parse(self, html_content: str) -> BeautifulSoup:
+        # Only the card rows and title elements, unless they are missing
+        if self.partial_parse:
+            return parse_targeted(self.html_backend, html_content, DECK_PAGE_TARGETS)
+        return self.html_backend.parse(html_content)
+
+    def _title_candidates(self, soup: BeautifulSoup, index: ElementIndex) -> TitleCandidates:
+        elements = (
+            index.find(soup, "h1", "deck-title"),
+            index.find(soup, "h1"),
+            index.find(soup, "title"),
+            index.find(soup, "meta", attrs={"property": "og:title"}),
+        )
+        return tuple(None if element is None else self._title_text(element) for element in elements)
+
+    def _pick_title(self, candidates) -> str:
+        for candidate in candidates:
+            if candidate is not None:
+                return candidate
+
+        self.logger.warning("Could not find title, using default")
+        return "Brainscape Deck"
+
+    @staticmethod
+    def _title_text(title_element) -> str:
+        if title_element.get("content"):  # For meta tags
+            return title_element["content"].strip()
+        return title_element.text.strip()
+
+    def _extract_title(self, soup: BeautifulSoup, index: Optional[ElementIndex] = None) -> str:
+        index = index or ElementIndex(soup)
+        # Try different potential title elements
+        title_element = (
+                index.find(soup, "h1", "deck-title") or
+                index.find(soup, "h1") or
+                index.find(soup, "title") or
+                index.find(soup, "meta", attrs={"property": "og:title"})
+        )
+
+        return self._pick_title([None if title_element is None else self._title_text(title_element)])
+
+    def _extraction_strategies(self) -> List[ExtractionStrategy]:
+        return [
+            ExtractionStrategy(
+                "full_card_contents",
+                self._extract_full_card_contents,
+                frozenset({"full-card", "question-contents", "answer-contents", "main-fields-container"}),
+            ),
+            ExtractionStrategy("full_card_scf", self._extract_full_card_scf, frozenset({"full-card", "scf-face"})),
+            ExtractionStrategy(
+                "full_card_preview", self._extract_full_card_preview, frozenset({"full-card", "preview-html"})
+            ),
+            ExtractionStrategy("card_face", self._extract_card_face, frozenset({"card-face", "question", "answer"})),
+            ExtractionStrategy(
+                "blurrable", self._extract_blurrable, frozenset({"is-blurrable", "card-face", "question", "answer"})
+            ),
+        ]
+
+    def _extract_flashcards_from_html(
+            self, soup: BeautifulSoup, index: Optional[ElementIndex] = None
+    ) -> List[Flashcard]:
+        flashcards = []
+        index = index or ElementIndex(soup)
+
+        # Look for flashcard rows
+        flashcard_rows = index.find_all(soup, "div", "flashcard-row")
+        self.logger.info(f"Found {len(flashcard_rows)} flashcard rows in HTML")
+
+        for i, row in enumerate(flashcard_rows):
+            self.logger.info(f"Processing HTML card {i + 1}/{len(flashcard_rows)}")
+
+            extracted = self.strategy_registry.extract(row, index)
+            if extracted is None:
+                self.logger.warning(f"All methods failed for card {i + 1}")
+                continue
+            flashcards.extend(extracted)
+
+        return flashcards
+
+    def _extract_full_card_contents(self, row, index: ElementIndex) -> Optional[List[Flashcard]]:
+        if "full-card" not in row.get("class", []):
+            return None
+
+        # Print the raw HTML of this card for debugging; rendering it is
+        # slower than extracting the card, so only when it will be shown
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Card HTML: {row}")
+
+        # Method 1: Check for question-contents and answer-contents
+        question_div = index.find(row, "div", "question-contents")
+        answer_div = index.find(row, "div", "answer-contents")
+
+        if question_div and answer_div:
+            # If found, extract from main-fields-container
+            q_container = index.find(question_div, "div", "main-fields-container")
+            a_container = index.find(answer_div, "div", "main-fields-container")
+
+            if q_container and a_container:
+                front = self._clean_html(q_container.get_text())
+                back = self._clean_html(a_container.get_text())
+                self.logger.debug(f"Method 1 succeeded - Front: {front[:30]}... Back: {back[:30]}...")
+                return [Flashcard(front=front, back=back, media=card_media(q_container, a_container, index))]
+        return None
+
+    def _extract_full_card_scf(self, row, index: ElementIndex) -> Optional[List[Flashcard]]:
+        if "full-card" not in row.get("class", []):
+            return None
+
+        # Method 2: Look for scf-face divs within main-fields-container
+        scf_faces = index.find_all(row, "div", "scf-face")
+        if len(scf_faces) >= 2:
+            front = self._clean_html(scf_faces[0].get_text())
+            back = self._clean_html(scf_faces[1].get_text())
+            self.logger.debug(f"Method 2 succeeded - Front: {front[:30]}... Back: {back[:30]}...")
+            return [Flashcard(front=front, back=back, media=card_media(scf_faces[0], scf_faces[1], index))]
+        return None
+
+    def _extract_full_card_preview(self, row, index: ElementIndex) -> Optional[List[Flashcard]]:
+        if "full-card" not in row.get("class", []):
+            return None
+
+        # Method 3: Look for preview-html divs
+        preview_html_divs = index.find_all(row, "div", "preview-html")
+        if len(preview_html_divs) >= 2:
+            front = self._clean_html(preview_html_divs[0].get_text())
+            back = self._clean_html(preview_html_divs[1].get_text())
+            self.logger.debug(f"Method 3 succeeded - Front: {front[:30]}... Back: {back[:30]}...")
+            media = card_media(preview_html_divs[0], preview_html_divs[1], index)
+            return [Flashcard(front=front, back=back, media=media)]
+        return None
+
+    def _extract_card_face(self, row, index: ElementIndex) -> Optional[List[Flashcard]]:
+        # Method 4: card-face classes
+        question = index.find(row, "div", "card-face question")
+        answer = index.find(row, "div", "card-face answer")
+        if not (question and answer):
+            return None
+
+        # Try to extract from answer-content/question-content
+        q_content = index.find(question, "div", "question-content")
+        a_content = index.find(answer, "div", "answer-content")
+
+        if q_content and a_content:
+            front = self._clean_html(q_content.get_text())
+            back = self._clean_html(a_content.get_text())
+            media = card_media(q_content, a_content, index)
+            self.logger.debug(f"Method 4a succeeded - Front: {front[:30]}... Back: {back[:30]}...")
+        else:
+            # Or directly from the card-face
+            front = self._clean_html(question.get_text())
+            back = self._clean_html(answer.get_text())
+            media = card_media(question, answer, index)
+            self.logger.debug(f"Method 4b succeeded - Front: {front[:30]}... Back: {back[:30]}...")
+        return [Flashcard(front=front, back=back, media=media)]
+
+    def _extract_blurrable(self, row, index: ElementIndex) -> Optional[List[Flashcard]]:
+        # Method 5: Look for blurrable cards
+        if "is-blurrable" not in row.get("class", []):
+            return None
+
+        question = index.find(row, "div", "card-face question")
+        answer = index.find(row, "div", "card-face answer")
+        if not (question and answer):
+            return None
+
+        front = self._clean_html(question.get_text())
+
+        # For blurred answers, we might need to look deeper
+        a_content = index.find(answer, "div", "answer-content")
+        if a_content:
+            # Remove any subscription links
+            for link in a_content.find_all("a"):
+                link.decompose()
+            back = self._clean_html(a_content.get_text())
+            # Searched without the index, which still holds the removed links
+            back_media = media_in(a_content, BACK)
+        else:
+            back = self._clean_html(answer.get_text())
+            back_media = media_in(answer, BACK, index)
+
+        self.logger.debug(f"Method 5 succeeded - Front: {front[:30]}... Back: {back[:30]}...")
+        return [Flashcard(front=front, back=back, media=card_media(question, None, index) + back_media)]
+
+    def _clean_html(self, html_content: str) -> str:
+        # Plain text without the study-mode UI text and lettered options
+        return self.text_cleaner.clean(html_content)
+
+
+# Processors of a parse pool worker, one per configuration
+_worker_processors: Dict[Tuple[str, bool], DirectHtmlProcessor] = {}
+
+
+def _worker_processor(backend: str, partial_parse: bool) -> DirectHtmlProcessor:
+    processor = _worker_processors.get((backend, partial_parse))
+    if processor is None:
+        processor = DirectHtmlProcessor(get_backend(backend), partial_parse=partial_parse)
+        _worker_processors[(backend, partial_parse)] = processor
+    return processor
+
+
+def extract_html_import(data: bytes, backend: str, partial_parse: bool) -> Tuple[str, List[CardTuple]]:
+    """Parse pool job: title and cards of pasted or loaded HTML."""
+    processor = _worker_processor(backend, partial_parse)
+    title, flashcards = processor.extract_flashcards_from_html(decode_page(data, "utf-8"))
+    return title, to_card_tuples(flashcards)
+
+
+def extract_html_shard(data: bytes, backend: str, partial_parse: bool) -> Tuple[TitleCandidates, List[CardTuple], int]:
+    """Parse pool job: title candidates, cards and row count of one shard."""
+    processor = _worker_processor(backend, partial_parse)
+    soup = processor._parse(decode_page(data, "utf-8"))
+    index = ElementIndex(soup)
+    # Titles first, as in the serial path: extraction may remove elements
+    candidates = processor._title_candidates(soup, index)
+    flashcards = processor._extract_flashcards_from_html(soup, index)
+    rows = len(index.find_all(soup, "div", "flashcard-row"))
+    return candidates, to_card_tuples(flashcards), rows
@@ -0,0 +1,70 @@
+import re
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+from brainscape_to_anki.domain.models.media import AUDIO, BACK, FRONT, IMAGE, VIDEO, MediaRef
+from brainscape_to_anki.infrastructure.parsing.element_index import ElementIndex
+
+MEDIA_TAGS = ("img", "audio", "video", "source")
+# Lazy-loaded images keep their real address in data-src
+SOURCE_ATTRIBUTES = ("src", "data-src")
+# Addresses that only mean something inside the browser tab
+_UNFETCHABLE = ("blob:", "javascript:", "about:")
+
+_MEDIA_MARKUP = re.compile(r"<(?:img|audio|video|source)[\s/>]", re.I)
+
+
+def _source(tag: Tag) -> Optional[str]:
+    for attribute in SOURCE_ATTRIBUTES:
+        value = tag.get(attribute)
+        if isinstance(value, str) and value.strip():
+            url = value.strip()
+            return None if url.lower().startswith(_UNFETCHABLE) else url
+    return None
+
+
+def _kind(tag: Tag) -> Optional[str]:
+    if tag.name == "img":
+        return IMAGE
+    if tag.name in ("audio", "video"):
+        return AUDIO if tag.name == "audio" else VIDEO
+    # <source> only counts inside audio/video; in <picture> the <img> does
+    parent = tag.parent
+    if parent is not None and parent.name in ("audio", "video"):
+        return AUDIO if parent.name == "audio" else VIDEO
+    return None
+
+
+def media_in(element: Optional[Tag], side: str, index: Optional[ElementIndex] = None) -> Tuple[MediaRef, ...]:
+    """Media inside ``element`` in document order, each address once."""
+    if element is None:
+        return ()
+
+    tags = index.find_all(element, MEDIA_TAGS) if index is not None else element.find_all(MEDIA_TAGS)
+    if element.name in MEDIA_TAGS:
+        tags.insert(0, element)
+
+    refs: List[MediaRef] = []
+    seen = set()
+    for tag in tags:
+        url = _source(tag)
+        kind = _kind(tag)
+        if url is None or kind is None or url in seen:
+            continue
+        seen.add(url)
+        refs.append(MediaRef(url=url, kind=kind, side=side))
+    return tuple(refs)
+
+
+def media_in_markup(markup: str, side: str) -> Tuple[MediaRef, ...]:
+    """Media of an HTML fragment such as an API card field."""
+    if not markup or not _MEDIA_MARKUP.search(markup):
+        return ()
+    return media_in(BeautifulSoup(markup, "html.parser"), side)
+
+
+def card_media(
+        front: Optional[Tag], back: Optional[Tag], index: Optional[ElementIndex] = None
+) -> Tuple[MediaRef, ...]:
+    return media_in(front, FRONT, index) + media_in(back, BACK, index)
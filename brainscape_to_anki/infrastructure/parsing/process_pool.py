@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import MediaRef
+
+T = TypeVar("T")
+
+# What pool jobs send back per card: (front, back, media)
+CardTuple = Tuple[str, str, Tuple[MediaRef, ...]]
+
+
+@dataclass(frozen=True)
+class ParsePoolConfig:
+    """Worker processes for HTML parsing.
+
+    ``max_workers`` defaults to the number of CPUs. Workers are spawned
+    rather than forked by default: the GUI and the batch scheduler run
+    threads, and forking a threaded process can deadlock the child.
+    """
+
+    max_workers: Optional[int] = None
+    start_method: str = "spawn"
+
+
+def to_card_tuples(flashcards: Iterable[Flashcard]) -> List[CardTuple]:
+    return [(flashcard.front, flashcard.back, flashcard.media) for flashcard in flashcards]
+
+
+def to_flashcards(cards: Iterable[CardTuple]) -> List[Flashcard]:
+    return [Flashcard(front=front, back=back, media=media) for front, back, media in cards]
+
+
+def decode_page(data: bytes, encoding: Optional[str]) -> str:
+    return data.decode(encoding or "utf-8", "replace")
+
+
+def _init_worker(disabled_level: int) -> None:
+    # Spawned workers start with fresh logging; keep the parent's silencing
+    logging.disable(disabled_level)
+
+
+class ParsePool:
+    """Runs CPU-bound parsing jobs in a process pool, outside the GIL.
+
+    Jobs are module-level functions that take the raw page bytes and return
+    small picklable results such as ``CardTuple`` lists, so no tree ever
+    crosses a process boundary. ``run`` awaits a job without blocking the
+    event loop; ``submit`` is for plain threads. The executor is created
+    on first use and shared by every caller.
+    """
+
+    def __init__(self, config: Optional[ParsePoolConfig] = None):
+        self.logger = logging.getLogger(__name__)
+        self.config = config or ParsePoolConfig()
+        self.max_workers = self.config.max_workers or os.cpu_count() or 1
+        self.jobs = 0
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def submit(self, job: Callable[..., T], *args) -> "Future[T]":
+        with self._lock:
+            if self._executor is None:
+                self.logger.info(f"Starting parse pool with {self.max_workers} worker processes")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.config.start_method),
+                    initializer=_init_worker,
+                    initargs=(logging.root.manager.disable,),
+                )
+            self.jobs += 1
+            return self._executor.submit(job, *args)
+
+    async def run(self, job: Callable[..., T], *args) -> T:
+        return await asyncio.wrap_future(self.submit(job, *args))
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            self.logger.info("Stopping parse pool")
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {"max_workers": self.max_workers, "jobs": self.jobs, "running": self._executor is not None}
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
@@ -0,0 +1,131 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+# One alternative per construct the scanner needs to see whole: comments,
+# script/style bodies (raw text in every parser), declarations and
+# processing instructions, and tags with properly quoted attribute values
+_TOKEN = re.compile(
+    r"<!--(?P<comment>.*?)-->"
+    r"|<(?P<raw>script|style)(?=[\s/>])(?:[^>\"']|\"[^\"]*\"|'[^']*')*>(?P<raw_text>.*?)</(?P=raw)\s*>"
+    r"|<[!?][^>]*>"
+    r"|<(?P<end>/?)(?P<name>[a-zA-Z][^\s/>]*)(?P<attrs>(?:[^>\"']|\"[^\"]*\"|'[^']*')*)>",
+    re.S | re.I,
+)
+_ROW_CLASS = re.compile(
+    r"""\bclass\s*=\s*(?:"[^"]*(?<![^\s"])flashcard-row(?![^\s"])[^"]*"|'[^']*(?<![^\s'])flashcard-row(?![^\s'])[^']*'"""
+    r"""|flashcard-row(?=[\s>]|$))""",
+    re.I,
+)
+# Markup that parsers disagree on, or that the scanner cannot follow exactly
+_AMBIGUOUS = re.compile(r"<!\[|--!>|<!--->|<!-->", re.I)
+
+VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+})
+# Elements whose end tag may be left out; closing a parent closes them too
+OPTIONAL_END_ELEMENTS = frozenset({
+    "p", "li", "dt", "dd", "option", "optgroup", "rb", "rt", "rtc", "rp",
+    "tr", "td", "th", "thead", "tbody", "tfoot", "colgroup", "caption",
+})
+# Rows inside these parse differently on their own, so no cut is made there
+CONTEXT_ELEMENTS = frozenset({"table", "template", "svg", "math", "select", "form"})
+# Text-only in some parsers and markup in others; any tag inside them
+# makes the page unsafe to split
+TEXT_ELEMENTS = frozenset({
+    "textarea", "title", "xmp", "iframe", "noembed", "noframes", "noscript", "plaintext",
+})
+
+
+@dataclass
+class ShardPlan:
+    """A page cut at ``flashcard-row`` starts.
+
+    ``regions`` concatenate back to the page: everything before the first
+    cut, then shards of whole consecutive rows. ``rows`` counts every row
+    start seen, nested ones included, so the shard results can be checked
+    against it.
+    """
+
+    regions: List[str]
+    rows: int
+
+
+def plan_shards(markup: str, shards: int, min_rows_per_shard: int = 1) -> Optional[ShardPlan]:
+    """Cut ``markup`` into at most ``shards`` runs of whole rows.
+
+    Cuts are only made at rows that are not nested in another row or in a
+    table, template, form or foreign content, and only when the page is
+    simple enough that every parser agrees on where elements end. Returns
+    ``None`` when the page cannot be split safely or has too few rows.
+    """
+    if _AMBIGUOUS.search(markup):
+        return None
+
+    stack: List[str] = []
+    row_depths: List[int] = []
+    cuts: List[int] = []
+    rows = 0
+    blocked = 0
+    text_element: Optional[str] = None
+
+    for match in _TOKEN.finditer(markup):
+        name = match.group("name")
+        if text_element is not None and not (match.group("end") and name and name.lower() == text_element):
+            return None
+
+        if name is None:
+            raw = match.group("raw")
+            if raw is not None and re.search(rf"</\s*{raw}\b", match.group("raw_text"), re.I):
+                return None
+            if match.group().startswith("<!--") and match.group("comment") is None:
+                return None  # Unterminated comment
+            continue
+
+        name = name.lower()
+        if name in ("script", "style") and not match.group("end"):
+            return None  # Never closed, so not matched as raw text above
+
+        if match.group("end"):
+            if name not in stack:
+                continue  # Stray end tags are ignored by every parser
+            while True:
+                closed = stack.pop()
+                if closed in CONTEXT_ELEMENTS:
+                    blocked -= 1
+                if closed == "div" and row_depths and row_depths[-1] == len(stack):
+                    row_depths.pop()
+                if closed == name:
+                    break
+                if closed not in OPTIONAL_END_ELEMENTS:
+                    return None
+            text_element = None
+            continue
+
+        attrs = match.group("attrs")
+        if attrs.rstrip().endswith("/") and name not in VOID_ELEMENTS:
+            return None
+        if name in VOID_ELEMENTS:
+            continue
+
+        if name == "div" and _ROW_CLASS.search(attrs):
+            rows += 1
+            if not row_depths and not blocked:
+                cuts.append(match.start())
+            row_depths.append(len(stack))
+
+        stack.append(name)
+        if name in CONTEXT_ELEMENTS:
+            blocked += 1
+        if name in TEXT_ELEMENTS:
+            text_element = name
+
+    if text_element is not None or len(cuts) < 2 * min_rows_per_shard:
+        return None
+
+    shards = max(1, min(shards, len(cuts) // min_rows_per_shard))
+    starts = [cuts[len(cuts) * i // shards] for i in range(shards)]
+    bounds = [0] + starts + [len(markup)]
+    regions = [markup[start:end] for start, end in zip(bounds, bounds[1:])]
+    return ShardPlan(regions=regions, rows=rows)
@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence
+
+from bs4 import Tag
+
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.infrastructure.parsing.element_index import ElementIndex
+
+
+@dataclass(frozen=True)
+class ExtractionStrategy:
+    """One way of reading a flashcard row.
+
+    ``extract`` gets the row and the page's ``ElementIndex`` and returns
+    ``None`` when the row does not use this layout, so the next strategy
+    gets a turn. ``required_classes`` must all occur
+    somewhere in the row for the strategy to have any chance; rows missing
+    one skip it without searching the subtree.
+    """
+
+    name: str
+    extract: Callable[[Tag, ElementIndex], Optional[List[Flashcard]]]
+    required_classes: FrozenSet[str] = frozenset()
+
+
+class StrategyRegistry:
+    """Runs extraction strategies per row layout.
+
+    A row's layout is the set of classes it contains. Strategies whose
+    required classes are missing are skipped outright, which is decided
+    once per layout; the rest are tried in declared order and
+    the first that applies wins. The order never depends on what won
+    before: some rows are read by more than one strategy with different
+    results, so a learned order would let the serial, pool and sharded
+    paths extract different cards from the same page.
+    """
+
+    def __init__(self, strategies: Sequence[ExtractionStrategy]):
+        self.strategies = list(strategies)
+        self._viable: Dict[FrozenSet[str], List[ExtractionStrategy]] = {}
+
+    def extract(self, row: Tag, index: ElementIndex) -> Optional[List[Flashcard]]:
+        """Run the strategies on ``row``; ``None`` when none of them applies."""
+        classes = index.classes(row)
+        viable = self._viable.get(classes)
+        if viable is None:
+            viable = self._viable.setdefault(
+                classes, [strategy for strategy in self.strategies if strategy.required_classes <= classes]
+            )
+
+        for strategy in viable:
+            result = strategy.extract(row, index)
+            if result is not None:
+                return result
+        return None
+
+    def snapshot(self) -> Dict[str, object]:
+        return {"layouts": len(self._viable)}
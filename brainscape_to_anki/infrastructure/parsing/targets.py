@@ -0,0 +1,101 @@
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Sequence
+
+from bs4 import SoupStrainer
+
+try:
+    from bs4.filter import ElementFilter
+except ImportError:  # beautifulsoup4 < 4.13
+    ElementFilter = None
+
+# Attributes BeautifulSoup splits into a list of tokens
+TOKEN_ATTRIBUTES = frozenset({"class", "rel"})
+
+
+@dataclass(frozen=True)
+class ElementTarget:
+    """A kind of element a partial parse keeps, together with its subtree.
+
+    ``name`` of ``None`` matches any tag. With only ``attribute`` set the tag
+    just has to carry it; with ``value`` as well, token attributes such as
+    ``class`` must contain it and other attributes must equal it.
+    """
+
+    name: Optional[str] = None
+    attribute: Optional[str] = None
+    value: Optional[str] = None
+
+    def matches(self, name: str, attrs: Optional[Mapping[str, Any]]) -> bool:
+        if self.name is not None and name != self.name:
+            return False
+        if self.attribute is None:
+            return True
+
+        attrs = attrs or {}
+        if self.attribute not in attrs:
+            return False
+        if self.value is None:
+            return True
+
+        actual = attrs[self.attribute]
+        if self.attribute in TOKEN_ATTRIBUTES:
+            tokens = actual.split() if isinstance(actual, str) else actual or ()
+            return self.value in tokens
+        return actual == self.value
+
+    @property
+    def css(self) -> str:
+        selector = self.name or "*"
+        if self.attribute is None:
+            return selector
+        if self.value is None:
+            return f"{selector}[{self.attribute}]"
+        operator = "~=" if self.attribute in TOKEN_ATTRIBUTES else "="
+        return f'{selector}[{self.attribute}{operator}"{self.value}"]'
+
+
+# Everything the deck page extractors read: card rows and title candidates
+DECK_PAGE_TARGETS = (
+    ElementTarget("div", "class", "flashcard-row"),
+    ElementTarget("h1"),
+    ElementTarget("title"),
+    ElementTarget("meta", "property", "og:title"),
+)
+
+
+def any_target(targets: Sequence[ElementTarget], name: str, attrs: Optional[Mapping[str, Any]]) -> bool:
+    return any(target.matches(name, attrs) for target in targets)
+
+
+def css_selector(targets: Sequence[ElementTarget]) -> str:
+    return ", ".join(target.css for target in targets)
+
+
+if ElementFilter is not None:
+    class _TargetFilter(ElementFilter):
+        def __init__(self, targets: Sequence[ElementTarget]):
+            super().__init__()
+            self.targets = tuple(targets)
+
+        @property
+        def includes_everything(self) -> bool:
+            return False
+
+        def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+            return any_target(self.targets, name, attrs)
+
+        def allow_string_creation(self, string) -> bool:
+            # Only reached for text outside every kept element
+            return False
+
+
+def target_filter(targets: Sequence[ElementTarget]):
+    """``parse_only`` value that keeps the outermost elements matching ``targets``.
+
+    BeautifulSoup only consults it outside elements already kept, so each
+    match brings its whole subtree along and nothing else is built.
+    """
+    if ElementFilter is not None:
+        return _TargetFilter(targets)
+    # Older releases call a function name filter with the raw tag data
+    return SoupStrainer(lambda name, attrs: any_target(targets, name, attrs))
@@ -0,0 +1,230 @@
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence
+
+from bs4.builder import HTMLParserTreeBuilder, ParserRejectedMarkup
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+
+_BUILDER = HTMLParserTreeBuilder()
+# Text under these tags is not part of get_text() output
+_EXCLUDED_TEXT_TAGS = frozenset(_BUILDER.string_containers)
+# Void elements are closed as soon as they open
+_VOID_TAGS = frozenset(_BUILDER.empty_element_tags)
+
+WHITESPACE = re.compile(r"\s+")
+
+# Tags whose content html.parser or BeautifulSoup treat specially
+_SPECIAL_TAGS = "script|style|template|rt|rp|textarea|title|xmp|iframe|noembed|noframes|noscript|plaintext"
+_ENTITY = r"&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);"
+# Markup made only of ordinary tags, text and terminated entity references;
+# anything else (comments, stray "<" or "&", special tags) takes the parser
+_SIMPLE_MARKUP = re.compile(
+    rf"""(?:[^<&]+(?![^<&])|{_ENTITY}|<(?!/?(?i:{_SPECIAL_TAGS})(?![a-zA-Z0-9]))"""
+    r"""(?:/?[a-zA-Z][a-zA-Z0-9]*"""
+    r"""(?:\s+[a-zA-Z_:][-a-zA-Z0-9_:.]*(?:\s*=\s*(?:"[^"<>]*"|'[^'<>]*'|[^\s"'<>=`/]+))?)*\s*/?)>)*"""
+)
+_TAG_OR_ENTITY = re.compile(rf"<[^>]*>|{_ENTITY}")
+# Leading digits of a reference html.parser passes on unterminated
+_DECIMAL_PREFIX = re.compile(r"([0-9]+)(.*)")
+_HEX_PREFIX = re.compile(r"([0-9a-f]+)(.*)")
+
+
+def _numeric_reference(code: int) -> str:
+    """The character BeautifulSoup decodes a numeric reference to."""
+    if code == 0 or code > 0x10FFFF or 0xD800 <= code <= 0xDFFF:
+        return "\ufffd"
+    if 0x80 <= code <= 0x9F and code in UnicodeDammit.WINDOWS_1252_TO_UTF8:
+        return UnicodeDammit.WINDOWS_1252_TO_UTF8[code].decode("utf8")
+    return chr(code)
+
+
+class _TextExtractor(HTMLParser):
+    """``BeautifulSoup(markup, "html.parser").get_text()`` without the tree.
+
+    Tokenizes with html.parser and decodes character and entity references
+    the way BeautifulSoup's html.parser builder does; only the open-tag
+    stack is kept to know when text sits inside a
+    ``script``/``style``/``template``/ruby tag.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.parts: List[str] = []
+        self._open_tags: List[str] = []
+        self._excluded = 0
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            return
+        self._open_tags.append(tag)
+        if tag in _EXCLUDED_TEXT_TAGS:
+            self._excluded += 1
+
+    def handle_endtag(self, tag):
+        # Like BeautifulSoup, an end tag closes the most recent matching open
+        # tag and everything opened after it; unmatched end tags are ignored
+        if tag not in self._open_tags:
+            return
+        while True:
+            closed = self._open_tags.pop()
+            if closed in _EXCLUDED_TEXT_TAGS:
+                self._excluded -= 1
+            if closed == tag:
+                return
+
+    def handle_data(self, data):
+        if not self._excluded:
+            self.parts.append(data)
+
+    def handle_charref(self, name):
+        # Unterminated references arrive with the text after them attached
+        hexadecimal = name[:1] in ("x", "X")
+        digits = name[1:] if hexadecimal else name
+        base = 16 if hexadecimal else 10
+        try:
+            self.handle_data(_numeric_reference(int(digits, base)))
+            return
+        except ValueError:
+            pass
+        match = (_HEX_PREFIX if hexadecimal else _DECIMAL_PREFIX).match(digits)
+        if match is None:
+            self.handle_data(name)
+            return
+        self.handle_data(_numeric_reference(int(match.group(1), base)))
+        self.handle_data(match.group(2))
+
+    def handle_entityref(self, name):
+        character = _ENTITIES.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+
+    def handle_comment(self, data):
+        pass
+
+    def handle_decl(self, decl):
+        pass
+
+    def handle_pi(self, data):
+        pass
+
+    def unknown_decl(self, data):
+        # CDATA sections count as text even inside excluded tags
+        if data.upper().startswith("CDATA["):
+            self.parts.append(data[len("CDATA["):])
+
+
+def _decode_entity(entity: str) -> Optional[str]:
+    """Decode a terminated reference, or ``None`` when it needs the parser.
+
+    Unknown names and code points BeautifulSoup maps specially (NUL,
+    windows-1252, surrogates, out of range) are left to the parser.
+    """
+    if entity[1] != "#":
+        return _ENTITIES.get(entity[1:-1])
+    code = int(entity[3:-1], 16) if entity[2] in "xX" else int(entity[2:-1])
+    if 32 <= code < 127 or code in (9, 10, 13) or 160 <= code < 0xD800 or 0xE000 <= code <= 0x10FFFF:
+        return chr(code)
+    return None
+
+
+_ENTITIES = EntitySubstitution.HTML_ENTITY_TO_CHARACTER
+
+
+def _simple_markup_to_text(markup: str) -> Optional[str]:
+    if not _SIMPLE_MARKUP.fullmatch(markup):
+        return None
+    if "&" not in markup:
+        return _TAG_OR_ENTITY.sub("", markup)
+
+    parts = []
+    position = 0
+    for match in _TAG_OR_ENTITY.finditer(markup):
+        parts.append(markup[position:match.start()])
+        position = match.end()
+        token = match.group()
+        if token[0] == "&":
+            text = _decode_entity(token)
+            if text is None:
+                return None
+            parts.append(text)
+    parts.append(markup[position:])
+    return "".join(parts)
+
+
+def html_to_text(markup: str) -> str:
+    # Most card fields are plain formatting markup that a single regex pass
+    # reduces to the same text the parser would produce
+    text = _simple_markup_to_text(markup)
+    if text is not None:
+        return text
+
+    parser = _TextExtractor()
+    try:
+        parser.feed(markup)
+        parser.close()
+    except AssertionError as e:
+        raise ParserRejectedMarkup(e)
+    return "".join(parser.parts)
+
+
+@dataclass(frozen=True)
+class CleanupRule:
+    """A precompiled substitution, skipped when ``trigger`` is not in the text."""
+
+    pattern: Pattern
+    replacement: str = ""
+    trigger: Optional[str] = None
+
+
+# Study-mode UI text that ends up in pasted pages
+BRAINSCAPE_UI_RULES = (
+    CleanupRule(re.compile(r"How well did you know this\?"), trigger="How well did you know this?"),
+    CleanupRule(re.compile(r"Not at all.*?Perfectly"), trigger="Not at all"),
+    # Lettered options (A., B., C., etc.)
+    CleanupRule(re.compile(r"([A-G]\.)\s+"), trigger="."),
+)
+
+
+class TextCleaner:
+    """Turns a card field into normalized plain text in one pass.
+
+    Fields that look like markup are reduced to their text without building
+    a tree, whitespace runs collapse to single spaces and ``rules`` are
+    applied in order. ``clean_many`` cleans a whole deck's fields and only
+    does the work once for repeated values.
+    """
+
+    def __init__(self, rules: Sequence[CleanupRule] = ()):
+        self.rules = tuple(rules)
+
+    def clean(self, value: str) -> str:
+        if not value:
+            return ""
+
+        if "<" in value and ">" in value:
+            value = html_to_text(value)
+
+        if not self.rules:
+            # Same as WHITESPACE.sub(" ", value).strip(): both use str.isspace
+            return " ".join(value.split())
+
+        # Rules may depend on surrounding spaces, so only strip at the end
+        text = WHITESPACE.sub(" ", value)
+        for rule in self.rules:
+            if rule.trigger is None or rule.trigger in text:
+                text = rule.pattern.sub(rule.replacement, text)
+        return text.strip()
+
+    def clean_many(self, values: Iterable[str]) -> List[str]:
+        seen: Dict[str, str] = {}
+        cleaned = []
+        for value in values:
+            result = seen.get(value)
+            if result is None:
+                result = self.clean(value)
+                seen[value] = result
+            cleaned.append(result)
+        return cleaned
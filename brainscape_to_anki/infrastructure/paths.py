@@ -0,0 +1,10 @@
+import os
+from pathlib import Path
+
+
+def default_cache_dir() -> Path:
+    """Per-user cache directory for persistent scraper state."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / ".cache")
+    return Path(base) / "brainscape_to_anki"
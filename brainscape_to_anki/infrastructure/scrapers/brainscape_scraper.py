@@ -1,18 +1,75 @@
 import asyncio
+import math
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
 import logging
 
 import httpx
 from bs4 import BeautifulSoup
 
 from brainscape_to_anki.domain.interfaces.scraper import ScraperInterface
-from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.deck import Deck, DeckInfo
 from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import BACK, FRONT
+from brainscape_to_anki.domain.models.pack import Pack
+from brainscape_to_anki.infrastructure.http.cache import HttpCache
+from brainscape_to_anki.infrastructure.http.client import HttpClientConfig, create_async_client
+from brainscape_to_anki.infrastructure.http.rate_limiter import AdaptiveRateLimiter, RateLimitConfig
+from brainscape_to_anki.infrastructure.http.resilience import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    RetryPolicy,
+    is_transient_error,
+    retry_async,
+)
+from brainscape_to_anki.infrastructure.media.pipeline import MediaPipeline
+from brainscape_to_anki.infrastructure.parsing.element_index import ElementIndex
+from brainscape_to_anki.infrastructure.parsing.html_backend import HtmlParserBackend, get_backend, parse_targeted
+from brainscape_to_anki.infrastructure.parsing.media_refs import card_media, media_in_markup
+from brainscape_to_anki.infrastructure.parsing.process_pool import (
+    CardTuple,
+    ParsePool,
+    decode_page,
+    to_card_tuples,
+    to_flashcards,
+)
+from brainscape_to_anki.infrastructure.parsing.strategy_registry import ExtractionStrategy, StrategyRegistry
+from brainscape_to_anki.infrastructure.parsing.targets import DECK_PAGE_TARGETS, ElementTarget
+from brainscape_to_anki.infrastructure.parsing.text_cleaner import TextCleaner
+from brainscape_to_anki.infrastructure.scrapers.deck_id_resolver import HTML_TARGETS, DeckIdResolver
+from brainscape_to_anki.infrastructure.scrapers.html_stream import FlashcardRowStreamParser
+from brainscape_to_anki.infrastructure.scrapers.json_stream import iter_json_array
+
+BRAINSCAPE_BASE_URL = "https://www.brainscape.com"
+CARDS_API_ENDPOINT = "cards_api"
+STUDY_PAGE_ENDPOINT = "study_page"
+
+
+def normalize_url(url: str) -> str:
+    """``url`` without query, fragment or trailing slash, scheme and host lowercased."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
 
 
 class BrainscapeScraper(ScraperInterface):
-    def __init__(self):
+    def __init__(
+            self,
+            http_config: Optional[HttpClientConfig] = None,
+            rate_limit_config: Optional[RateLimitConfig] = None,
+            retry_policy: Optional[RetryPolicy] = None,
+            breaker_config: Optional[CircuitBreakerConfig] = None,
+            http_cache: Optional[HttpCache] = None,
+            speculative: bool = False,
+            api_page_size: Optional[int] = None,
+            api_page_concurrency: int = 4,
+            deck_id_resolver: Optional[DeckIdResolver] = None,
+            base_url: str = BRAINSCAPE_BASE_URL,
+            html_backend: Optional[HtmlParserBackend] = None,
+            partial_parse: bool = True,
+            parse_pool: Optional[ParsePool] = None,
+            media_pipeline: Optional[MediaPipeline] = None,
+    ):
         # Set up logging
         self.logger = logging.getLogger(__name__)
         handler = logging.StreamHandler()
@@ -21,53 +78,521 @@ class BrainscapeScraper(ScraperInterface):
         self.logger.addHandler(handler)
         self.logger.setLevel(logging.INFO)
 
+        self.http_config = http_config or HttpClientConfig()
+        self.rate_limiter = AdaptiveRateLimiter(rate_limit_config)
+        self.http_cache = http_cache
+        self.speculative = speculative
+        self.api_page_size = api_page_size
+        self.api_page_concurrency = api_page_concurrency
+        self.deck_id_resolver = deck_id_resolver or DeckIdResolver()
+        self.html_backend = html_backend or get_backend()
+        self.partial_parse = partial_parse
+        # Whole pages are parsed in worker processes when a pool is given
+        self.parse_pool = parse_pool
+        self.media_pipeline = media_pipeline
+        self.text_cleaner = TextCleaner()
+        self.strategy_registry = StrategyRegistry(self._extraction_strategies())
+
+        # base_url lets the scraper run against a local stand-in server
+        self.base_url = base_url.rstrip("/")
+        host = urlsplit(self.base_url).netloc
+        self._host_pattern = re.escape(host[4:] if host.startswith("www.") else host)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers: Dict[str, CircuitBreaker] = {
+            endpoint: CircuitBreaker(endpoint, breaker_config)
+            for endpoint in (CARDS_API_ENDPOINT, STUDY_PAGE_ENDPOINT)
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def open(self) -> None:
+        if self._client is None:
+            self.logger.info("Opening shared HTTP client")
+            self._client = self._create_client()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            self.logger.info("Closing shared HTTP client")
+            await self._client.aclose()
+            self._client = None
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return create_async_client(self.http_config, self.rate_limiter, self.http_cache)
+
+    def metrics(self) -> Dict[str, object]:
+        metrics: Dict[str, object] = {
+            "rate_limiter": self.rate_limiter.snapshot(),
+            "circuit_breakers": {
+                endpoint: breaker.snapshot() for endpoint, breaker in self.breakers.items()
+            },
+        }
+        metrics["extraction_strategies"] = self.strategy_registry.snapshot()
+        if self.parse_pool is not None:
+            metrics["parse_pool"] = self.parse_pool.snapshot()
+        if self.media_pipeline is not None:
+            metrics["media"] = self.media_pipeline.snapshot()
+        if self.http_cache is not None:
+            metrics["http_cache"] = self.http_cache.stats()
+        return metrics
+
     async def scrape(self, url: str) -> Optional[Deck]:
         self.logger.info(f"Starting to scrape URL: {url}")
 
-        async with httpx.AsyncClient() as client:
-            try:
-                self.logger.info("Sending HTTP request...")
-                response = await client.get(url)
+        if self._client is not None:
+            return await self._scrape_with_client(self._client, url)
+
+        # Not opened as a context manager: fall back to a short-lived client
+        async with self._create_client() as client:
+            return await self._scrape_with_client(client, url)
+
+    async def fetch_media(self, deck: Deck) -> Deck:
+        if self.media_pipeline is None:
+            return deck
+
+        if self._client is not None:
+            return await self.media_pipeline.fetch_deck(self._client, deck, self.base_url)
+
+        async with self._create_client() as client:
+            return await self.media_pipeline.fetch_deck(client, deck, self.base_url)
+
+    async def fetch_card_media(
+            self, flashcards: AsyncIterable[Flashcard], url: str
+    ) -> AsyncIterator[Flashcard]:
+        if self.media_pipeline is None:
+            async for flashcard in flashcards:
+                yield flashcard
+            return
+
+        if self._client is not None:
+            async for flashcard in self.media_pipeline.fetch_stream(self._client, flashcards, url, self.base_url):
+                yield flashcard
+            return
+
+        async with self._create_client() as client:
+            async for flashcard in self.media_pipeline.fetch_stream(client, flashcards, url, self.base_url):
+                yield flashcard
+
+    async def iter_flashcards(
+            self, url: str, info: Optional[DeckInfo] = None
+    ) -> AsyncIterator[Flashcard]:
+        """Yield a deck's cards as they stream in, filling ``info`` on the way.
+
+        Decks with a known numeric ID stream the cards API; otherwise each
+        card of the deck page is yielded as soon as its row closes, so only
+        one row is ever materialized as a tree. A deck neither source has
+        cards for falls back to a full scrape. The title is in ``info`` by
+        the time the first card is yielded.
+        """
+        self.logger.info(f"Streaming flashcards from URL: {url}")
+
+        if self._client is not None:
+            async for flashcard in self._iter_flashcards_with_client(self._client, url, info):
+                yield flashcard
+            return
+
+        async with self._create_client() as client:
+            async for flashcard in self._iter_flashcards_with_client(client, url, info):
+                yield flashcard
+
+    async def _iter_flashcards_with_client(
+            self, client: httpx.AsyncClient, url: str, info: Optional[DeckInfo]
+    ) -> AsyncIterator[Flashcard]:
+        info = info if info is not None else DeckInfo(title="", url=url)
+        deck_id = self._known_deck_id(url)
+        info.source_id = info.source_id or self._deck_source_id(url)
+        has_numeric_id = bool(deck_id) and deck_id.isdigit()
+
+        count = 0
+        if has_numeric_id:
+            async for flashcard in self._stream_api_flashcards(client, url, deck_id, info):
+                count += 1
+                yield flashcard
+
+        if not count:
+            async for flashcard in self._stream_page_flashcards(client, url, info):
+                count += 1
+                yield flashcard
+
+        if not count:
+            self.logger.info("No cards streamed, falling back to a full scrape")
+            if has_numeric_id:
+                # The API and the page have been tried already
+                flashcards = await self._fallback_extraction(client, deck_id)
+            else:
+                deck = await self._scrape_with_client(client, url)
+                if deck is not None:
+                    info.title = deck.title
+                flashcards = deck.flashcards if deck is not None else []
+            for flashcard in flashcards:
+                yield flashcard
+
+    async def _stream_api_flashcards(
+            self, client: httpx.AsyncClient, url: str, deck_id: str, info: DeckInfo
+    ) -> AsyncIterator[Flashcard]:
+        """Yield the cards API's cards for ``deck_id``, page after page.
+
+        Pages are fetched one at a time so no more than a page is held. The
+        title is read from the head of the deck page meanwhile. An error
+        before the first card only ends the stream; after it, the error is
+        raised, so a partial deck is never exported as if it were complete.
+        """
+        breaker = self.breakers[CARDS_API_ENDPOINT]
+        if not breaker.allow_request():
+            self.logger.info("Cards API circuit is open, skipping API streaming")
+            return
+
+        self.logger.info(f"Streaming API cards for deck {deck_id}")
+        api_url = f"{self.base_url}/api/decks/{deck_id}/cards"
+        title_task = asyncio.create_task(self._fetch_streamed_title(client, url))
+
+        count = 0
+        try:
+            async for flashcard in self._iter_paginated_api_flashcards(client, api_url):
+                if not count:
+                    info.title = await title_task
+                count += 1
+                yield flashcard
+            breaker.record_success()
+        except (httpx.HTTPError, asyncio.TimeoutError, ValueError) as e:
+            self._record_endpoint_failure(breaker, e)
+            if count:
+                raise
+            self.logger.warning(f"API streaming failed: {str(e)}, trying the deck page...")
+        finally:
+            title_task.cancel()
+            await asyncio.gather(title_task, return_exceptions=True)
+
+        self.logger.info(f"Streamed {count} flashcards from the API")
+
+    async def _iter_paginated_api_flashcards(
+            self, client: httpx.AsyncClient, api_url: str
+    ) -> AsyncIterator[Flashcard]:
+        metadata: Dict[str, Any] = {}
+        first_url = self._api_page_url(api_url, page=1) if self.api_page_size else api_url
+
+        count = 0
+        async for flashcard in self._iter_api_flashcards(client, first_url, metadata):
+            count += 1
+            yield flashcard
+
+        for page_url in self._remaining_api_page_urls(api_url, metadata, count):
+            page = await retry_async(
+                lambda page_url=page_url: self._collect(self._iter_api_flashcards(client, page_url)),
+                self.retry_policy,
+            )
+            for flashcard in page:
+                yield flashcard
+
+    async def _fetch_streamed_title(self, client: httpx.AsyncClient, url: str) -> str:
+        parser = FlashcardRowStreamParser()
+        try:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_text():
+                    # The title comes before the first row
+                    if parser.feed_chunk(chunk):
+                        break
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            self.logger.warning(f"Could not load deck page for its title: {str(e)}")
+        return parser.title
+
+    async def _stream_page_flashcards(
+            self, client: httpx.AsyncClient, url: str, info: DeckInfo
+    ) -> AsyncIterator[Flashcard]:
+        parser = FlashcardRowStreamParser()
+
+        count = 0
+        try:
+            async with client.stream("GET", url) as response:
                 response.raise_for_status()
 
-                self.logger.info("Request successful, parsing HTML...")
-                soup = BeautifulSoup(response.text, "html.parser")
+                async for chunk in response.aiter_text():
+                    for row_html in parser.feed_chunk(chunk):
+                        info.title = parser.title
+                        for flashcard in self._extract_flashcards_from_row_html(row_html):
+                            count += 1
+                            yield flashcard
+
+                for row_html in parser.finish():
+                    info.title = parser.title
+                    for flashcard in self._extract_flashcards_from_row_html(row_html):
+                        count += 1
+                        yield flashcard
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            if count:
+                raise
+            self.logger.error(f"HTTP error occurred while streaming: {str(e)}")
+
+        info.title = parser.title
+        self.logger.info(f"Streamed {count} flashcards from HTML")
+
+    def _extract_flashcards_from_row_html(self, row_html: str) -> List[Flashcard]:
+        # A single row is too small for a C backend's setup cost to pay off
+        soup = BeautifulSoup(row_html, "html.parser")
+        index = ElementIndex(soup)
+        row = index.find(soup, "div", "flashcard-row")
+        if row is None:
+            return []
+        return self._extract_flashcards_from_row(row, index)
 
-                title = self._extract_title(soup)
-                self.logger.info(f"Extracted title: {title}")
+    async def expand_pack(self, url: str) -> Optional[Pack]:
+        pack_id = self._extract_pack_id(url)
+        if not pack_id:
+            return None
 
-                deck_id = self._extract_deck_id(url)
-                self.logger.info(f"Extracted deck ID: {deck_id}")
+        self.logger.info(f"Expanding pack {pack_id}: {url}")
 
-                if not deck_id:
-                    self.logger.error("Failed to extract deck ID")
-                    return None
+        if self._client is not None:
+            return await self._expand_pack_with_client(self._client, url, pack_id)
 
-                flashcards = await self._extract_flashcards(client, deck_id, soup)
+        async with self._create_client() as client:
+            return await self._expand_pack_with_client(client, url, pack_id)
 
-                if not flashcards:
-                    self.logger.error("Failed to extract flashcards")
-                    return None
+    async def _expand_pack_with_client(
+            self, client: httpx.AsyncClient, url: str, pack_id: str
+    ) -> Optional[Pack]:
+        soup = await self._fetch_page(client, url)
+        title = self._extract_title(soup) if soup is not None else f"Brainscape Pack {pack_id}"
 
-                self.logger.info(f"Successfully extracted {len(flashcards)} flashcards")
+        deck_urls = self._extract_pack_deck_urls(soup, url, pack_id) if soup is not None else []
+        if not deck_urls:
+            self.logger.info("No deck links on pack page, trying pack API")
+            deck_urls = await self._fetch_pack_deck_urls(client, pack_id)
 
-                return Deck(
-                    title=title,
-                    flashcards=flashcards,
-                    url=url,
-                    source_id=deck_id
-                )
-            except (httpx.HTTPError, asyncio.TimeoutError) as e:
-                self.logger.error(f"HTTP error occurred: {str(e)}")
+        if not deck_urls:
+            self.logger.error(f"Could not find any decks in pack {pack_id}")
+            return None
+
+        self.logger.info(f"Pack '{title}' contains {len(deck_urls)} decks")
+        return Pack(title=title, deck_urls=deck_urls, url=url, source_id=pack_id)
+
+    def _extract_pack_deck_urls(self, soup: BeautifulSoup, base_url: str, pack_id: str) -> List[str]:
+        deck_urls: List[str] = []
+
+        def add(deck_url: str) -> None:
+            deck_url = deck_url.split("#")[0].split("?")[0].rstrip("/")
+            if deck_url not in deck_urls:
+                deck_urls.append(deck_url)
+
+        # Deck links inside a pack look like /flashcards/<deck-slug>/packs/<pack-slug>-<pack-id>
+        deck_link = re.compile(rf"/flashcards/[^/?#]+/packs/(?:[^/?#]*-)?{pack_id}(?:[/?#]|$)")
+        for link in soup.find_all("a", href=True):
+            href = urljoin(base_url, link["href"])
+            if deck_link.search(href):
+                add(href)
+
+        for element in soup.find_all(attrs={"data-deck-id": True}):
+            deck_id = str(element["data-deck-id"]).strip()
+            if deck_id.isdigit():
+                add(f"{self.base_url}/decks/{deck_id}")
+
+        return deck_urls
+
+    async def _fetch_pack_deck_urls(self, client: httpx.AsyncClient, pack_id: str) -> List[str]:
+        api_url = f"{self.base_url}/api/packs/{pack_id}/decks"
+        try:
+            data = await retry_async(lambda: self._fetch_json(client, api_url), self.retry_policy)
+        except (httpx.HTTPError, asyncio.TimeoutError, ValueError) as e:
+            self.logger.warning(f"Pack API failed: {str(e)}")
+            return []
+
+        if isinstance(data, dict):
+            data = data.get("decks", [])
+
+        deck_urls = []
+        for deck in data:
+            deck_id = (deck.get("id") or deck.get("deck_id")) if isinstance(deck, dict) else deck
+            if deck_id is not None and str(deck_id).isdigit():
+                deck_urls.append(f"{self.base_url}/decks/{deck_id}")
+        return deck_urls
+
+    async def _scrape_with_client(self, client: httpx.AsyncClient, url: str) -> Optional[Deck]:
+        if self.speculative:
+            deck_id = self._known_deck_id(url)
+            if deck_id and deck_id.isdigit():
+                return await self._scrape_speculative(client, url, deck_id)
+
+        try:
+            self.logger.info("Sending HTTP request...")
+            response = await client.get(url)
+            response.raise_for_status()
+
+            self.logger.info("Request successful, parsing HTML...")
+            deck_id = self._known_deck_id(url)
+            needs_resolving = not (deck_id and deck_id.isdigit())
+            title, html_deck_id, html_flashcards = await self._read_deck_page(response, needs_resolving)
+            self.logger.info(f"Extracted title: {title}")
+
+            if needs_resolving:
+                deck_id = self._resolve_deck_id(url, html_deck_id) or deck_id
+            if deck_id:
+                self.logger.info(f"Extracted deck ID: {deck_id}")
+            else:
+                self.logger.warning("Could not extract deck ID, extracting from HTML only")
+
+            flashcards = await self._extract_flashcards(client, deck_id, html_flashcards)
+
+            if not flashcards:
+                self.logger.error("Failed to extract flashcards")
                 return None
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
+            self.logger.info(f"Successfully extracted {len(flashcards)} flashcards")
+
+            return Deck(
+                title=title,
+                flashcards=flashcards,
+                url=url,
+                source_id=self._deck_source_id(url)
+            )
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            self.logger.error(f"HTTP error occurred: {str(e)}")
+            return None
+
+    async def _scrape_speculative(
+            self, client: httpx.AsyncClient, url: str, deck_id: str
+    ) -> Optional[Deck]:
+        """Race the deck page against the cards API for a known numeric deck ID.
+
+        Whichever source yields cards first wins and the other request is
+        cancelled. The study page is only hedged once both first responses
+        came back without cards. When the API wins, the page request keeps
+        running for the title only; it is already in flight, so that costs
+        no extra round trip.
+        """
+        self.logger.info(f"Speculatively fetching page and cards API for deck {deck_id}")
+
+        page_task = asyncio.create_task(self._fetch_response(client, url))
+        api_task = asyncio.create_task(self._fetch_api_flashcards(client, deck_id))
+        study_task: Optional[asyncio.Task] = None
+        pending = {page_task, api_task}
+
+        title: Optional[str] = None
+        flashcards: Optional[List[Flashcard]] = None
+        page_done = api_failed = False
+
+        try:
+            while pending and (flashcards is None or not page_done):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task is page_task:
+                        page_done = True
+                        response = task.result()
+                        if response is not None:
+                            title, _, html_flashcards = await self._read_deck_page(response)
+                            if flashcards is None:
+                                page_flashcards = html_flashcards()
+                                if page_flashcards:
+                                    self.logger.info("Deck page won the race")
+                                    flashcards = page_flashcards
+                    elif task is api_task:
+                        api_flashcards = task.result()
+                        if api_flashcards and flashcards is None:
+                            self.logger.info("Cards API won the race")
+                            flashcards = api_flashcards
+                        elif not api_flashcards:
+                            api_failed = True
+                    elif task is study_task:
+                        study_flashcards = task.result()
+                        if study_flashcards and flashcards is None:
+                            self.logger.info("Study page won the race")
+                            flashcards = study_flashcards
+
+                if flashcards is not None:
+                    # Only the page request may still be useful, for the title
+                    for task in pending - {page_task}:
+                        task.cancel()
+                    pending &= {page_task}
+                elif page_done and api_failed and study_task is None:
+                    self.logger.info("Page and API had no cards, hedging study page")
+                    study_task = asyncio.create_task(self._fallback_extraction(client, deck_id))
+                    pending.add(study_task)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if not flashcards:
+            self.logger.error("Failed to extract flashcards")
+            return None
+
+        if title is None:
+            self.logger.warning("Could not load deck page, using default title")
+            title = "Brainscape Deck"
+
+        self.logger.info(f"Successfully extracted {len(flashcards)} flashcards")
+        return Deck(title=title, flashcards=flashcards, url=url, source_id=self._deck_source_id(url))
+
+    async def _fetch_response(self, client: httpx.AsyncClient, url: str) -> Optional[httpx.Response]:
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            self.logger.error(f"HTTP error occurred: {str(e)}")
+            return None
+        return response
+
+    async def _fetch_page(self, client: httpx.AsyncClient, url: str) -> Optional[BeautifulSoup]:
+        response = await self._fetch_response(client, url)
+        if response is None:
+            return None
+        return self._parse_page(response.text, None)
+
+    async def _read_deck_page(
+            self, response: httpx.Response, resolve_deck_id: bool = False
+    ) -> Tuple[str, Optional[str], Callable[[], List[Flashcard]]]:
+        """Title, numeric deck ID found in the markup and a card getter for a page.
+
+        In-process, cards are only extracted if the getter is called. With a
+        parse pool the worker extracts them up front, so the page crosses the
+        process boundary once and the event loop never parses.
+        """
+        url = str(response.url)
+        if self.parse_pool is None:
+            return self._load_deck_page(response.text, resolve_deck_id, url)
+
+        title, cards, html_deck_id = await self.parse_pool.run(
+            extract_deck_page,
+            response.content,
+            response.encoding,
+            self.html_backend.name,
+            self.partial_parse,
+            resolve_deck_id,
+            url,
+        )
+        self.logger.info(f"Parse pool extracted {len(cards)} flashcards from HTML")
+        return title, html_deck_id, lambda: to_flashcards(cards)
+
+    def _load_deck_page(
+            self, html: str, resolve_deck_id: bool, url: Optional[str] = None
+    ) -> Tuple[str, Optional[str], Callable[[], List[Flashcard]]]:
+        """The one deck-page parsing path, in-process and in pool workers."""
+        targets = DECK_PAGE_TARGETS + HTML_TARGETS if resolve_deck_id else DECK_PAGE_TARGETS
+        soup = self._parse_page(html, targets)
+        html_deck_id = self.deck_id_resolver.resolve_from_html(soup, url) if resolve_deck_id else None
+        index = ElementIndex(soup)
+        return self._extract_title(soup, index), html_deck_id, lambda: self._extract_flashcards_from_html(soup, index)
+
+    def _parse_deck_page(
+            self, html: str, resolve_deck_id: bool, url: Optional[str] = None
+    ) -> Tuple[str, List[CardTuple], Optional[str]]:
+        title, html_deck_id, flashcards = self._load_deck_page(html, resolve_deck_id, url)
+        return title, to_card_tuples(flashcards()), html_deck_id
+
+    def _parse_page(self, html: str, targets: Optional[Sequence[ElementTarget]]) -> BeautifulSoup:
+        # Without targets the caller needs the whole page
+        if self.partial_parse and targets:
+            return parse_targeted(self.html_backend, html, targets)
+        return self.html_backend.parse(html)
+
+    def _extract_title(self, soup: BeautifulSoup, index: Optional[ElementIndex] = None) -> str:
+        index = index or ElementIndex(soup)
         # Try different potential title elements
         title_element = (
-                soup.find("h1", class_="deck-title") or
-                soup.find("h1") or
-                soup.find("title") or
-                soup.find("meta", property="og:title")
+                index.find(soup, "h1", "deck-title") or
+                index.find(soup, "h1") or
+                index.find(soup, "title") or
+                index.find(soup, "meta", attrs={"property": "og:title"})
         )
 
         if title_element:
@@ -78,12 +603,36 @@ class BrainscapeScraper(ScraperInterface):
         self.logger.warning("Could not find title, using default")
         return "Brainscape Deck"
 
+    def _deck_source_id(self, url: str) -> str:
+        # Names the deck's notes and export manifest, so it comes from the
+        # URL alone: a slug keeps its key once it resolves to a numeric ID
+        normalized = normalize_url(url)
+        return self._extract_deck_id(normalized) or self._extract_deck_id(url) or normalized
+
+    def _known_deck_id(self, url: str) -> Optional[str]:
+        # Slug URLs resolved on an earlier run go straight to the numeric ID
+        deck_id = self._extract_deck_id(url)
+        if deck_id and not deck_id.isdigit():
+            return self.deck_id_resolver.lookup(url) or deck_id
+        return deck_id
+
+    def _resolve_deck_id(self, url: str, html_deck_id: Optional[str]) -> Optional[str]:
+        deck_id = html_deck_id or self.deck_id_resolver.resolve_from_slug(url)
+        if deck_id:
+            self.logger.info(f"Resolved numeric deck ID {deck_id} for {url}")
+            self.deck_id_resolver.remember(url, deck_id)
+        return deck_id
+
+    def _extract_pack_id(self, url: str) -> Optional[str]:
+        match = re.search(rf"{self._host_pattern}/packs/(?:[^/?#]*-)?(\d+)(?:[/?#]|$)", url)
+        return match.group(1) if match else None
+
     def _extract_deck_id(self, url: str) -> Optional[str]:
         # Try multiple patterns to match deck IDs
         patterns = [
-            r"brainscape\.com/(?:decks|packs)/(\d+)",
-            r"brainscape\.com/learn/(\d+)",
-            r"brainscape\.com/flashcards/([^/]+)",
+            rf"{self._host_pattern}/decks/(\d+)",
+            rf"{self._host_pattern}/learn/(\d+)",
+            rf"{self._host_pattern}/flashcards/([^/]+)",
             r"id=(\d+)"
         ]
 
@@ -91,182 +640,338 @@ class BrainscapeScraper(ScraperInterface):
             match = re.search(pattern, url)
             if match:
                 return match.group(1)
-
-        self.logger.warning("Could not extract deck ID from URL")
-        # If we can't extract an ID, we'll use a timestamp as a fallback
-        return f"unknown-{asyncio.get_event_loop().time()}"
+        return None
 
     async def _extract_flashcards(
-            self, client: httpx.AsyncClient, deck_id: str, soup: BeautifulSoup = None
+            self,
+            client: httpx.AsyncClient,
+            deck_id: Optional[str],
+            html_flashcards: Optional[Callable[[], List[Flashcard]]] = None,
     ) -> List[Flashcard]:
         self.logger.info("Attempting to extract flashcards...")
 
-        # First try to use API if available
+        # First try to use API if available; it only knows numeric deck IDs
+        if deck_id and deck_id.isdigit():
+            api_flashcards = await self._fetch_api_flashcards(client, deck_id)
+            if api_flashcards is not None:
+                return api_flashcards
+        else:
+            self.logger.info(f"Deck ID '{deck_id}' is not numeric, skipping API extraction")
+
+        # If API fails and the page was parsed, use HTML extraction
+        if html_flashcards is not None:
+            self.logger.info("Attempting HTML extraction")
+            return html_flashcards()
+        elif deck_id:
+            self.logger.info("Attempting fallback extraction by loading study page")
+            return await self._fallback_extraction(client, deck_id)
+        return []
+
+    async def _fetch_api_flashcards(
+            self, client: httpx.AsyncClient, deck_id: str
+    ) -> Optional[List[Flashcard]]:
+        # Skip the API entirely while it has been failing for everyone
+        breaker = self.breakers[CARDS_API_ENDPOINT]
+        if not breaker.allow_request():
+            self.logger.info("Cards API circuit is open, skipping API extraction")
+            return None
+
         try:
             self.logger.info(f"Trying API extraction for deck {deck_id}")
-            api_url = f"https://www.brainscape.com/api/decks/{deck_id}/cards"
-            response = await client.get(api_url)
-            response.raise_for_status()
+            api_url = f"{self.base_url}/api/decks/{deck_id}/cards"
+            flashcards = await self._fetch_paginated_api_flashcards(client, api_url)
+            breaker.record_success()
 
-            cards_data = response.json()
-            self.logger.info(f"API returned {len(cards_data)} cards")
-            return self._parse_cards_data(cards_data)
+            self.logger.info(f"API returned {len(flashcards)} cards")
+            return flashcards
         except (httpx.HTTPError, asyncio.TimeoutError, ValueError) as e:
+            self._record_endpoint_failure(breaker, e)
             self.logger.warning(f"API extraction failed: {str(e)}, trying fallback...")
+            return None
 
-        # If API fails or soup is provided, use HTML extraction
-        if soup:
-            self.logger.info("Attempting HTML extraction")
-            return self._extract_flashcards_from_html(soup)
-        else:
-            self.logger.info("Attempting fallback extraction by loading study page")
-            return await self._fallback_extraction(client, deck_id)
+    async def _fetch_paginated_api_flashcards(
+            self, client: httpx.AsyncClient, api_url: str
+    ) -> List[Flashcard]:
+        # A bare array means the whole deck came back in one response. A
+        # wrapped {"cards": [...], ...} page that reveals the total lets us
+        # request every remaining page at once; the rate limiter still
+        # governs how many actually hit the host concurrently
+        metadata: Dict[str, Any] = {}
+        first_url = self._api_page_url(api_url, page=1) if self.api_page_size else api_url
+
+        async def fetch_first_page() -> List[Flashcard]:
+            metadata.clear()
+            return await self._collect(self._iter_api_flashcards(client, first_url, metadata))
+
+        flashcards = await retry_async(fetch_first_page, self.retry_policy)
+
+        page_urls = self._remaining_api_page_urls(api_url, metadata, len(flashcards))
+        if not page_urls:
+            return flashcards
+
+        self.logger.info(f"Fetching {len(page_urls)} more API pages concurrently")
+        semaphore = asyncio.Semaphore(self.api_page_concurrency)
+
+        async def fetch_page(page_url: str) -> List[Flashcard]:
+            async with semaphore:
+                return await retry_async(
+                    lambda: self._collect(self._iter_api_flashcards(client, page_url)),
+                    self.retry_policy,
+                )
 
-    def _parse_cards_data(self, cards_data: List[Dict]) -> List[Flashcard]:
-        flashcards = []
+        # gather keeps the pages in request order, whatever order they finish in
+        pages = await asyncio.gather(*(fetch_page(page_url) for page_url in page_urls))
+        for page in pages:
+            flashcards.extend(page)
+        return flashcards
 
-        for i, card in enumerate(cards_data):
-            self.logger.info(f"Processing API card {i + 1}/{len(cards_data)}")
-            if "question" in card and "answer" in card:
-                front = self._clean_html(card["question"])
-                back = self._clean_html(card["answer"])
-                flashcards.append(Flashcard(front=front, back=back))
-            else:
-                self.logger.warning(f"Card {i + 1} missing question or answer: {card.keys()}")
+    def _remaining_api_page_urls(
+            self, api_url: str, metadata: Dict[str, Any], first_page_count: int
+    ) -> List[str]:
+        if not metadata:
+            return []
 
-        return flashcards
+        def as_int(*keys: str) -> Optional[int]:
+            for key in keys:
+                try:
+                    return int(metadata[key])
+                except (KeyError, TypeError, ValueError):
+                    continue
+            return None
+
+        page_size = as_int("per_page", "page_size", "limit") or self.api_page_size or first_page_count
+        total = as_int("total", "total_count", "count")
+        total_pages = as_int("total_pages", "pages")
+        if not page_size:
+            return []
+
+        if "offset" in metadata:
+            if total is None:
+                return []
+            offset = (as_int("offset") or 0) + page_size
+            return [
+                self._api_page_url(api_url, offset=start, limit=page_size)
+                for start in range(offset, total, page_size)
+            ]
+
+        if total_pages is None and total is not None:
+            total_pages = math.ceil(total / page_size)
+        if not total_pages:
+            return []
+
+        current_page = as_int("page", "current_page") or 1
+        return [
+            self._api_page_url(api_url, page=page, per_page=page_size)
+            for page in range(current_page + 1, total_pages + 1)
+        ]
+
+    def _api_page_url(self, api_url: str, **params: int) -> str:
+        if "page" in params and "per_page" not in params and self.api_page_size:
+            params["per_page"] = self.api_page_size
+        return str(httpx.URL(api_url).copy_merge_params(params))
+
+    async def _iter_api_flashcards(
+            self, client: httpx.AsyncClient, api_url: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Flashcard]:
+        # Decode the cards array item by item as it streams in, so neither the
+        # raw payload nor the full list of card dicts is ever held in memory
+        async with client.stream("GET", api_url) as response:
+            response.raise_for_status()
+
+            i = 0
+            async for card in iter_json_array(response.aiter_text(), metadata=metadata):
+                flashcard = self._parse_card(card, i)
+                i += 1
+                if flashcard is not None:
+                    yield flashcard
+
+    @staticmethod
+    async def _collect(flashcards: AsyncIterator[Flashcard]) -> List[Flashcard]:
+        return [flashcard async for flashcard in flashcards]
+
+    async def _fetch_json(self, client: httpx.AsyncClient, url: str):
+        response = await client.get(url)
+        response.raise_for_status()
+        return response.json()
+
+    def _record_endpoint_failure(self, breaker: CircuitBreaker, error: BaseException) -> None:
+        # A 404 or malformed payload for one deck says nothing about the
+        # endpoint's health; only outages and auth failures count against it
+        if is_transient_error(error) or (
+                isinstance(error, httpx.HTTPStatusError)
+                and error.response.status_code in (401, 403)
+        ):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def _parse_card(self, card: Dict, i: int) -> Optional[Flashcard]:
+        if isinstance(card, dict) and "question" in card and "answer" in card:
+            front = self._clean_html(card["question"])
+            back = self._clean_html(card["answer"])
+            media = media_in_markup(card["question"], FRONT) + media_in_markup(card["answer"], BACK)
+            return Flashcard(front=front, back=back, media=media)
+
+        keys = list(card.keys()) if isinstance(card, dict) else type(card).__name__
+        self.logger.warning(f"Card {i + 1} missing question or answer: {keys}")
+        return None
 
-    def _extract_flashcards_from_html(self, soup: BeautifulSoup) -> List[Flashcard]:
+    def _extract_flashcards_from_html(
+            self, soup: BeautifulSoup, index: Optional[ElementIndex] = None
+    ) -> List[Flashcard]:
         flashcards = []
+        index = index or ElementIndex(soup)
 
         # Look for flashcard rows
-        flashcard_rows = soup.find_all("div", class_="flashcard-row")
+        flashcard_rows = index.find_all(soup, "div", "flashcard-row")
         self.logger.info(f"Found {len(flashcard_rows)} flashcard rows in HTML")
 
         for i, row in enumerate(flashcard_rows):
             self.logger.info(f"Processing HTML card {i + 1}/{len(flashcard_rows)}")
-
-            # Try to extract from full card layout
-            if "full-card" in row.get("class", []):
-                # First method: Check for question-contents and answer-contents
-                question_div = row.find("div", class_="question-contents")
-                answer_div = row.find("div", class_="answer-contents")
-
-                if question_div and answer_div:
-                    # If found, extract from main-fields-container
-                    q_container = question_div.find("div", class_="main-fields-container")
-                    a_container = answer_div.find("div", class_="main-fields-container")
-
-                    if q_container and a_container:
-                        front = self._clean_html(q_container.get_text())
-                        back = self._clean_html(a_container.get_text())
-                        flashcards.append(Flashcard(front=front, back=back))
-                        continue
-
-            # Alternative method: card-face classes
-            question = row.find("div", class_="card-face question")
-            answer = row.find("div", class_="card-face answer")
-
-            if question and answer:
-                # Try to extract from answer-content/question-content
-                q_content = question.find("div", class_="question-content")
-                a_content = answer.find("div", class_="answer-content")
-
-                if q_content and a_content:
-                    front = self._clean_html(q_content.get_text())
-                    back = self._clean_html(a_content.get_text())
-                    flashcards.append(Flashcard(front=front, back=back))
-                else:
-                    # Or directly from the card-face
-                    front = self._clean_html(question.get_text())
-                    back = self._clean_html(answer.get_text())
-                    flashcards.append(Flashcard(front=front, back=back))
-            else:
-                # Try to find questions and answers by looking for Q/A indicators
-                q_indicator = row.find("div", class_="flashcard-type-indicator", text="Q")
-                a_indicator = row.find("div", class_="flashcard-type-indicator", text="A")
-
-                if q_indicator and a_indicator:
-                    # Navigate up to the parent container then find the content
-                    q_header = q_indicator.parent
-                    a_header = a_indicator.parent
-
-                    if q_header and a_header:
-                        q_content = q_header.find_next_sibling("div", class_="main-fields-container")
-                        a_content = a_header.find_next_sibling("div", class_="main-fields-container")
-
-                        if q_content and a_content:
-                            front = self._clean_html(q_content.get_text())
-                            back = self._clean_html(a_content.get_text())
-                            flashcards.append(Flashcard(front=front, back=back))
-
-            # If we still haven't found a card, look for scf-face divs
-            if not (question and answer):
-                scf_faces = row.find_all("div", class_="scf-face")
-                if len(scf_faces) >= 2:
-                    front = self._clean_html(scf_faces[0].get_text())
-                    back = self._clean_html(scf_faces[1].get_text())
-                    flashcards.append(Flashcard(front=front, back=back))
+            flashcards.extend(self._extract_flashcards_from_row(row, index))
 
         self.logger.info(f"Extracted {len(flashcards)} flashcards from HTML")
         return flashcards
 
+    def _extraction_strategies(self) -> List[ExtractionStrategy]:
+        # Declared in the order the layouts have always been tried in; the
+        # first that applies to a row wins
+        return [
+            ExtractionStrategy(
+                "full_card",
+                self._extract_full_card,
+                frozenset({"full-card", "question-contents", "answer-contents", "main-fields-container"}),
+            ),
+            ExtractionStrategy(
+                "card_face",
+                self._extract_card_face,
+                frozenset({"card-face", "question", "answer"}),
+            ),
+            ExtractionStrategy(
+                "type_indicator",
+                self._extract_type_indicator,
+                frozenset({"flashcard-type-indicator", "main-fields-container"}),
+            ),
+            ExtractionStrategy("scf_face", self._extract_scf_face, frozenset({"scf-face"})),
+        ]
+
+    def _extract_flashcards_from_row(self, row, index: ElementIndex) -> List[Flashcard]:
+        return self.strategy_registry.extract(row, index) or []
+
+    def _extract_full_card(self, row, index: ElementIndex) -> Optional[List[Flashcard]]:
+        if "full-card" not in row.get("class", []):
+            return None
+
+        # Check for question-contents and answer-contents
+        question_div = index.find(row, "div", "question-contents")
+        answer_div = index.find(row, "div", "answer-contents")
+
+        if question_div and answer_div:
+            # If found, extract from main-fields-container
+            q_container = index.find(question_div, "div", "main-fields-container")
+            a_container = index.find(answer_div, "div", "main-fields-container")
+
+            if q_container and a_container:
+                front = self._clean_html(q_container.get_text())
+                back = self._clean_html(a_container.get_text())
+                return [Flashcard(front=front, back=back, media=card_media(q_container, a_container, index))]
+        return None
+
+    def _extract_card_face(self, row, index: ElementIndex) -> Optional[List[Flashcard]]:
+        question = index.find(row, "div", "card-face question")
+        answer = index.find(row, "div", "card-face answer")
+        if not (question and answer):
+            return None
+
+        # Try to extract from answer-content/question-content
+        q_content = index.find(question, "div", "question-content")
+        a_content = index.find(answer, "div", "answer-content")
+
+        if q_content and a_content:
+            front = self._clean_html(q_content.get_text())
+            back = self._clean_html(a_content.get_text())
+            media = card_media(q_content, a_content, index)
+        else:
+            # Or directly from the card-face
+            front = self._clean_html(question.get_text())
+            back = self._clean_html(answer.get_text())
+            media = card_media(question, answer, index)
+        return [Flashcard(front=front, back=back, media=media)]
+
+    def _extract_type_indicator(self, row, index: ElementIndex) -> Optional[List[Flashcard]]:
+        # Find questions and answers by looking for Q/A indicators
+        q_indicator = index.find(row, "div", "flashcard-type-indicator", string="Q")
+        a_indicator = index.find(row, "div", "flashcard-type-indicator", string="A")
+        if not (q_indicator and a_indicator):
+            return None
+
+        # Navigate up to the parent container then find the content
+        q_header = q_indicator.parent
+        a_header = a_indicator.parent
+        if not (q_header and a_header):
+            return None
+
+        q_content = q_header.find_next_sibling("div", class_="main-fields-container")
+        a_content = a_header.find_next_sibling("div", class_="main-fields-container")
+        if not (q_content and a_content):
+            return None
+
+        front = self._clean_html(q_content.get_text())
+        back = self._clean_html(a_content.get_text())
+        flashcard = Flashcard(front=front, back=back, media=card_media(q_content, a_content, index))
+        # Rows with indicators have always had their scf-face card kept too
+        return [flashcard] + (self._extract_scf_face(row, index) or [])
+
+    def _extract_scf_face(self, row, index: ElementIndex) -> Optional[List[Flashcard]]:
+        scf_faces = index.find_all(row, "div", "scf-face")
+        if len(scf_faces) < 2:
+            return None
+        front = self._clean_html(scf_faces[0].get_text())
+        back = self._clean_html(scf_faces[1].get_text())
+        return [Flashcard(front=front, back=back, media=card_media(scf_faces[0], scf_faces[1], index))]
+
     async def _fallback_extraction(
             self, client: httpx.AsyncClient, deck_id: str
     ) -> List[Flashcard]:
         self.logger.info(f"Performing fallback extraction for deck {deck_id}")
 
+        breaker = self.breakers[STUDY_PAGE_ENDPOINT]
+        if not breaker.allow_request():
+            self.logger.error("Study page circuit is open, skipping fallback extraction")
+            return []
+
         try:
             # Try study page
-            study_url = f"https://www.brainscape.com/study?deck_id={deck_id}"
+            study_url = f"{self.base_url}/study?deck_id={deck_id}"
             self.logger.info(f"Accessing study URL: {study_url}")
 
             response = await client.get(study_url)
             response.raise_for_status()
+            breaker.record_success()
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            return self._extract_flashcards_from_html(soup)
+            _, _, html_flashcards = await self._read_deck_page(response)
+            return html_flashcards()
         except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            self._record_endpoint_failure(breaker, e)
             self.logger.error(f"Fallback extraction failed: {str(e)}")
             return []
 
-    def _extract_front_back(self, card_element) -> Optional[Tuple[str, str]]:
-        # Try multiple selector patterns to find question/answer content
-        front_element = (
-                card_element.find("div", class_="front") or
-                card_element.find("div", class_="question") or
-                card_element.find("div", class_="question-content") or
-                card_element.find("div", class_="card-face question")
-        )
-
-        back_element = (
-                card_element.find("div", class_="back") or
-                card_element.find("div", class_="answer") or
-                card_element.find("div", class_="answer-content") or
-                card_element.find("div", class_="card-face answer")
-        )
-
-        if front_element and back_element:
-            front = self._clean_html(front_element.text)
-            back = self._clean_html(back_element.text)
-            return front, back
-
-        return None
-
     def _clean_html(self, html_content: str) -> str:
         # Clean HTML content to get plain text
-        if not html_content:
-            return ""
+        return self.text_cleaner.clean(html_content)
 
-        # First parse with BeautifulSoup if it's HTML
-        if "<" in html_content and ">" in html_content:
-            soup = BeautifulSoup(html_content, "html.parser")
-            text = soup.get_text()
-        else:
-            text = html_content
 
-        # Clean up whitespace and line breaks
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
+# Extraction-only scrapers of a parse pool worker, one per configuration
+_worker_scrapers: Dict[Tuple[str, bool], BrainscapeScraper] = {}
+
 
-        return text
\ No newline at end of file
+def extract_deck_page(
+        data: bytes, encoding: Optional[str], backend: str, partial_parse: bool, resolve_deck_id: bool,
+        url: Optional[str] = None
+) -> Tuple[str, List[CardTuple], Optional[str]]:
+    """Parse pool job: title, cards and, if asked, numeric deck ID of a page."""
+    scraper = _worker_scrapers.get((backend, partial_parse))
+    if scraper is None:
+        scraper = BrainscapeScraper(html_backend=get_backend(backend), partial_parse=partial_parse)
+        _worker_scrapers[(backend, partial_parse)] = scraper
+    return scraper._parse_deck_page(decode_page(data, encoding), resolve_deck_id, url)
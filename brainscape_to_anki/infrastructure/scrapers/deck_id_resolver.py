@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from bs4 import BeautifulSoup
+
+from brainscape_to_anki.infrastructure.parsing.targets import ElementTarget
+from brainscape_to_anki.infrastructure.paths import default_cache_dir
+
+SLUG_PATTERN = re.compile(r"/flashcards/([^/?#]+)")
+DECK_URL_PATTERN = re.compile(r"/decks/(\d+)")
+SLUG_ID_PATTERN = re.compile(r"-(\d{3,})$")
+SCRIPT_ID_PATTERN = re.compile(r"[\"']?deck_?[iI]d[\"']?\s*[:=]\s*[\"']?(\d+)")
+# Characters around a deck ID in a script searched for the page's own slug
+SCRIPT_SLUG_WINDOW = 200
+
+# Elements resolve_from_html() looks at, for partial page parses
+HTML_TARGETS = (
+    ElementTarget(attribute="data-deck-id"),
+    ElementTarget("meta", "name", "deck_id"),
+    ElementTarget("meta", "name", "deck-id"),
+    ElementTarget("meta", "name", "deckId"),
+    ElementTarget("link", "rel", "canonical"),
+    ElementTarget("meta", "property", "og:url"),
+    ElementTarget("script"),
+)
+
+
+class DeckIdResolver:
+    """Finds numeric deck IDs for slug URLs and remembers them on disk.
+
+    The slug -> ID index is a small JSON file, so a slug only ever costs a
+    page load once; later scrapes go straight to the cards API.
+    """
+
+    def __init__(self, index_path: Optional[Path] = None):
+        self.logger = logging.getLogger(__name__)
+        self.index_path = Path(index_path) if index_path else default_cache_dir() / "deck_ids.json"
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, str]] = None
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        match = SLUG_PATTERN.search(url)
+        if match:
+            return match.group(1)
+        return url.split("#")[0].rstrip("/")
+
+    def lookup(self, url: str) -> Optional[str]:
+        with self._lock:
+            return self._load().get(self.key_for(url))
+
+    def remember(self, url: str, deck_id: str) -> None:
+        key = self.key_for(url)
+        with self._lock:
+            index = self._load()
+            if index.get(key) == deck_id:
+                return
+            index[key] = deck_id
+            self._save(index)
+        self.logger.info(f"Remembered deck ID {deck_id} for '{key}'")
+
+    def resolve_from_html(self, soup: BeautifulSoup, url: Optional[str] = None) -> Optional[str]:
+        """Numeric ID of the deck a page is about, if the page says so.
+
+        Deck pages also list related decks and packs, each with an ID of its
+        own, and a wrong ID would be remembered for every later scrape. So
+        the canonical URL, ``og:url`` and the deck ID meta tags come first,
+        then a ``data-deck-id`` on the element holding the card rows, and
+        last a deck ID in a script only if it agrees with the slug of ``url``.
+        """
+        for element in (
+                soup.find("link", rel="canonical"),
+                soup.find("meta", property="og:url"),
+        ):
+            if element is None:
+                continue
+            target = element.get("href") or element.get("content") or ""
+            match = DECK_URL_PATTERN.search(target)
+            if match:
+                return match.group(1)
+            slug_id = self.resolve_from_slug(target)
+            if slug_id:
+                return slug_id
+
+        for name in ("deck_id", "deck-id", "deckId"):
+            meta = soup.find("meta", attrs={"name": name})
+            if meta and str(meta.get("content", "")).strip().isdigit():
+                return meta["content"].strip()
+
+        for element in soup.find_all(attrs={"data-deck-id": True}):
+            value = str(element["data-deck-id"]).strip()
+            if value.isdigit() and (element.name in ("html", "body") or element.find("div", class_="flashcard-row")):
+                return value
+
+        return self._resolve_from_scripts(soup, url) if url else None
+
+    def _resolve_from_scripts(self, soup: BeautifulSoup, url: str) -> Optional[str]:
+        slug_match = SLUG_PATTERN.search(url)
+        slug = slug_match.group(1) if slug_match else None
+        slug_id = self.resolve_from_slug(url)
+        for script in soup.find_all("script"):
+            text = script.string or ""
+            for match in SCRIPT_ID_PATTERN.finditer(text):
+                if match.group(1) == slug_id:
+                    return slug_id
+                window = text[max(0, match.start() - SCRIPT_SLUG_WINDOW):match.end() + SCRIPT_SLUG_WINDOW]
+                if slug and slug in window:
+                    return match.group(1)
+        return None
+
+    @staticmethod
+    def resolve_from_slug(url: str) -> Optional[str]:
+        # Deck slugs usually end in the numeric ID: /flashcards/<name>-<id>
+        match = SLUG_PATTERN.search(url)
+        if not match:
+            return None
+        id_match = SLUG_ID_PATTERN.search(match.group(1))
+        return id_match.group(1) if id_match else None
+
+    def _load(self) -> Dict[str, str]:
+        if self._index is None:
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as index_file:
+                    self._index = json.load(index_file)
+            except FileNotFoundError:
+                self._index = {}
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Ignoring unreadable deck ID index: {str(e)}")
+                self._index = {}
+        return self._index
+
+    def _save(self, index: Dict[str, str]) -> None:
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as index_file:
+                json.dump(index, index_file, indent=0, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            self.logger.warning(f"Could not save deck ID index: {str(e)}")
@@ -0,0 +1,120 @@
+from html import escape
+from html.parser import HTMLParser
+from typing import List, Optional
+
+VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+})
+
+DEFAULT_TITLE = "Brainscape Deck"
+
+
+class FlashcardRowStreamParser(HTMLParser):
+    """Incremental parser that cuts a page into ``flashcard-row`` fragments.
+
+    Feed it decoded chunks as they arrive; every call returns the markup of
+    the rows that were closed by that chunk, so each row can be parsed on its
+    own while the rest of the page is still downloading. Title candidates
+    are recorded on the way, using the same precedence as the full-tree
+    extractor (``h1.deck-title``, first ``h1``, ``title``, ``og:title``).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._completed: List[str] = []
+        self._row_parts: Optional[List[str]] = None
+        self._row_depth = 0
+
+        self._deck_title: Optional[str] = None
+        self._first_h1: Optional[str] = None
+        self._title_tag: Optional[str] = None
+        self._og_title: Optional[str] = None
+        self._capture: Optional[str] = None
+        self._capture_is_deck_title = False
+        self._capture_parts: List[str] = []
+
+    def feed_chunk(self, chunk: str) -> List[str]:
+        self.feed(chunk)
+        return self._drain()
+
+    def finish(self) -> List[str]:
+        self.close()
+        return self._drain()
+
+    @property
+    def title(self) -> str:
+        if self._deck_title is not None:
+            return self._deck_title
+        if self._first_h1 is not None:
+            return self._first_h1
+        if self._title_tag is not None:
+            return self._title_tag
+        if self._og_title is not None:
+            return self._og_title
+        return DEFAULT_TITLE
+
+    @property
+    def has_title(self) -> bool:
+        return any(
+            candidate is not None
+            for candidate in (self._deck_title, self._first_h1, self._title_tag, self._og_title)
+        )
+
+    def _drain(self) -> List[str]:
+        completed, self._completed = self._completed, []
+        return completed
+
+    def handle_starttag(self, tag, attrs):
+        classes = (dict(attrs).get("class") or "").split()
+
+        if self._row_parts is not None:
+            self._row_parts.append(self.get_starttag_text())
+            if tag == "div":
+                self._row_depth += 1
+        elif tag == "div" and "flashcard-row" in classes:
+            self._row_parts = [self.get_starttag_text()]
+            self._row_depth = 1
+
+        if tag in ("h1", "title") and self._capture is None:
+            self._capture = tag
+            self._capture_is_deck_title = tag == "h1" and "deck-title" in classes
+            self._capture_parts = []
+        elif tag == "meta" and self._og_title is None:
+            attributes = dict(attrs)
+            if attributes.get("property") == "og:title":
+                self._og_title = (attributes.get("content") or "").strip()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in VOID_ELEMENTS or self._row_parts is None:
+            self.handle_starttag(tag, attrs)
+            return
+        self._row_parts.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if self._capture == tag:
+            text = "".join(self._capture_parts).strip()
+            if tag == "h1":
+                if self._capture_is_deck_title and self._deck_title is None:
+                    self._deck_title = text
+                if self._first_h1 is None:
+                    self._first_h1 = text
+            elif self._title_tag is None:
+                self._title_tag = text
+            self._capture = None
+
+        if self._row_parts is None or tag in VOID_ELEMENTS:
+            return
+
+        self._row_parts.append(f"</{tag}>")
+        if tag == "div":
+            self._row_depth -= 1
+            if self._row_depth == 0:
+                self._completed.append("".join(self._row_parts))
+                self._row_parts = None
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._capture_parts.append(data)
+        if self._row_parts is not None:
+            self._row_parts.append(escape(data, quote=False))
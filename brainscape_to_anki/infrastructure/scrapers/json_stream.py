@@ -0,0 +1,149 @@
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+async def iter_json_array(
+        chunks: AsyncIterator[str],
+        wrapper_key: Optional[str] = "cards",
+        metadata: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[Any]:
+    """Yield the items of a streamed JSON array one at a time.
+
+    Only the unparsed tail of the document is buffered, so memory stays
+    bounded by the largest single item rather than the whole payload. The
+    array is either the document itself or, in a top-level object, the list
+    under ``wrapper_key``; the object's other keys (e.g. paging information)
+    are copied into ``metadata`` as they are read, so keys that follow the
+    list are only there once every item has been yielded.
+    """
+    buffer = ""
+    pos = 0
+    exhausted = False
+    # Length of the tail the last decode attempt failed on
+    failed_at = 0
+    chunk_iter = chunks.__aiter__()
+
+    async def read_more() -> bool:
+        nonlocal buffer, pos, exhausted
+        try:
+            chunk = await chunk_iter.__anext__()
+        except StopAsyncIteration:
+            exhausted = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    async def skip_whitespace() -> bool:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if not await read_more():
+                return False
+
+    async def decode_value() -> Any:
+        nonlocal pos, failed_at
+        while True:
+            # Re-decoding a partial value after every small chunk would be
+            # quadratic, so wait until the tail has doubled since the last try
+            remaining = len(buffer) - pos
+            if remaining < 2 * failed_at and not exhausted:
+                await read_more()
+                continue
+
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise ValueError("Truncated or invalid JSON document")
+                failed_at = remaining
+                await read_more()
+                continue
+
+            # A number cut off by the end of the buffer ("6." or "6.5e") still
+            # decodes, as its first part
+            failed_at = 0
+            if isinstance(value, (int, float)) and not exhausted and (
+                    end == len(buffer) or buffer[end] in _NUMBER_CHARS
+            ) and await read_more():
+                continue
+            pos = end
+            return value
+
+    async def array_items() -> AsyncIterator[Any]:
+        nonlocal pos
+        pos += 1
+        expect_item = True
+        while True:
+            if not await skip_whitespace():
+                raise ValueError("Unterminated JSON array")
+
+            char = buffer[pos]
+            if char == "]":
+                pos += 1
+                return
+            if char == "," and not expect_item:
+                pos += 1
+                expect_item = True
+                continue
+            if not expect_item:
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+
+            item = await decode_value()
+            expect_item = False
+            yield item
+
+    if not await skip_whitespace():
+        raise ValueError("Empty JSON document")
+
+    if buffer[pos] == "[":
+        async for item in array_items():
+            yield item
+        return
+
+    if buffer[pos] != "{":
+        raise ValueError(f"Expected a JSON array, got {buffer[pos]!r}")
+    pos += 1
+
+    found = False
+    expect_member = True
+    while True:
+        if not await skip_whitespace():
+            raise ValueError("Unterminated JSON object")
+
+        char = buffer[pos]
+        if char == "}":
+            break
+        if char == "," and not expect_member:
+            pos += 1
+            expect_member = True
+            continue
+        if not expect_member or char != '"':
+            raise ValueError(f"Expected a key in JSON object, got {char!r}")
+
+        key = await decode_value()
+        if not await skip_whitespace() or buffer[pos] != ":":
+            raise ValueError(f"Expected ':' after key {key!r} in JSON object")
+        pos += 1
+        if not await skip_whitespace():
+            raise ValueError("Unterminated JSON object")
+
+        if key == wrapper_key and buffer[pos] == "[" and not found:
+            found = True
+            async for item in array_items():
+                yield item
+        else:
+            value = await decode_value()
+            if metadata is not None and key != wrapper_key:
+                metadata[key] = value
+        expect_member = False
+
+    if not found:
+        raise ValueError(f"Expected a JSON array or an object with a '{wrapper_key}' list")
@@ -1,34 +1,63 @@
-import asyncio
 import logging
 import tkinter as tk
 from pathlib import Path
 from threading import Thread
 from tkinter import filedialog
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import customtkinter as ctk
 
+from brainscape_to_anki.application.services.batch_scheduler import BatchScheduler
+from brainscape_to_anki.application.services.card_deduplicator import CardDeduplicator, DedupConfig
 from brainscape_to_anki.application.use_cases.scrape_to_anki import ScrapeToAnkiUseCase
+from brainscape_to_anki.domain.interfaces.exporter import ExporterInterface
 from brainscape_to_anki.domain.models.deck import Deck
-from brainscape_to_anki.infrastructure.exporters.anki_exporter import AnkiExporter
+from brainscape_to_anki.infrastructure.exporters.ankiconnect_exporter import AnkiConnectExporter
+from brainscape_to_anki.infrastructure.exporters.delta_exporter import DeltaExporter, ManifestStore
+from brainscape_to_anki.infrastructure.parsing.html_import import DirectHtmlProcessor
+from brainscape_to_anki.infrastructure.parsing.process_pool import ParsePool
 from brainscape_to_anki.presentation.gui.components.simple_drop_zone import SimpleDropZone
-from brainscape_to_anki.presentation.gui.components.html_processor import DirectHtmlProcessor, HtmlImportWindow
+from brainscape_to_anki.presentation.gui.components.html_processor import HtmlImportWindow
 
 
 class MainWindow(tk.Tk):
-    def __init__(self, use_case: ScrapeToAnkiUseCase):
+    def __init__(
+            self,
+            use_case: ScrapeToAnkiUseCase,
+            max_concurrency: int = 8,
+            parse_pool: Optional[ParsePool] = None,
+            package_exporter: Optional[ExporterInterface] = None,
+            manifest_store: Optional[ManifestStore] = None,
+            ankiconnect_exporter: Optional[AnkiConnectExporter] = None,
+    ):
         super().__init__()
 
         self.logger = logging.getLogger(__name__)
         self.use_case = use_case
         self.output_dir = Path.home() / "Downloads"
         self.active_tasks: Dict[str, Dict] = {}
-        self.html_processor = DirectHtmlProcessor()
-        self.exporter = AnkiExporter()
+        self.merge_packs = False
+        self.parse_pool = parse_pool
+        self.html_processor = DirectHtmlProcessor(parse_pool=parse_pool)
+        # Same exporter and media store as the scraping jobs
+        self.exporter = use_case.export_service.exporter
+        self.csv_exporter = self.exporter
+        self.package_exporter = package_exporter
+        self.manifest_store = manifest_store
+        self.ankiconnect_exporter = ankiconnect_exporter
+        self.export_package = False
+        self.export_changes_only = False
+        self.send_to_anki = False
+
+        # One background event loop runs every scraping job, at most
+        # max_concurrency at a time, and owns the scraper's HTTP client
+        self.scheduler = BatchScheduler(max_concurrency=max_concurrency, lifespan=use_case)
+        self.scheduler.start()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
         self.title("Brainscape to Anki Converter")
-        self.geometry("600x500")
-        self.minsize(600, 500)
+        self.geometry("1120x500")
+        self.minsize(1120, 500)
 
         ctk.set_appearance_mode("System")
         ctk.set_default_color_theme("blue")
@@ -36,6 +65,14 @@ class MainWindow(tk.Tk):
         self._setup_ui()
         self.logger.info("Main window initialized")
 
+    def _on_close(self):
+        self.scheduler.shutdown(timeout=5)
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown(wait=False)
+        if self.ankiconnect_exporter is not None:
+            self.ankiconnect_exporter.close()
+        self.destroy()
+
     def _setup_ui(self):
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=0)
@@ -54,6 +91,9 @@ class MainWindow(tk.Tk):
         header_frame.grid_columnconfigure(0, weight=1)
         header_frame.grid_columnconfigure(1, weight=0)
         header_frame.grid_columnconfigure(2, weight=0)
+        header_frame.grid_columnconfigure(3, weight=0)
+        header_frame.grid_columnconfigure(4, weight=0)
+        header_frame.grid_columnconfigure(5, weight=0)
 
         title_label = ctk.CTkLabel(
             header_frame,
@@ -76,6 +116,82 @@ class MainWindow(tk.Tk):
         )
         output_button.grid(row=0, column=2, padx=10, pady=10, sticky="e")
 
+        self.merge_packs_checkbox = ctk.CTkCheckBox(
+            header_frame,
+            text="Merge decks",
+            command=self._toggle_merge_packs
+        )
+        self.merge_packs_checkbox.grid(row=0, column=3, padx=10, pady=10, sticky="e")
+
+        self.similar_cards_checkbox = ctk.CTkCheckBox(
+            header_frame,
+            text="Merge similar cards",
+            command=self._toggle_similar_cards
+        )
+        self.similar_cards_checkbox.grid(row=0, column=4, padx=10, pady=10, sticky="e")
+
+        if self.package_exporter is not None:
+            self.package_checkbox = ctk.CTkCheckBox(
+                header_frame,
+                text="Anki package",
+                command=self._toggle_package_export
+            )
+            self.package_checkbox.grid(row=0, column=5, padx=10, pady=10, sticky="e")
+
+        if self.manifest_store is not None:
+            self.changes_only_checkbox = ctk.CTkCheckBox(
+                header_frame,
+                text="Only changes",
+                command=self._toggle_changes_only
+            )
+            self.changes_only_checkbox.grid(row=0, column=6, padx=10, pady=10, sticky="e")
+
+        if self.ankiconnect_exporter is not None:
+            self.send_to_anki_checkbox = ctk.CTkCheckBox(
+                header_frame,
+                text="Send to Anki",
+                command=self._toggle_send_to_anki
+            )
+            self.send_to_anki_checkbox.grid(row=0, column=7, padx=10, pady=10, sticky="e")
+
+    def _toggle_merge_packs(self):
+        # Plain attribute so worker threads never have to touch Tk variables
+        self.merge_packs = bool(self.merge_packs_checkbox.get())
+        self.logger.info(f"Merge packs and dropped links into one file: {self.merge_packs}")
+
+    def _toggle_similar_cards(self):
+        # Each merge reads the deduplicator when it starts
+        near = bool(self.similar_cards_checkbox.get())
+        self.use_case.deck_merger.deduplicator = CardDeduplicator(DedupConfig(near=near))
+        self.logger.info(f"Merge reworded copies of cards in merged decks: {near}")
+
+    def _toggle_package_export(self):
+        self.export_package = bool(self.package_checkbox.get())
+        self._apply_exporter()
+
+    def _toggle_changes_only(self):
+        self.export_changes_only = bool(self.changes_only_checkbox.get())
+        self._apply_exporter()
+
+    def _toggle_send_to_anki(self):
+        self.send_to_anki = bool(self.send_to_anki_checkbox.get())
+        self._apply_exporter()
+
+    def _apply_exporter(self):
+        # Jobs read the exporter when they reach the export step, so the
+        # switch applies to every deck not exported yet
+        if self.send_to_anki:
+            exporter, destination = self.ankiconnect_exporter, "to Anki through AnkiConnect"
+        elif self.export_package:
+            exporter, destination = self.package_exporter, "Anki packages"
+        else:
+            exporter, destination = self.csv_exporter, "CSV"
+        if self.export_changes_only:
+            exporter = DeltaExporter(exporter, self.manifest_store)
+        self.exporter = exporter
+        self.use_case.export_service.exporter = exporter
+        self.logger.info(f"Exporting {destination}, only changes: {self.export_changes_only}")
+
     def _create_drop_zone(self):
         self.drop_zone = SimpleDropZone(
             self,
@@ -162,8 +278,12 @@ class MainWindow(tk.Tk):
                 source_id=content_id
             )
 
+            # Media downloads run on the scheduler loop, which owns the HTTP client
+            self._update_task_status_force(content_id, "Downloading media", "blue", 0.5)
+            deck = self.scheduler.submit(lambda deck=deck: self.use_case.fetch_media(deck)).result()
+
             # Export the deck
-            self._update_task_status_force(content_id, "Exporting to CSV", "blue", 0.7)
+            self._update_task_status_force(content_id, "Exporting", "blue", 0.7)
             output_path = self.exporter.export(deck, self.output_dir)
 
             # Update status
@@ -197,6 +317,11 @@ class MainWindow(tk.Tk):
         self.update_idletasks()  # Force UI update
 
     def _process_links(self, links: List[str]):
+        new_links = [link for link in dict.fromkeys(links) if link not in self.active_tasks]
+        if self.merge_packs and len(new_links) > 1:
+            self._process_merged_links(new_links)
+            return
+
         for link in links:
             if link not in self.active_tasks:
                 self.logger.info(f"Processing link: {link}")
@@ -206,12 +331,16 @@ class MainWindow(tk.Tk):
                     "status": "pending"
                 }
 
-                thread = Thread(
-                    target=self._run_scraping_task,
-                    args=(link,),
-                    daemon=True
+                self.scheduler.submit(
+                    lambda link=link: self._run_scraping_task(link)
                 )
-                thread.start()
+
+    def _process_merged_links(self, links: List[str]):
+        title = f"Merged {len(links)} links"
+        identifier = f"merged-{len(self.active_tasks)}-{title}"
+        self.logger.info(f"Processing {len(links)} links into one file")
+        self._create_task_frame(identifier, title)
+        self.scheduler.submit(lambda: self._run_merged_task(identifier, title, links))
 
     def _create_task_frame(self, identifier: str, display_text: str = None) -> ctk.CTkFrame:
         if display_text is None:
@@ -258,33 +387,35 @@ class MainWindow(tk.Tk):
 
         return link[:max_length - 3] + "..."
 
-    def _run_scraping_task(self, link: str):
+    async def _run_scraping_task(self, link: str):
         if link not in self.active_tasks:
             return
 
         self.active_tasks[link]["status"] = "processing"
         self._update_task_status_force(link, "Processing", "blue", 0.2)
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
         try:
             self.logger.info(f"Executing scraping task for: {link}")
-            result = loop.run_until_complete(
-                self.use_case.execute(link, self.output_dir)
+            pack_results = await self.use_case.execute_pack(
+                link, self.output_dir, merge=self.merge_packs
             )
+            if pack_results is not None:
+                self._report_pack_results(link, pack_results)
+                return
 
-            deck, output_path = result
+            # Cards go to the exporter as they are scraped, so a large deck
+            # never sits in memory whole
+            info, output_path = await self.use_case.execute_streaming(link, self.output_dir)
 
-            if deck and output_path:
+            if output_path:
                 self.active_tasks[link]["status"] = "completed"
                 self._update_task_status_force(
                     link,
-                    f"Completed: {len(deck.flashcards)} cards",
+                    f"Completed: {info.card_count} cards",
                     "green",
                     1.0
                 )
-                message = f"Task completed: {len(deck.flashcards)} cards exported to {output_path}"
+                message = f"Task completed: {info.card_count} cards exported to {output_path}"
                 self.logger.info(message)
                 self._update_status_bar(message)
             else:
@@ -299,8 +430,54 @@ class MainWindow(tk.Tk):
                 link, f"Error: {str(e)[:20]}...", "red", 0.0
             )
             self.logger.exception(f"Error during scraping task: {str(e)}")
-        finally:
-            loop.close()
+
+    async def _run_merged_task(self, identifier: str, title: str, links: List[str]):
+        self.active_tasks[identifier]["status"] = "processing"
+        self._update_task_status_force(identifier, "Processing", "blue", 0.2)
+
+        try:
+            deck, output_path = await self.use_case.execute_merged(title, links, self.output_dir)
+            if deck and output_path:
+                self.active_tasks[identifier]["status"] = "completed"
+                self._update_task_status_force(
+                    identifier,
+                    f"Completed: {len(deck.flashcards)} cards",
+                    "green",
+                    1.0
+                )
+                message = f"Merged {len(links)} links: {len(deck.flashcards)} cards exported to {output_path}"
+                self.logger.info(message)
+                self._update_status_bar(message)
+            else:
+                self.active_tasks[identifier]["status"] = "failed"
+                self._update_task_status_force(identifier, "Failed to scrape", "red", 0.0)
+                self.logger.error(f"Task failed: Could not scrape any of {len(links)} links")
+        except Exception as e:
+            self.active_tasks[identifier]["status"] = "error"
+            self._update_task_status_force(
+                identifier, f"Error: {str(e)[:20]}...", "red", 0.0
+            )
+            self.logger.exception(f"Error during merged scraping task: {str(e)}")
+
+    def _report_pack_results(self, link: str, results: List[Tuple[Deck, Optional[Path]]]):
+        exported = [(deck, path) for deck, path in results if path]
+        if not exported:
+            self.active_tasks[link]["status"] = "failed"
+            self._update_task_status_force(link, "Failed to scrape pack", "red", 0.0)
+            self.logger.error(f"Task failed: Could not scrape any deck of pack {link}")
+            return
+
+        card_count = sum(len(deck.flashcards) for deck, _ in exported)
+        self.active_tasks[link]["status"] = "completed"
+        self._update_task_status_force(
+            link,
+            f"Completed: {len(exported)} files, {card_count} cards",
+            "green",
+            1.0
+        )
+        message = f"Pack completed: {card_count} cards exported to {len(exported)} files in {self.output_dir}"
+        self.logger.info(message)
+        self._update_status_bar(message)
 
     def _update_task_status(
             self, identifier: str, status_text: str, status_color: str, progress: float
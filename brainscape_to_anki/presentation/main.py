@@ -17,6 +17,12 @@ from brainscape_to_anki.application.services.export_service import ExportService
 from brainscape_to_anki.application.services.scraper_service import ScraperService
 from brainscape_to_anki.application.use_cases.scrape_to_anki import ScrapeToAnkiUseCase
 from brainscape_to_anki.infrastructure.exporters.anki_exporter import AnkiExporter
+from brainscape_to_anki.infrastructure.exporters.ankiconnect_exporter import AnkiConnectExporter
+from brainscape_to_anki.infrastructure.exporters.apkg_exporter import ApkgExporter
+from brainscape_to_anki.infrastructure.exporters.delta_exporter import ManifestStore
+from brainscape_to_anki.infrastructure.media.pipeline import MediaPipeline
+from brainscape_to_anki.infrastructure.media.store import MediaStore
+from brainscape_to_anki.infrastructure.parsing.process_pool import ParsePool
 from brainscape_to_anki.infrastructure.scrapers.brainscape_scraper import BrainscapeScraper
 from brainscape_to_anki.presentation.gui.main_window import MainWindow
 
@@ -75,8 +81,15 @@ def check_package_structure():
 
 def setup_dependency_injection():
     logger.info("Setting up dependency injection...")
-    scraper = BrainscapeScraper()
-    exporter = AnkiExporter()
+    # Shared by the scraper and HTML imports; worker processes start on first use
+    parse_pool = ParsePool()
+    # One content-addressed store for every deck, so shared media downloads once
+    media_store = MediaStore()
+    scraper = BrainscapeScraper(parse_pool=parse_pool, media_pipeline=MediaPipeline(media_store))
+    exporter = AnkiExporter(media_store)
+    # Offered in the window as alternatives to CSV
+    package_exporter = ApkgExporter(media_store)
+    ankiconnect_exporter = AnkiConnectExporter(media_store=media_store)
 
     scraper_service = ScraperService(scraper)
     export_service = ExportService(exporter)
@@ -84,7 +97,7 @@ def setup_dependency_injection():
     use_case = ScrapeToAnkiUseCase(scraper_service, export_service)
     logger.info("Dependency injection complete")
 
-    return use_case
+    return use_case, parse_pool, package_exporter, ManifestStore(), ankiconnect_exporter
 
 
 def main():
@@ -95,7 +108,7 @@ def main():
         check_package_structure()
 
         # Setup dependencies
-        use_case = setup_dependency_injection()
+        use_case, parse_pool, package_exporter, manifest_store, ankiconnect_exporter = setup_dependency_injection()
 
         # Configure customtkinter
         ctk.set_appearance_mode("System")
@@ -103,7 +116,13 @@ def main():
 
         # Start the application
         logger.info("Initializing main window...")
-        app = MainWindow(use_case)
+        app = MainWindow(
+            use_case,
+            parse_pool=parse_pool,
+            package_exporter=package_exporter,
+            manifest_store=manifest_store,
+            ankiconnect_exporter=ankiconnect_exporter,
+        )
         logger.info("Starting main event loop...")
         app.mainloop()
     except Exception as e:
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+from pathlib import Path
+from typing import List
+
+from brainscape_to_anki.devtools.mock_ankiconnect import MockAnkiConnectServer
+from brainscape_to_anki.domain.interfaces.exporter import DeckWriter, ExporterInterface
+from brainscape_to_anki.domain.models.deck import Deck, DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import FRONT, IMAGE, MediaRef
+from brainscape_to_anki.infrastructure.exporters.ankiconnect_exporter import AnkiConnectConfig, AnkiConnectExporter
+from brainscape_to_anki.infrastructure.exporters.delta_exporter import DeltaExporter, ManifestStore
+
+URL = "https://example.com/decks/1"
+
+
+def test_changed_tags_update_the_note(tmp_path: Path):
+    with MockAnkiConnectServer() as server:
+        exporter = AnkiConnectExporter(AnkiConnectConfig(url=server.url))
+        try:
+            exporter.export(Deck("Deck", [Flashcard("Q", "A", tags=("old",))], URL), tmp_path)
+            report_path = exporter.export(Deck("Deck", [Flashcard("Q", "A", tags=("new",))], URL), tmp_path)
+        finally:
+            exporter.close()
+
+        assert [note["tags"] for note in server.notes("Deck")] == [["new"]]
+        assert server.stats().get("updateNoteFields", 0) == 0
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert (report["updated"], report["unchanged"]) == (1, 0)
+
+
+def test_removed_notes_are_deleted_by_guid(tmp_path: Path):
+    with MockAnkiConnectServer() as server:
+        kept = server.collection.import_note("Deck", "Basic", {"Front": "Kept", "Back": "A"}, "keep-guid")
+        server.collection.import_note("Deck", "Basic", {"Front": "Gone", "Back": "B"}, "gone-guid")
+        exporter = AnkiConnectExporter(AnkiConnectConfig(url=server.url))
+        try:
+            with exporter.open_deck(DeckInfo("Deck", URL), tmp_path) as writer:
+                writer.remove("gone-guid", "Gone")
+                writer.remove("never-imported", "Never")
+                report_path = writer.commit()
+        finally:
+            exporter.close()
+
+        assert [note["id"] for note in server.notes("Deck")] == [kept]
+    assert json.loads(report_path.read_text(encoding="utf-8"))["removed"] == 1
+
+
+def test_removed_notes_added_through_ankiconnect_are_deleted_by_front(tmp_path: Path):
+    image = MediaRef("https://example.com/cell.png", IMAGE, FRONT, "cell.png")
+    cards = [
+        Flashcard("Kept", "A"),
+        Flashcard("Gone & done", "B"),
+        Flashcard("Pictured", "C", media=(image,)),
+        Flashcard("Twice", "D"),
+        Flashcard("Twice", "E"),
+    ]
+    with MockAnkiConnectServer() as server:
+        exporter = DeltaExporter(AnkiConnectExporter(AnkiConnectConfig(url=server.url)), ManifestStore(tmp_path))
+        try:
+            exporter.export(Deck("Deck", cards, URL, "1"), tmp_path)
+            report_path = exporter.export(Deck("Deck", [cards[0], cards[3]], URL, "1"), tmp_path)
+        finally:
+            exporter.exporter.close()
+
+        assert [note["fields"]["Back"] for note in server.notes("Deck")] == ["A", "D"]
+    assert json.loads(report_path.read_text(encoding="utf-8"))["removed"] == 3
+
+
+class ThreadRecordingWriter(DeckWriter):
+    def __init__(self, threads: List[int]):
+        self.threads = threads
+
+    def write(self, flashcard: Flashcard) -> None:
+        self.threads.append(threading.get_ident())
+
+    def commit(self) -> Path:
+        self.threads.append(threading.get_ident())
+        return Path("deck")
+
+    def abort(self) -> None:
+        self.threads.append(threading.get_ident())
+
+
+class ThreadRecordingExporter(ExporterInterface):
+    def __init__(self):
+        self.threads: List[int] = []
+
+    def open_deck(self, info: DeckInfo, output_path: Path) -> DeckWriter:
+        self.threads.append(threading.get_ident())
+        return ThreadRecordingWriter(self.threads)
+
+
+def test_streamed_cards_are_written_off_the_event_loop():
+    async def cards():
+        for n in range(250):
+            yield Flashcard(f"Q{n}", f"A{n}")
+
+    async def export():
+        exporter = ThreadRecordingExporter()
+        await exporter.export_async_stream(DeckInfo("Deck", URL), cards(), Path("."))
+        return exporter.threads, threading.get_ident()
+
+    threads, loop_thread = asyncio.run(export())
+    # open_deck, every card, commit and abort all on the one writer thread
+    assert len(threads) == 253
+    assert len(set(threads)) == 1 and loop_thread not in threads
+
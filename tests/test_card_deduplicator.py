@@ -0,0 +1,80 @@
+from brainscape_to_anki.application.services.card_deduplicator import CardDeduplicator, DedupConfig
+from brainscape_to_anki.application.services.deck_merger import DeckMerger
+from brainscape_to_anki.domain.models.deck import Deck, DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import FRONT, IMAGE, MediaRef
+from brainscape_to_anki.domain.models.note_identity import NoteGuids, deck_key
+
+QUESTION = "Which river flows through the capital city of France and into the English Channel?"
+REWORDED = "Which river flows through the capital city of France and into the English Channels?"
+ANSWER = "The Seine, which rises on the Langres plateau"
+
+
+def test_exact_duplicates_ignore_case_spacing_and_end_punctuation():
+    flashcards = [
+        Flashcard(QUESTION, ANSWER),
+        Flashcard("  " + QUESTION.rstrip("?").replace(" ", "   ").upper(), ANSWER + "."),
+        Flashcard(REWORDED, ANSWER),
+    ]
+    result = CardDeduplicator().deduplicate(flashcards)
+
+    assert result.flashcards == [flashcards[0], flashcards[2]]
+    assert result.merged_into == [0, 0, 2]
+    assert (result.exact_duplicates, result.near_duplicates) == (1, 0)
+
+
+def test_near_duplicates_only_merge_when_enabled_and_similar():
+    flashcards = [
+        Flashcard(QUESTION, ANSWER),
+        Flashcard(REWORDED, ANSWER),
+        Flashcard("What is the longest river in France?", "The Loire"),
+        # Same text, other image: a different card
+        Flashcard(REWORDED, ANSWER, media=(MediaRef(url="https://example.com/a.png", kind=IMAGE, side=FRONT),)),
+    ]
+
+    result = CardDeduplicator(DedupConfig(near=True)).deduplicate(flashcards)
+
+    assert result.merged_into == [0, 0, 2, 3]
+    assert (result.exact_duplicates, result.near_duplicates) == (0, 1)
+    assert CardDeduplicator().deduplicate(flashcards).merged_into == [0, 1, 2, 3]
+
+
+def test_kept_card_collects_the_tags_of_its_duplicates():
+    flashcards = [
+        Flashcard(QUESTION, ANSWER, tags=("course::chapter_1",)),
+        Flashcard(QUESTION, ANSWER, tags=("course::chapter_2", "geography")),
+        Flashcard(QUESTION.upper(), ANSWER, tags=("course::chapter_1", "rivers")),
+    ]
+    result = CardDeduplicator().deduplicate(flashcards)
+
+    assert [card.tags for card in result.flashcards] == [
+        ("course::chapter_1", "course::chapter_2", "geography", "rivers")
+    ]
+
+
+def test_exact_duplicate_of_a_near_duplicate_follows_it_to_the_kept_card():
+    flashcards = [
+        Flashcard(QUESTION, ANSWER, tags=("a",)),
+        Flashcard(REWORDED, ANSWER, tags=("b",)),
+        Flashcard(REWORDED.upper(), ANSWER, tags=("c",)),
+    ]
+    result = CardDeduplicator(DedupConfig(near=True)).deduplicate(flashcards)
+
+    assert result.merged_into == [0, 0, 0]
+    assert (result.exact_duplicates, result.near_duplicates) == (1, 1)
+    assert [card.tags for card in result.flashcards] == [("a", "b", "c")]
+
+
+def test_merged_cards_keep_the_guid_of_their_own_deck():
+    first = Deck("Chapter 1", [Flashcard(QUESTION, ANSWER), Flashcard("Q1", "A1")], "https://example.com/decks/1", "1")
+    second = Deck("Chapter 2", [Flashcard(QUESTION, ANSWER), Flashcard("Q2", "A2")], "https://example.com/decks/2", "2")
+
+    def guids(deck: Deck):
+        assign = NoteGuids(deck_key(DeckInfo(deck.title, deck.url, deck.source_id))).assign
+        return [assign(card) for card in deck.flashcards]
+
+    merged = DeckMerger().merge("Course", [first, second], first.url, "course")
+    assert [card.guid for card in merged.flashcards] == guids(first) + guids(second)[1:]
+    # Dropping a deck leaves the GUIDs of the others as they were
+    alone = DeckMerger().merge("Course", [second], second.url, "other")
+    assert [card.guid for card in alone.flashcards] == guids(second)
@@ -0,0 +1,46 @@
+import csv
+from pathlib import Path
+from typing import List
+
+from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.note_identity import NoteGuids
+from brainscape_to_anki.infrastructure.exporters.anki_exporter import AnkiExporter
+from brainscape_to_anki.infrastructure.exporters.delta_exporter import DeltaExporter, ManifestStore
+
+DECK = Deck(
+    title="Deck",
+    flashcards=[Flashcard("Question", "Answer"), Flashcard("Question", "Other answer"), Flashcard("Q2", "A2")],
+    url="https://example.com/decks/1",
+    source_id="1",
+)
+
+
+def read_csv(path: Path) -> List[List[str]]:
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        return list(csv.reader(line for line in csv_file if not line.startswith("#")))
+
+
+def test_csv_has_anki_headers_and_stable_guids(tmp_path: Path):
+    path = AnkiExporter().export(DECK, tmp_path)
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines[:4] == ["#separator:comma", "#html:false", "#columns:Front,Back,GUID", "#guid column:3"]
+    guids = NoteGuids("1")
+    assert read_csv(path) == [[card.front, card.back, guids.assign(card)] for card in DECK.flashcards]
+    # A second export gives every card the same GUID
+    assert read_csv(AnkiExporter().export(DECK, tmp_path / "again")) == read_csv(path)
+
+
+def test_delta_export_leaves_the_full_export_alone(tmp_path: Path):
+    full_path = AnkiExporter().export(DECK, tmp_path)
+    delta = DeltaExporter(AnkiExporter(), ManifestStore(tmp_path / "manifests"))
+    delta.export(DECK, tmp_path)
+
+    edited = Deck(DECK.title, [DECK.flashcards[0], Flashcard("Q2", "Corrected")], DECK.url, DECK.source_id)
+    delta_path = delta.export(edited, tmp_path)
+
+    assert delta_path == tmp_path / "Deck.delta.csv"
+    assert len(read_csv(full_path)) == 3
+    assert [row[:2] for row in read_csv(delta_path)] == [["Q2", "Corrected"]]
+    assert [row[1] for row in read_csv(tmp_path / "Deck.removed.csv")] == ["Front", "Question"]
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from brainscape_to_anki.infrastructure.parsing.html_backend import available_backends, get_backend, parse_targeted
+from brainscape_to_anki.infrastructure.parsing.targets import DECK_PAGE_TARGETS
+from brainscape_to_anki.infrastructure.scrapers.deck_id_resolver import HTML_TARGETS, DeckIdResolver
+
+URL = "https://www.brainscape.com/flashcards/cell-biology"
+ROW = '<div class="flashcard-row"><div class="scf-face">Q</div><div class="scf-face">A</div></div>'
+RELATED = '<aside><a class="deck-link" data-deck-id="999" href="/decks/999">Related deck</a></aside>'
+PACK_SCRIPT = '<script>window.pack = {"deckId": 555, "slug": "other-deck"};</script>'
+
+
+@pytest.fixture
+def resolver(tmp_path: Path) -> DeckIdResolver:
+    return DeckIdResolver(tmp_path / "deck_ids.json")
+
+
+def page(head: str = "", body: str = "") -> str:
+    return f"<html><head>{head}</head><body>{body}</body></html>"
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("partial", [False, True])
+def test_related_decks_and_scripts_do_not_hide_the_canonical_id(resolver, backend, partial):
+    html = page(
+        '<link rel="canonical" href="https://www.brainscape.com/decks/1234">' + PACK_SCRIPT,
+        RELATED + f'<div class="deck-cards" data-deck-id="1234">{ROW}</div>',
+    )
+    parser = get_backend(backend)
+    soup = parse_targeted(parser, html, DECK_PAGE_TARGETS + HTML_TARGETS) if partial else parser.parse(html)
+
+    assert resolver.resolve_from_html(soup, URL) == "1234"
+
+
+def test_canonical_slug_with_id(resolver):
+    soup = BeautifulSoup(page('<link rel="canonical" href="/flashcards/cell-biology-4321">'), "html.parser")
+    assert resolver.resolve_from_html(soup, URL) == "4321"
+
+
+def test_data_deck_id_only_counts_on_the_card_container(resolver):
+    soup = BeautifulSoup(page(body=RELATED + f'<div class="deck-cards" data-deck-id="1234">{ROW}</div>'), "html.parser")
+    assert resolver.resolve_from_html(soup, URL) == "1234"
+
+    soup = BeautifulSoup(page(body=RELATED + f'<div class="deck-cards">{ROW}</div>'), "html.parser")
+    assert resolver.resolve_from_html(soup, URL) is None
+
+
+def test_script_id_must_agree_with_the_slug(resolver):
+    own = '<script>window.deck = {"slug": "cell-biology", "deckId": 777};</script>'
+
+    assert resolver.resolve_from_html(BeautifulSoup(page(PACK_SCRIPT + own), "html.parser"), URL) == "777"
+    assert resolver.resolve_from_html(BeautifulSoup(page(PACK_SCRIPT), "html.parser"), URL) is None
+    assert resolver.resolve_from_html(BeautifulSoup(page(PACK_SCRIPT + own), "html.parser")) is None
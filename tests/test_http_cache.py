@@ -0,0 +1,86 @@
+import asyncio
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from brainscape_to_anki.infrastructure.http.cache import CachingTransport, HttpCache
+
+URL = "https://example.com/decks/1"
+
+
+def network_response(status_code: int, text: str = "", **headers: str) -> httpx.Response:
+    # A body that still has to be read, the way one arrives from the network
+    return httpx.Response(status_code, headers=headers, stream=httpx.ByteStream(text.encode("utf-8")))
+
+
+def fetch_all(cache: HttpCache, responses: List[httpx.Response], evict_between: bool = False):
+    requests: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return responses[len(requests) - 1]
+
+    async def run() -> List[httpx.Response]:
+        fetched = []
+        transport = CachingTransport(httpx.MockTransport(handler), cache)
+        async with httpx.AsyncClient(transport=transport) as client:
+            for _ in responses:
+                response = await client.get(URL)
+                await response.aread()
+                fetched.append(response)
+                if evict_between:
+                    cache.body_path(cache.key_for(URL)).unlink()
+        return fetched
+
+    return asyncio.run(run()), requests
+
+
+def test_fresh_entry_is_served_from_disk(tmp_path: Path):
+    cache = HttpCache(tmp_path)
+    fresh = {"Cache-Control": "max-age=600"}
+    fetched, requests = fetch_all(cache, [network_response(200, "deck", **fresh), network_response(500)])
+
+    assert [response.text for response in fetched] == ["deck", "deck"]
+    assert fetched[1].extensions.get("from_cache") is True
+    assert len(requests) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_evicted_body_is_a_miss_not_an_error(tmp_path: Path):
+    cache = HttpCache(tmp_path)
+    fresh = {"Cache-Control": "max-age=600"}
+    fetched, requests = fetch_all(
+        cache,
+        [network_response(200, "old", **fresh), network_response(200, "new", **fresh)],
+        evict_between=True,
+    )
+
+    assert [response.text for response in fetched] == ["old", "new"]
+    assert len(requests) == 2
+
+
+def test_body_stays_readable_when_evicted_after_the_lookup(tmp_path: Path):
+    cache = HttpCache(tmp_path)
+    fetch_all(cache, [network_response(200, "deck", **{"Cache-Control": "max-age=600"})])
+
+    async def read_after_eviction() -> bytes:
+        transport = CachingTransport(httpx.MockTransport(lambda request: httpx.Response(500)), cache)
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with client.stream("GET", URL) as response:
+                cache.invalidate(URL)
+                return await response.aread()
+
+    assert asyncio.run(read_after_eviction()) == b"deck"
+
+
+def test_revalidation_answers_from_disk(tmp_path: Path):
+    cache = HttpCache(tmp_path)
+    fetched, requests = fetch_all(cache, [
+        network_response(200, "deck", ETag='"v1"', **{"Cache-Control": "no-cache"}),
+        network_response(304, ETag='"v1"'),
+    ])
+
+    assert [response.text for response in fetched] == ["deck", "deck"]
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert cache.stats()["revalidated"] == 1
@@ -0,0 +1,56 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import pytest
+
+from brainscape_to_anki.infrastructure.scrapers.json_stream import iter_json_array
+
+CARDS = [{"question": f"Q{n} é \"quoted\"", "answer": f"A{n}", "n": n, "score": n / 3} for n in range(50)]
+
+
+async def chunked(text: str, size: int) -> AsyncIterator[str]:
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def read(text: str, size: int, wrapper_key: Optional[str] = "cards") -> Tuple[List[Any], Dict[str, Any]]:
+    metadata: Dict[str, Any] = {}
+
+    async def collect() -> List[Any]:
+        return [item async for item in iter_json_array(chunked(text, size), wrapper_key, metadata)]
+
+    return asyncio.run(collect()), metadata
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_bare_array(size: int):
+    assert read(json.dumps(CARDS), size) == (CARDS, {})
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_wrapped_array_with_metadata_on_both_sides(size: int):
+    document = {"page": 1, "meta": {"per_page": 50, "tags": ["a", "b"]}, "cards": CARDS, "total": 120, "last": None}
+    items, metadata = read(json.dumps(document, indent=1), size)
+
+    assert items == CARDS
+    assert metadata == {"page": 1, "meta": {"per_page": 50, "tags": ["a", "b"]}, "total": 120, "last": None}
+
+
+def test_numbers_split_across_chunks():
+    assert read("[12345, 6.5e3, -7]", 2) == ([12345, 6500.0, -7], {})
+
+
+@pytest.mark.parametrize("text", [
+    "", "42", '{"total": 3}', '{"cards": {"not": "a list"}}', '{"cards": [1, 2', "[1 2]", '{"cards" [1]}',
+])
+def test_malformed_documents_raise(text: str):
+    with pytest.raises(ValueError):
+        read(text, 3)
+
+
+def test_large_wrapped_body_is_streamed_in_small_chunks():
+    # Reading the whole body before decoding was quadratic in the chunk count
+    cards = [{"question": "q" * 200, "answer": "a" * 200}] * 20000
+    items, metadata = read(json.dumps({"cards": cards, "total": len(cards)}), 4096)
+    assert len(items) == len(cards) and metadata == {"total": len(cards)}
@@ -0,0 +1,43 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from brainscape_to_anki.domain.models.deck import Deck
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.media import BACK, FRONT, IMAGE, MediaRef
+from brainscape_to_anki.infrastructure.media.pipeline import MediaConfig, MediaPipeline
+from brainscape_to_anki.infrastructure.media.store import MediaStore
+
+PAGE_URL = "https://www.brainscape.com/decks/1"
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 64
+
+
+def test_identical_media_is_downloaded_once_and_stored_once(tmp_path: Path):
+    requested: List[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        return httpx.Response(200, headers={"Content-Type": "image/png"}, stream=httpx.ByteStream(PNG))
+
+    deck = Deck("Deck", [
+        Flashcard("Q1", "A1", media=(MediaRef("/img/cell.png", IMAGE, FRONT),)),
+        Flashcard("Q2", "A2", media=(MediaRef("/img/cell.png", IMAGE, BACK),)),
+        Flashcard("Q3", "A3", media=(MediaRef("https://cdn.example.com/copy", IMAGE, FRONT),)),
+    ], PAGE_URL)
+    store = MediaStore(tmp_path / "media")
+    # Built outside any event loop, as the GUI and the load test do
+    pipeline = MediaPipeline(store, MediaConfig(concurrency=1))
+
+    async def fetch() -> Deck:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await pipeline.fetch_deck(client, deck, PAGE_URL)
+
+    fetched = asyncio.run(fetch())
+
+    filenames = {ref.filename for flashcard in fetched.flashcards for ref in flashcard.media}
+    assert len(requested) == 2
+    assert len(filenames) == 1 and store.path(filenames.pop()).read_bytes() == PNG
+    assert len(json.loads(store.index_path.read_text(encoding="utf-8"))) == 2
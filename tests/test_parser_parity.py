@@ -0,0 +1,43 @@
+from typing import Dict, List, Tuple
+
+import pytest
+
+from brainscape_to_anki.devtools.parser_parity import (
+    REFERENCE_BACKEND,
+    Extractor,
+    fixtures,
+    html_processor_extractor,
+    scraper_extractor,
+)
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.infrastructure.parsing.html_backend import available_backends, get_backend
+
+PAGES = fixtures([])
+
+
+def extractors() -> Dict[str, Extractor]:
+    return {"scraper": scraper_extractor(), "html import": html_processor_extractor()}
+
+
+@pytest.fixture(scope="module")
+def reference() -> Dict[Tuple[str, str], Tuple[str, List[Flashcard]]]:
+    return {
+        (extractor_name, page_name): extract(get_backend(REFERENCE_BACKEND), html, False)
+        for extractor_name, extract in extractors().items()
+        for page_name, html in PAGES.items()
+    }
+
+
+@pytest.mark.parametrize("partial", [False, True], ids=["full", "partial"])
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("page_name", sorted(PAGES))
+def test_backends_extract_the_same_cards(reference, page_name, backend, partial):
+    for extractor_name, extract in extractors().items():
+        title, flashcards = extract(get_backend(backend), PAGES[page_name], partial)
+        expected_title, expected_flashcards = reference[extractor_name, page_name]
+
+        assert title == expected_title, extractor_name
+        assert flashcards == expected_flashcards, extractor_name
+        # The HTML import has no strategy for some of the scraper's layouts
+        if extractor_name == "scraper":
+            assert flashcards, f"{extractor_name} found no cards on {page_name}"
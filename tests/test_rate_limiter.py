@@ -0,0 +1,86 @@
+import asyncio
+from typing import List
+
+import httpx
+
+from brainscape_to_anki.infrastructure.http.rate_limiter import (
+    AdaptiveRateLimiter,
+    HostRateLimiter,
+    RateLimitConfig,
+    RateLimitedTransport,
+)
+from brainscape_to_anki.infrastructure.http.resilience import RetryPolicy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_retry_after_on_success_is_not_throttling():
+    clock = FakeClock()
+    limiter = HostRateLimiter("example.com", RateLimitConfig(), clock)
+
+    limiter.record(200, 0.1, retry_after=30)
+    limiter.record(301, 0.1, retry_after=30)
+
+    assert limiter.throttle_events == 0
+    assert limiter.paused_until == 0.0
+    assert limiter.concurrency > RateLimitConfig().initial_concurrency
+
+
+def test_retry_after_on_throttling_pauses_host():
+    clock = FakeClock()
+    limiter = HostRateLimiter("example.com", RateLimitConfig(), clock)
+
+    limiter.record(429, 0.1, retry_after=5)
+
+    assert limiter.throttle_events == 1
+    assert limiter.paused_until == clock.now + 5
+    assert limiter.concurrency < RateLimitConfig().initial_concurrency
+
+
+def run_transport(responses: List[httpx.Response]):
+    sleeps: List[float] = []
+    requests: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return responses[len(requests) - 1]
+
+    async def sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    async def fetch() -> httpx.Response:
+        transport = RateLimitedTransport(
+            httpx.MockTransport(handler),
+            AdaptiveRateLimiter(RateLimitConfig(requests_per_second=None)),
+            retry_policy=RetryPolicy(base_delay=1.0, max_delay=1.0),
+            sleep=sleep,
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("https://example.com/deck")
+
+    return asyncio.run(fetch()), requests, sleeps
+
+
+def test_throttled_without_retry_after_backs_off_before_retrying():
+    response, requests, sleeps = run_transport([httpx.Response(503), httpx.Response(200, text="ok")])
+
+    assert response.status_code == 200
+    assert len(requests) == 2
+    assert len(sleeps) == 1 and 0 <= sleeps[0] <= 1.0
+
+
+def test_throttled_with_retry_after_waits_through_the_host_pause():
+    response, requests, sleeps = run_transport([
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, text="ok"),
+    ])
+
+    assert response.status_code == 200
+    assert len(requests) == 2
+    assert sleeps == []
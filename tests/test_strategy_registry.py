@@ -0,0 +1,64 @@
+from typing import List, Optional
+
+from bs4 import BeautifulSoup, Tag
+
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.infrastructure.parsing.element_index import ElementIndex
+from brainscape_to_anki.infrastructure.parsing.strategy_registry import ExtractionStrategy, StrategyRegistry
+
+PAGE = """
+<div class="flashcard-row"><div class="face">One</div><div class="face">Two</div></div>
+<div class="flashcard-row"><div class="face">Three</div></div>
+"""
+
+
+def faces(row: Tag, index: ElementIndex) -> List[str]:
+    return [face.get_text() for face in index.find_all(row, "div", "face")]
+
+
+def both_faces(row: Tag, index: ElementIndex) -> Optional[List[Flashcard]]:
+    found = faces(row, index)
+    return [Flashcard(front=found[0], back=found[1])] if len(found) == 2 else None
+
+
+def first_face_twice(row: Tag, index: ElementIndex) -> Optional[List[Flashcard]]:
+    found = faces(row, index)
+    return [Flashcard(front=found[0], back=found[0])]
+
+
+def strategies() -> List[ExtractionStrategy]:
+    return [
+        ExtractionStrategy("both_faces", both_faces, frozenset({"face"})),
+        ExtractionStrategy("first_face_twice", first_face_twice, frozenset({"face"})),
+        ExtractionStrategy("needs_missing_class", lambda row, index: [Flashcard("x", "x")], frozenset({"absent"})),
+    ]
+
+
+def extract_all(registry: StrategyRegistry) -> List[Flashcard]:
+    soup = BeautifulSoup(PAGE, "html.parser")
+    index = ElementIndex(soup)
+    cards: List[Flashcard] = []
+    for row in index.find_all(soup, "div", "flashcard-row"):
+        cards.extend(registry.extract(row, index) or [])
+    return cards
+
+
+def test_first_applicable_strategy_in_declared_order_wins():
+    registry = StrategyRegistry(strategies())
+
+    assert extract_all(registry) == [Flashcard("One", "Two"), Flashcard("Three", "Three")]
+    assert extract_all(registry) == [Flashcard("One", "Two"), Flashcard("Three", "Three")]
+
+
+def test_strategies_missing_a_required_class_are_never_run():
+    ran: List[str] = []
+
+    def record(row: Tag, index: ElementIndex) -> Optional[List[Flashcard]]:
+        ran.append("needs_missing_class")
+        return None
+
+    registry = StrategyRegistry([ExtractionStrategy("needs_missing_class", record, frozenset({"absent"}))])
+
+    assert extract_all(registry) == []
+    assert ran == []
+    assert registry.snapshot() == {"layouts": 1}
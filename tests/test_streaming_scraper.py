@@ -0,0 +1,126 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+import pytest
+
+from brainscape_to_anki.domain.models.deck import DeckInfo
+from brainscape_to_anki.domain.models.flashcard import Flashcard
+from brainscape_to_anki.domain.models.note_identity import NoteGuids, deck_key
+from brainscape_to_anki.infrastructure.http.resilience import RetryPolicy
+from brainscape_to_anki.infrastructure.scrapers.brainscape_scraper import BrainscapeScraper
+from brainscape_to_anki.infrastructure.scrapers.deck_id_resolver import DeckIdResolver
+
+BASE_URL = "https://www.brainscape.com"
+ROW = '<div class="flashcard-row"><div class="scf-face">{}</div><div class="scf-face">{}</div></div>'
+
+
+def page(title: str, body: str = "", head: str = "") -> str:
+    return f'<html><head>{head}</head><body><h1 class="deck-title">{title}</h1>{body}</body></html>'
+
+
+def api_cards(*pairs: Tuple[str, str]) -> List[Dict[str, str]]:
+    return [{"question": question, "answer": answer} for question, answer in pairs]
+
+
+def stream(tmp_path: Path, routes: Dict[str, Tuple[int, str]], url: str, **options):
+    requested: List[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        status, body = routes.get(str(request.url), (404, "not found"))
+        return httpx.Response(status, stream=httpx.ByteStream(body.encode("utf-8")))
+
+    scraper = BrainscapeScraper(
+        deck_id_resolver=DeckIdResolver(tmp_path / "deck_ids.json"),
+        **options,
+    )
+    scraper._create_client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def run():
+        info = DeckInfo(title="", url=url)
+        flashcards = [flashcard async for flashcard in scraper.iter_flashcards(url, info)]
+        return info, [(flashcard.front, flashcard.back) for flashcard in flashcards]
+
+    info, cards = asyncio.run(run())
+    return info, cards, requested
+
+
+def test_numeric_deck_streams_every_api_page(tmp_path):
+    url = f"{BASE_URL}/decks/42"
+    api_url = f"{BASE_URL}/api/decks/42/cards"
+    routes = {
+        url: (200, page("Cell Biology")),
+        f"{api_url}?page=1&per_page=2": (
+            200, json.dumps({"cards": api_cards(("Q1", "A1"), ("Q2", "A2")), "total": 3, "per_page": 2}),
+        ),
+        f"{api_url}?page=2&per_page=2": (200, json.dumps({"cards": api_cards(("Q3", "A3"))})),
+    }
+
+    info, cards, _ = stream(tmp_path, routes, url, api_page_size=2)
+
+    assert cards == [("Q1", "A1"), ("Q2", "A2"), ("Q3", "A3")]
+    assert info.title == "Cell Biology"
+
+
+def test_deck_page_without_rows_falls_back_to_a_full_scrape(tmp_path):
+    url = f"{BASE_URL}/flashcards/cell-biology"
+    routes = {
+        url: (200, page("Cell Biology", head=f'<link rel="canonical" href="{BASE_URL}/decks/1234">')),
+        f"{BASE_URL}/api/decks/1234/cards": (200, json.dumps(api_cards(("Q1", "A1"), ("Q2", "A2")))),
+    }
+
+    info, cards, _ = stream(tmp_path, routes, url)
+
+    assert cards == [("Q1", "A1"), ("Q2", "A2")]
+    assert info.title == "Cell Biology"
+
+
+def test_numeric_deck_without_api_or_rows_uses_the_study_page(tmp_path):
+    url = f"{BASE_URL}/decks/42"
+    study_url = f"{BASE_URL}/study?deck_id=42"
+    routes = {
+        url: (200, page("Cell Biology")),
+        study_url: (200, page("Study", ROW.format("Q1", "A1"))),
+    }
+
+    info, cards, requested = stream(tmp_path, routes, url)
+
+    assert cards == [("Q1", "A1")]
+    assert info.title == "Cell Biology"
+    assert requested.count(f"{BASE_URL}/api/decks/42/cards") == 1
+
+
+def test_error_after_the_first_card_is_raised(tmp_path):
+    url = f"{BASE_URL}/decks/42"
+    api_url = f"{BASE_URL}/api/decks/42/cards"
+    routes = {
+        url: (200, page("Cell Biology", ROW.format("Q1", "A1"))),
+        f"{api_url}?page=1&per_page=1": (200, json.dumps({"cards": api_cards(("Q1", "A1")), "total": 2})),
+        f"{api_url}?page=2&per_page=1": (500, "down"),
+    }
+
+    with pytest.raises(httpx.HTTPStatusError):
+        stream(tmp_path, routes, url, api_page_size=1, retry_policy=RetryPolicy(max_attempts=1))
+
+
+def test_runs_of_the_same_url_give_the_same_guids(tmp_path):
+    url = f"{BASE_URL}/flashcards/cell-biology?utm_source=share"
+    routes = {
+        url: (200, page("Cell Biology", head=f'<link rel="canonical" href="{BASE_URL}/decks/1234">')),
+        f"{BASE_URL}/api/decks/1234/cards": (200, json.dumps(api_cards(("Q1", "A1"), ("Q2", "A2")))),
+    }
+
+    def guids():
+        info, cards, requested = stream(tmp_path, routes, url)
+        assign = NoteGuids(deck_key(info)).assign
+        return [assign(Flashcard(front, back)) for front, back in cards], requested
+
+    # The first run resolves the slug; the second goes straight to the API
+    first, first_requests = guids()
+    second, second_requests = guids()
+
+    assert first == second and len(first) == 2
+    assert len(second_requests) < len(first_requests)
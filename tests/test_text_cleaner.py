@@ -0,0 +1,16 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from brainscape_to_anki.infrastructure.parsing.text_cleaner import html_to_text
+
+
+@pytest.mark.parametrize("markup", [
+    "<b>plain</b> text",
+    "&#65;&#x42;&#X43; &#0; &#150; &#x110000; &#xD800;",
+    "&#12abc; &#x4fzz &#xg &#; &amp &ampx &nbsp; &bogus;",
+    "<script>hidden</script><p>shown<br>line</p><!-- comment -->",
+    "<ruby>kan<rt>reading</rt></ruby> <![CDATA[data]]>",
+    "<i>unclosed <u>tags</b> &lt;stray&gt;",
+])
+def test_matches_beautifulsoup_text(markup: str):
+    assert html_to_text(markup) == BeautifulSoup(markup, "html.parser").get_text()